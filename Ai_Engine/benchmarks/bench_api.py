@@ -0,0 +1,309 @@
+import argparse
+import asyncio
+import datetime
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+# End-to-end HTTP benchmark for every route of the API. The app runs
+# in-process against a fresh SQLite file seeded with benchmarks/dataset.py and
+# the fake LLM backend, so no Ollama or real database is touched. Pass
+# --database-url to run against another (empty) database such as Postgres.
+#
+#   python benchmarks/bench_api.py --requests 200 --concurrency 16 --save baseline.json
+#   python benchmarks/bench_api.py --compare baseline.json
+#
+# --compare exits with status 1 when a route's p95 or throughput regressed by
+# more than --tolerance against the saved baseline. --mixed adds a "MIXED" row
+# where every route's requests are interleaved at the same concurrency, which
+# is what shows one slow handler holding up the others. SSE routes are timed
+# to their first event, since they stay open until something happens.
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(bench_dir)
+for path in (parent_dir, bench_dir):
+    if path not in sys.path:
+        sys.path.append(path)
+
+import dataset
+
+SUBMISSION = (
+    "I reached out to a senior analyst on LinkedIn and asked about her typical day, "
+    "the skills she uses most and how she got her first job."
+)
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def build_scenarios(ids):
+    # name -> (method, path, body) factory taking the request number.
+    # Routes that change state draw from their own id pools so repeated
+    # requests stay valid.
+    users = ids["user_ids"]
+    guides = ids["guide_count"]
+    open_requests = iter(ids["open_request_ids"])
+    sessions = ids["session_ids"]
+    projects = ids["project_ids"]
+    user = lambda n: dataset.user_email(users[n % len(users)])
+    guide = lambda n: dataset.guide_email(n % guides + 1)
+    stamp = int(time.time())
+
+    return {
+        "GET /ready": lambda n: ("GET", "/ready", None),
+        "GET /metrics": lambda n: ("GET", "/metrics", None),
+        "POST /signup": lambda n: ("POST", "/signup", {"name": f"New {n}", "email": f"new{stamp}_{n}@bench.local", "password": "x", "role": "explorer"}),
+        "POST /login": lambda n: ("POST", "/login", {"email": user(n), "password": dataset.PASSWORD}),
+        "POST /set_role": lambda n: ("POST", "/set_role", {"email": user(n), "role": "explorer"}),
+        "GET /profile/{email}": lambda n: ("GET", f"/profile/{user(n)}", None),
+        "PUT /update-profile/{email}": lambda n: ("PUT", f"/update-profile/{user(n)}", {"country": "India", "timezone": "IST"}),
+        "GET /guide/status/{email}": lambda n: ("GET", f"/guide/status/{guide(n)}", None),
+        "POST /guide/onboard": lambda n: ("POST", "/guide/onboard", {"email": guide(n), "linkedin_url": "https://example.com", "expertise_fields": dataset.FIELDS[:2]}),
+        "POST /guide/register": lambda n: ("POST", "/guide/register", {
+            "full_name": f"New Guide {n}", "email": f"newguide{stamp}_{n}@bench.local", "password": "x",
+            "primary_domain": "Data Science", "years_experience": 5, "current_role": "Analyst",
+            "organization": "Org", "linkedin_portfolio_url": "https://example.com", "bio": "Bio", "weekly_availability": "2 hours"
+        }),
+        "POST /guide/auth/login": lambda n: ("POST", "/guide/auth/login", {"email": guide(n), "password": dataset.PASSWORD}),
+        "GET /guides/discovery": lambda n: ("GET", "/guides/discovery?field=Data&min_exp=2", None),
+        "GET /admin/pending_guides": lambda n: ("GET", "/admin/pending_guides", None),
+        "POST /admin/verify_guide": lambda n: ("POST", "/admin/verify_guide", {"user_id": ids["guide_user_ids"][n % guides], "action": "approve"}),
+        "POST /mentorship/request": lambda n: ("POST", "/mentorship/request", {"email": user(n), "field": "Data Science", "title": "Need help", "description": "How do I start?"}),
+        "GET /mentorship/available/{email}": lambda n: ("GET", f"/mentorship/available/{guide(n)}", None),
+        "POST /mentorship/accept": lambda n: ("POST", "/mentorship/accept", {"guide_email": guide(n), "request_id": next(open_requests)}),
+        "GET /chat/sessions/{email}": lambda n: ("GET", f"/chat/sessions/{guide(n)}", None),
+        "POST /chat/send": lambda n: ("POST", "/chat/send", {"session_id": sessions[n % len(sessions)], "sender_email": user(n), "content": "Thanks for the advice!"}),
+        "GET /chat/messages/{session_id}": lambda n: ("GET", f"/chat/messages/{sessions[n % len(sessions)]}", None),
+        "POST /save-result": lambda n: ("POST", "/save-result", {"user_email": user(n), "career": "Law", "score": 72.5, "difficulty": "basic"}),
+        "GET /performance/{email}": lambda n: ("GET", f"/performance/{user(n)}", None),
+        "GET /training/status/{email}": lambda n: ("GET", f"/training/status/{user(n)}", None),
+        "POST /training/generate_task/{email}": lambda n: ("POST", f"/training/generate_task/{user(n)}", None),
+        "POST /training/submit": lambda n: ("POST", "/training/submit", {"email": user(n), "submission_text": SUBMISSION}),
+        "GET /training/submission/{email}": lambda n: ("GET", f"/training/submission/{user(n)}", None),
+        "GET /training/submission/{email}/events": lambda n: ("GET", f"/training/submission/{user(n)}/events", None),
+        "POST /dream-project/create": lambda n: ("POST", "/dream-project/create", {"email": user(n), "description": f"A habit tracker app #{n % 20}", "tech_preference": "Python", "skill_level": "Beginner"}),
+        "GET /dream-project/all/{email}": lambda n: ("GET", f"/dream-project/all/{user(n)}", None),
+        "POST /dream-project/comment": lambda n: ("POST", "/dream-project/comment", {"project_id": projects[n % len(projects)], "user_email": user(n), "content": "Nice plan"}),
+        "GET /dream-project/comments/{project_id}": lambda n: ("GET", f"/dream-project/comments/{projects[n % len(projects)]}", None),
+        "POST /generate": lambda n: ("POST", "/generate", {"field": dataset.FIELDS[n % 3], "difficulty": "basic"}),
+        "POST /generate/stream": lambda n: ("POST", "/generate/stream", {"field": dataset.FIELDS[n % 3], "difficulty": "basic"}),
+        "POST /chat": lambda n: ("POST", "/chat", {"message": "What career suits someone who likes math?", "history": []}),
+        "POST /chat/stream": lambda n: ("POST", "/chat/stream", {"message": "What career suits someone who likes math?", "history": []}),
+        "POST /simulate": lambda n: ("POST", "/simulate", {"role": "Doctor", "user_context": "", "history": []}),
+        "POST /simulate/stream": lambda n: ("POST", "/simulate/stream", {"role": "Doctor", "user_context": "", "history": []}),
+    }
+
+# Statuses that are a correct answer for the route, not an error
+EXPECTED = {
+    "GET /ready": {200, 503}, # 503 until warm-up has finished
+    "POST /training/submit": {200, 202, 409}, # 409 when the user's last submission is still queued
+    "MIXED": set(range(200, 400)) | {409, 503},
+}
+
+async def first_sse_event(client, path):
+    # SSE subscriptions stay open until something happens, and httpx's
+    # ASGITransport only returns once a response is complete. So the app is
+    # called directly: returns the status once the first event is sent, then
+    # disconnects like a closed browser tab.
+    status = None
+    first_event = asyncio.Event()
+    disconnected = asyncio.Event()
+
+    async def receive():
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            if b"data:" in message.get("body", b"") or not message.get("more_body"):
+                first_event.set()
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "", "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 50000), "server": ("bench", 80)
+    }
+    app = asyncio.ensure_future(client._transport.app(scope, receive, send))
+    waiter = asyncio.ensure_future(first_event.wait())
+    await asyncio.wait({app, waiter}, return_when=asyncio.FIRST_COMPLETED)
+    disconnected.set()
+    for task in (app, waiter):
+        task.cancel()
+    await asyncio.gather(app, waiter, return_exceptions=True)
+    if app.done() and not app.cancelled() and app.exception() is not None:
+        raise app.exception()
+    return status
+
+async def run_route(client, name, make_request, count, concurrency):
+    counter = itertools.count()
+    latencies = []
+    errors = {}
+
+    async def worker():
+        while True:
+            n = next(counter)
+            if n >= count:
+                return
+            method, path, body = make_request(n)
+            start = time.perf_counter()
+            try:
+                if path.endswith("/events"):
+                    status = await first_sse_event(client, path)
+                else:
+                    response = await client.request(method, path, json=body)
+                    await response.aread() # streaming routes: include the full body
+                    status = response.status_code
+            except Exception as e:
+                status = type(e).__name__
+            latencies.append((time.perf_counter() - start) * 1000)
+            if status not in EXPECTED.get(name, range(200, 400)):
+                errors[str(status)] = errors.get(str(status), 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+
+    return {
+        "requests": count,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "throughput_rps": round(count / elapsed, 1)
+    }
+
+async def run(args):
+    import httpx
+    import main
+    import models
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        ids = dataset.seed(db, {"users": args.users, "messages": args.messages}, seed=args.seed)
+        if db.bind.dialect.name == "postgresql":
+            # Seeded rows carry their ids; new rows must not collide with them
+            from copy_database import reset_sequences
+            for table in models.Base.metadata.sorted_tables:
+                reset_sequences(db.connection(), table)
+            db.commit()
+    finally:
+        db.close()
+
+    scenarios = build_scenarios(ids)
+    if args.routes:
+        scenarios = {name: make for name, make in scenarios.items() if any(r in name for r in args.routes)}
+
+    results = {}
+    transport = httpx.ASGITransport(app=main.app)
+    async with main.lifespan(main.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            for name, make_request in scenarios.items():
+                results[name] = await run_route(client, name, make_request, args.requests, args.concurrency)
+                r = results[name]
+                errors = f"  errors={r['errors']}" if r["errors"] else ""
+                print(f"{name:<42} p50={r['p50_ms']:8.2f}ms  p95={r['p95_ms']:8.2f}ms  p99={r['p99_ms']:8.2f}ms  {r['throughput_rps']:8.1f} req/s{errors}")
+            if args.mixed:
+                # Request n goes to route n % len(routes), with that route's own counter
+                names = list(scenarios)
+                mixed = lambda n: scenarios[names[n % len(names)]](args.requests + n // len(names))
+                results["MIXED"] = r = await run_route(client, "MIXED", mixed, args.requests * len(names), args.concurrency)
+                errors = f"  errors={r['errors']}" if r["errors"] else ""
+                print(f"{'MIXED':<42} p50={r['p50_ms']:8.2f}ms  p95={r['p95_ms']:8.2f}ms  p99={r['p99_ms']:8.2f}ms  {r['throughput_rps']:8.1f} req/s{errors}")
+    return results
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=parent_dir, text=True).strip()
+    except Exception:
+        return None
+
+def compare(results, baseline, tolerance):
+    # Returns the list of regressions against a saved baseline
+    regressions = []
+    for name, old in baseline["routes"].items():
+        new = results.get(name)
+        if new is None:
+            continue
+        if new["p95_ms"] > old["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {old['p95_ms']}ms -> {new['p95_ms']}ms")
+        if new["throughput_rps"] < old["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {old['throughput_rps']} -> {new['throughput_rps']} req/s")
+        if sum(new["errors"].values()) > sum(old["errors"].values()):
+            regressions.append(f"{name}: errors {old['errors']} -> {new['errors']}")
+    return regressions
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Latency and throughput of every API route")
+    parser.add_argument("--requests", type=int, default=200, help="requests per route")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--routes", nargs="*", help="only routes whose name contains one of these")
+    parser.add_argument("--mixed", action="store_true", help="also run all selected routes interleaved")
+    parser.add_argument("--users", type=int, default=dataset.DEFAULT_SCALE["users"])
+    parser.add_argument("--messages", type=int, default=dataset.DEFAULT_SCALE["messages"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--database-url", help="empty database to use instead of a fresh SQLite file")
+    parser.add_argument("--llm-latency-ms", type=float, default=20, help="fake LLM latency per call")
+    parser.add_argument("--save", help="write results to this JSON baseline")
+    parser.add_argument("--compare", help="compare against this JSON baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed regression, 0.2 = 20%%")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    save_path = os.path.abspath(args.save) if args.save else None
+
+    # Throwaway database, cache and working directory; fake model
+    workdir = tempfile.mkdtemp(prefix="demodream_bench_")
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["DEMODREAM_LLM_CACHE_PATH"] = os.path.join(workdir, "llm_cache.db")
+    os.environ["DEMODREAM_LLM_BACKEND"] = "fake"
+    os.environ["DEMODREAM_FAKE_LLM_SEED"] = str(args.seed)
+    os.environ["DEMODREAM_FAKE_LLM_LATENCY_MS"] = str(args.llm_latency_ms)
+    os.chdir(workdir)
+
+    results = asyncio.run(run(args))
+
+    report = {
+        "meta": {
+            "created": datetime.datetime.utcnow().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "mixed": args.mixed,
+            "users": args.users,
+            "messages": args.messages,
+            "llm_latency_ms": args.llm_latency_ms,
+            "database": args.database_url.split("://")[0] if args.database_url else "sqlite"
+        },
+        "routes": results
+    }
+    if save_path:
+        with open(save_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline written to {save_path}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.compare}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nNo regressions against {args.compare} (tolerance {args.tolerance:.0%})")
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,147 @@
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# Write-heavy database benchmark: writer threads do what /chat/send does (user
+# lookup + message insert + commit) while reader threads poll like
+# /chat/messages. Each configuration gets a fresh seeded SQLite file.
+#
+#   python benchmarks/bench_db_writes.py --writers 8 --readers 16 --seconds 10
+#
+# "defaults" is the engine the app used to create (rollback journal, SQLite's
+# default pragmas, default pool); "tuned" is database.create_db_engine with
+# settings.SQLITE_PRAGMAS and the configured pool.
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(bench_dir)
+for path in (parent_dir, bench_dir):
+    if path not in sys.path:
+        sys.path.append(path)
+
+import dataset
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def build_engine(label, url):
+    import settings
+    from database import create_db_engine
+
+    if label == "defaults":
+        return create_db_engine(url, pragmas={}, pool_size=5, max_overflow=10)
+    return create_db_engine(url, pragmas=settings.SQLITE_PRAGMAS)
+
+def run_config(label, workdir, args):
+    from sqlalchemy.orm import sessionmaker
+    import models
+
+    engine = build_engine(label, f"sqlite:///{os.path.join(workdir, label + '.db')}")
+    models.Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    db = Session()
+    try:
+        ids = dataset.seed(db, {"users": args.users, "messages": args.messages}, seed=args.seed)
+    finally:
+        db.close()
+    sessions = ids["session_ids"]
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    results = {"write": [], "read": [], "errors": {}}
+
+    def record(kind, start, error=None):
+        with lock:
+            if error is None:
+                results[kind].append((time.perf_counter() - start) * 1000)
+            else:
+                key = f"{kind}: {error}"
+                results["errors"][key] = results["errors"].get(key, 0) + 1
+
+    def writer(n):
+        i = 0
+        while not stop.is_set():
+            i += 1
+            db = Session()
+            start = time.perf_counter()
+            try:
+                user = db.query(models.User).filter(models.User.email == dataset.user_email(n % args.users + 1)).first()
+                db.add(models.Message(session_id=sessions[(n + i) % len(sessions)], sender_id=user.id, content=f"Message {n}.{i}"))
+                db.commit()
+                record("write", start)
+            except Exception as e:
+                db.rollback()
+                record("write", start, str(e).splitlines()[0][:60])
+            finally:
+                db.close()
+
+    def reader(n):
+        i = 0
+        while not stop.is_set():
+            i += 1
+            db = Session()
+            start = time.perf_counter()
+            try:
+                db.query(models.Message).filter(
+                    models.Message.session_id == sessions[(n + i) % len(sessions)]
+                ).order_by(models.Message.timestamp.asc()).all()
+                record("read", start)
+            except Exception as e:
+                record("read", start, str(e).splitlines()[0][:60])
+            finally:
+                db.close()
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(args.writers)]
+    threads += [threading.Thread(target=reader, args=(n,)) for n in range(args.readers)]
+    for t in threads:
+        t.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    engine.dispose()
+
+    return {
+        "writes_per_s": round(len(results["write"]) / args.seconds, 1),
+        "write_p95_ms": round(percentile(results["write"], 95), 2),
+        "reads_per_s": round(len(results["read"]) / args.seconds, 1),
+        "read_p95_ms": round(percentile(results["read"], 95), 2),
+        "errors": results["errors"]
+    }
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Concurrent message writes and polls, default vs tuned SQLite engine")
+    parser.add_argument("--configs", nargs="+", default=["defaults", "tuned"], choices=["defaults", "tuned"])
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="demodream_dbwrites_")
+    # database.py builds its module-level engine on import; keep it off the real file
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'unused.db')}"
+
+    report = {}
+    for label in args.configs:
+        print(f"Running '{label}' for {args.seconds:.0f}s...")
+        report[label] = run_config(label, workdir, args)
+
+    print(f"\n{'config':<10} {'writes/s':>9} {'write p95':>10} {'reads/s':>9} {'read p95':>10}  errors")
+    for label, r in report.items():
+        errors = sum(r["errors"].values())
+        print(f"{label:<10} {r['writes_per_s']:>9.1f} {r['write_p95_ms']:>8.1f}ms {r['reads_per_s']:>9.1f} {r['read_p95_ms']:>8.1f}ms  {errors}")
+        for error, count in r["errors"].items():
+            print(f"{'':<10} {count:>6} x {error}")
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,112 @@
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Measures how cheap endpoints behave while LLM generations are in flight.
+# By default a stand-in Ollama server with fixed latency is started on a local
+# port so the benchmark runs anywhere; pass --ollama-host to use a real one.
+#
+#   python benchmarks/bench_event_loop.py --generations 4 --probes 50
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+FAKE_QUESTIONS = json.dumps([
+    {
+        "id": i,
+        "question": f"Sample question {i}?",
+        "options": ["A. One", "B. Two", "C. Three", "D. Four"],
+        "correct_answer": "A"
+    } for i in range(1, 11)
+])
+
+def start_fake_ollama(latency):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            self.rfile.read(length)
+            time.sleep(latency)
+            if self.path == "/api/chat":
+                body = {"model": "fake", "done": True, "message": {"role": "assistant", "content": "What subjects do you enjoy?"}}
+            else:
+                body = {"model": "fake", "done": True, "response": FAKE_QUESTIONS}
+            payload = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+async def probe(client, count):
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        await client.post("/login", json={"email": "nobody@example.com", "password": "x"})
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+def summarize(label, latencies):
+    print(f"{label:<28} p50={statistics.median(latencies):8.2f}ms  p95={percentile(latencies, 95):8.2f}ms  max={max(latencies):8.2f}ms")
+
+async def run(args):
+    import httpx
+    import main
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        idle = await probe(client, args.probes)
+
+        gen_start = time.perf_counter()
+        generations = [
+            asyncio.create_task(client.post("/generate", json={"field": "Engineering - Computer Science", "difficulty": "basic"}))
+            for _ in range(args.generations)
+        ]
+        await asyncio.sleep(0.05) # let the generations reach the model
+        loaded = await probe(client, args.probes)
+        await asyncio.gather(*generations)
+        gen_elapsed = time.perf_counter() - gen_start
+
+    print(f"\n{args.generations} concurrent /generate calls finished in {gen_elapsed:.2f}s")
+    summarize("/login idle", idle)
+    summarize("/login during generations", loaded)
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Cheap-endpoint latency while generations run")
+    parser.add_argument("--generations", type=int, default=4)
+    parser.add_argument("--probes", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=3.0, help="stand-in Ollama latency in seconds")
+    parser.add_argument("--ollama-host", default=None, help="use a real Ollama server instead of the stand-in")
+    args = parser.parse_args()
+
+    if args.ollama_host:
+        os.environ["OLLAMA_HOST"] = args.ollama_host
+    else:
+        server = start_fake_ollama(args.latency)
+        os.environ["OLLAMA_HOST"] = f"http://127.0.0.1:{server.server_address[1]}"
+
+    # Keep the benchmark away from the real database
+    os.chdir(tempfile.mkdtemp(prefix="demodream_bench_"))
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main_cli()
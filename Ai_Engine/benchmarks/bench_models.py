@@ -0,0 +1,155 @@
+import argparse
+import asyncio
+import copy
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# Latency per generator function for one or more model routing configurations
+# (settings.LLM_ROUTES). Runs against the configured Ollama server by default.
+#
+#   python benchmarks/bench_models.py --models gemma3:1b qwen2.5:0.5b
+#   python benchmarks/bench_models.py --config small=routes_small.json --config mixed=routes_mixed.json
+#
+# A config file maps function names to overrides, e.g.
+#   {"grade": {"model": "qwen2.5:0.5b", "num_predict": 64}, "roadmap": {"model": "gemma3:4b"}}
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+TASK = json.dumps({
+    "title": "Informational interview",
+    "description": "Reach out to one professional in your field and ask three questions about their work."
+})
+SUBMISSION = "I messaged a data analyst on LinkedIn and asked about her daily work, the tools she uses and how she got hired."
+CONVERSATION = [
+    {"role": "user", "content": "I like math and drawing. What careers fit me?"},
+    {"role": "assistant", "content": "Architecture, data visualization and industrial design combine both. Which sounds most interesting?"},
+    {"role": "user", "content": "Data visualization. What should I learn first?"},
+    {"role": "assistant", "content": "Start with spreadsheets and basic statistics, then a tool like Tableau or Python with matplotlib."},
+]
+
+def build_cases():
+    import generator
+    import history
+
+    def chat_ok(reply):
+        return bool(reply) and not reply.startswith("Sorry, I encountered an error")
+
+    # function -> (call for iteration i, is the result usable)
+    return {
+        "grade": (lambda i: generator.grade_submission(TASK, f"{SUBMISSION} ({i})"), lambda r: r is not None),
+        "grade_batch": (lambda i: generator.grade_submissions_batch([(TASK, f"{SUBMISSION} ({i}.{k})") for k in range(4)]), lambda r: all(g is not None for g in r)),
+        "daily_task": (lambda i: generator.generate_daily_task_variant("basic", i % 15 + 1, variant=i, fresh=True), lambda r: bool(r)),
+        "questions": (lambda i: generator.generate_question_batch(f"Career field {i}", "basic"), lambda r: len(r) > 0),
+        "roadmap": (lambda i: generator.generate_project_roadmap(f"A habit tracker app, version {i}", "Python", "Beginner", fresh=True), lambda r: r is not None),
+        "chat": (lambda i: generator.chat_response(f"What does a data analyst do on day {i}?"), chat_ok),
+        "simulate": (lambda i: generator.generate_simulation_response("Doctor", "", []), chat_ok),
+        "summary": (lambda i: history._summarize(None, CONVERSATION), bool),
+    }
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+async def run_config(label, overrides, cases, iterations):
+    import llm_client
+    import settings
+    import warmup
+
+    original = copy.deepcopy(settings.LLM_ROUTES)
+    for name, values in overrides.items():
+        settings.LLM_ROUTES.setdefault(name, {}).update(values)
+    try:
+        # Model load time is not what we are comparing
+        for model in llm_client.route_models():
+            await warmup.warm_model(model)
+
+        results = {}
+        for name, (call, ok) in cases.items():
+            latencies, good = [], 0
+            for i in range(iterations):
+                start = time.perf_counter()
+                try:
+                    good += bool(ok(await call(i)))
+                except Exception as e:
+                    print(f"[{label}] {name} failed: {e}")
+                latencies.append((time.perf_counter() - start) * 1000)
+            results[name] = {
+                "model": llm_client.resolve(name)[0],
+                "options": llm_client.resolve(name)[1],
+                "p50_ms": round(statistics.median(latencies), 1),
+                "p95_ms": round(percentile(latencies, 95), 1),
+                "ok_rate": round(good / iterations, 3)
+            }
+        return results
+    finally:
+        settings.LLM_ROUTES.clear()
+        settings.LLM_ROUTES.update(original)
+
+def print_report(report):
+    labels = list(report)
+    functions = list(next(iter(report.values())))
+    print(f"\n{'function':<12}" + "".join(f"{label:>34}" for label in labels))
+    for name in functions:
+        cells = []
+        for label in labels:
+            r = report[label][name]
+            cells.append(f"{r['p50_ms']:>9.0f} /{r['p95_ms']:>7.0f}ms {r['ok_rate']:>5.0%} ok")
+        print(f"{name:<12}" + "".join(f"{cell:>34}" for cell in cells))
+    print("\ncells: p50 / p95 latency, share of calls with a usable result")
+
+async def run(configs, iterations, only):
+    cases = build_cases()
+    if only:
+        cases = {name: case for name, case in cases.items() if name in only}
+    report = {}
+    for label, overrides in configs:
+        print(f"Running configuration '{label}'...")
+        report[label] = await run_config(label, overrides, cases, iterations)
+    return report
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Per-function latency for model routing configurations")
+    parser.add_argument("--models", nargs="*", default=[], help="route every function to this model, one configuration each")
+    parser.add_argument("--config", action="append", default=[], help="LABEL=routes.json overrides, repeatable")
+    parser.add_argument("--functions", nargs="*", help="only these generator functions")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--fake", action="store_true", help="use the fake backend (dry run)")
+    parser.add_argument("--save", help="write the report as JSON")
+    args = parser.parse_args()
+
+    overrides = []
+    for entry in args.config:
+        label, path = entry.split("=", 1)
+        with open(path) as f:
+            overrides.append((label, json.load(f)))
+    save_path = os.path.abspath(args.save) if args.save else None
+
+    # Fresh response cache so nothing is served from an earlier run
+    workdir = tempfile.mkdtemp(prefix="demodream_models_")
+    os.environ["DEMODREAM_LLM_CACHE_PATH"] = os.path.join(workdir, "llm_cache.db")
+    if args.fake:
+        os.environ["DEMODREAM_LLM_BACKEND"] = "fake"
+    os.chdir(workdir)
+
+    import settings
+    configs = [("current", {})]
+    for model in args.models:
+        configs.append((model, {name: {"model": model} for name in settings.LLM_ROUTES}))
+    configs.extend(overrides)
+
+    report = asyncio.run(run(configs, args.iterations, args.functions))
+    print_report(report)
+    if save_path:
+        with open(save_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {save_path}")
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,80 @@
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# Wall-clock time of one live quiz, single completion vs parallel chunks
+# (settings.QUIZ_PARALLEL_CHUNKS). Start Ollama with OLLAMA_NUM_PARALLEL at
+# least as high as the largest chunk count, and pass the same value as
+# --concurrency so the scheduler lets the chunks through together.
+#
+#   OLLAMA_NUM_PARALLEL=4 ollama serve
+#   python benchmarks/bench_quiz_parallel.py --chunks 1 2 4 --concurrency 4
+#
+# --fake uses the fake backend with a per-token delay, which shows the upper
+# bound of the gain when the server really decodes chunks in parallel.
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+FIELDS = ["Software Engineering", "Medicine", "Law", "Finance", "Design"]
+
+async def time_quiz(generator, field, chunks):
+    start = time.perf_counter()
+    first = None
+    questions = []
+    async for q in generator.generate_questions_stream(field, "basic", chunks=chunks):
+        if first is None:
+            first = time.perf_counter() - start
+        questions.append(q)
+    return time.perf_counter() - start, first, len(questions)
+
+async def run(args):
+    import generator
+
+    results = {}
+    for chunks in args.chunks:
+        totals, firsts, counts = [], [], []
+        for i in range(args.iterations):
+            total, first, count = await time_quiz(generator, f"{FIELDS[i % len(FIELDS)]} {i}", chunks)
+            totals.append(total)
+            firsts.append(first or total)
+            counts.append(count)
+        results[chunks] = {
+            "p50_s": statistics.median(totals),
+            "first_question_s": statistics.median(firsts),
+            "questions": statistics.mean(counts)
+        }
+
+    # Reduction is against the first chunk count, normally 1 (single shot)
+    base = results[args.chunks[0]]["p50_s"]
+    print(f"\n{'chunks':>6}  {'p50 total':>10}  {'first question':>15}  {'questions':>9}  {'reduction':>10}")
+    for chunks, r in results.items():
+        change = (1 - r["p50_s"] / base) * 100 if base else 0
+        print(f"{chunks:>6}  {r['p50_s']:>9.2f}s  {r['first_question_s']:>14.2f}s  {r['questions']:>9.1f}  {change:>9.0f}%")
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Single-shot vs parallel chunked quiz generation")
+    parser.add_argument("--chunks", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=4, help="LLM scheduler slots, match OLLAMA_NUM_PARALLEL")
+    parser.add_argument("--fake", action="store_true", help="use the fake backend")
+    parser.add_argument("--token-ms", type=float, default=5, help="fake backend delay per output token")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="demodream_quiz_")
+    os.environ["DEMODREAM_LLM_CACHE_PATH"] = os.path.join(workdir, "llm_cache.db")
+    os.environ["DEMODREAM_LLM_MAX_CONCURRENCY"] = str(args.concurrency)
+    if args.fake:
+        os.environ["DEMODREAM_LLM_BACKEND"] = "fake"
+        os.environ["DEMODREAM_FAKE_LLM_TOKEN_MS"] = str(args.token_ms)
+    os.chdir(workdir)
+
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,134 @@
+import argparse
+import datetime
+import os
+import sys
+import tempfile
+
+# Fails when a hot-path query would read a whole table. Each query below is
+# the statement a route or background worker runs; its plan comes from
+# EXPLAIN QUERY PLAN (SQLite) or EXPLAIN with sequential scans disabled
+# (Postgres, so tiny tables don't hide a missing index).
+#
+#   python benchmarks/check_query_plans.py                      # fresh seeded SQLite file
+#   python benchmarks/check_query_plans.py --database-url sqlite:///./demodream_v2.db
+#
+# Pending migrations are applied to the database first. Exits with status 1
+# if any query does a full table scan.
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(bench_dir)
+for path in (parent_dir, bench_dir):
+    if path not in sys.path:
+        sys.path.append(path)
+
+import dataset
+
+def hot_path_queries():
+    from sqlalchemy import case, func, select
+    import models as m
+
+    email = dataset.user_email(1)
+    return {
+        "user by email (most routes)": select(m.User).where(m.User.email == email).limit(1),
+        "user by id (/admin/pending_guides)": select(m.User).where(m.User.id == 1).limit(1),
+        "progress by user (/training/*)": select(m.TrainingProgress).where(m.TrainingProgress.user_id == 1).limit(1),
+        "messages of a session (/chat/messages)": select(m.Message).where(m.Message.session_id == 1).order_by(m.Message.timestamp.asc()),
+        "sessions of a user (/chat/sessions)": select(m.ChatSession).where((m.ChatSession.explorer_id == 1) | (m.ChatSession.guide_id == 1)),
+        "open requests (/mentorship/available)": select(m.MentorshipRequest).where(m.MentorshipRequest.status == "open"),
+        "accepted request by id (/mentorship/accept)": select(m.MentorshipRequest).where(m.MentorshipRequest.id == 1).limit(1),
+        "career interest (/training/generate_task)": select(m.Performance.career).where(m.Performance.user_id == 1).order_by(m.Performance.timestamp.desc()).limit(1),
+        "performance history (/performance)": select(m.Performance).where(m.Performance.user_id == 1),
+        "projects of a user (/dream-project/all)": select(m.DreamProject).where(m.DreamProject.user_id == 1).order_by(m.DreamProject.created_at.desc()),
+        "roadmap fallback (/dream-project/create)": select(m.DreamProject).where(
+            m.DreamProject.skill_level == "Beginner", m.DreamProject.roadmap.isnot(None)
+        ).order_by(m.DreamProject.created_at.desc()).limit(500),
+        "comments of a project (/dream-project/comments)": select(m.ProjectComment).where(m.ProjectComment.project_id == 1).order_by(m.ProjectComment.timestamp.asc()),
+        "guide profile by user (/guide/*)": select(m.GuideProfile).where(m.GuideProfile.user_id == 1).limit(1),
+        "pending guide profiles (/admin/pending_guides)": select(m.GuideProfile).where(m.GuideProfile.verification_status == "pending"),
+        "guide discovery (/guides/discovery)": select(m.Guide).where(
+            m.Guide.verified == True, m.Guide.primary_domain.ilike("%Data%"), m.Guide.years_experience >= 2
+        ),
+        "guide by email (/guide/auth/login)": select(m.Guide).where(m.Guide.email == dataset.guide_email(1)).limit(1),
+        "guide by user (/admin/verify_guide)": select(m.Guide).where(m.Guide.user_id == 1).limit(1),
+        "grading queue claim": select(m.TrainingProgress.id).where(m.TrainingProgress.day_status == "submitted").order_by(m.TrainingProgress.last_updated).limit(4),
+        "grading queue depth (/metrics)": select(func.count()).select_from(m.TrainingProgress).where(m.TrainingProgress.day_status.in_(["submitted", "grading"])),
+        "question bank serve (/generate)": select(m.QuizQuestion).where(
+            m.QuizQuestion.field_key == "law", m.QuizQuestion.difficulty == "basic", m.QuizQuestion.served_count < 50
+        ).order_by(func.random()).limit(10),
+        "question bank fallback (circuit open)": select(m.QuizQuestion).where(m.QuizQuestion.field_key == "law").order_by(
+            case((m.QuizQuestion.difficulty == "basic", 0), else_=1), func.random()
+        ).limit(10),
+        "idle assistant sessions (chat session expiry)": select(m.AssistantSession.id).where(
+            m.AssistantSession.last_used < datetime.datetime(2020, 1, 1)
+        ).order_by(m.AssistantSession.last_used).limit(100),
+        "task pool lookup (/training/generate_task)": select(m.DailyTaskPool).where(
+            m.DailyTaskPool.phase == "basic", m.DailyTaskPool.day == 1, m.DailyTaskPool.career == "law"
+        ).order_by(func.random()).limit(1),
+        "task pool fallback (circuit open)": select(m.DailyTaskPool).where(m.DailyTaskPool.phase == "basic").order_by(
+            case((m.DailyTaskPool.career == "law", 0), else_=1), func.abs(m.DailyTaskPool.day - 1), func.random()
+        ).limit(1),
+    }
+
+def explain(conn, statement):
+    # Plan lines for one statement and whether any of them is a full table scan
+    from sqlalchemy import text
+
+    # Inlined values: EXPLAIN can't take the expanded IN (...) parameters
+    compiled = statement.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True})
+    if conn.dialect.name == "sqlite":
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}")
+        lines = [row[3] for row in rows]
+        # "SCAN t" reads every row; "SCAN t USING INDEX" walks an index instead
+        scans = [line for line in lines if line.startswith("SCAN ") and " USING " not in line]
+    elif conn.dialect.name == "postgresql":
+        conn.execute(text("SET LOCAL enable_seqscan = off"))
+        rows = conn.exec_driver_sql(f"EXPLAIN {compiled}")
+        lines = [row[0] for row in rows]
+        scans = [line for line in lines if "Seq Scan" in line]
+    else:
+        raise SystemExit(f"No plan check for {conn.dialect.name}")
+    return lines, scans
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Check that hot-path queries use indexes")
+    parser.add_argument("--database-url", help="database to check instead of a fresh seeded SQLite file")
+    parser.add_argument("--verbose", action="store_true", help="print every plan")
+    args = parser.parse_args()
+
+    seed = not args.database_url
+    if seed:
+        workdir = tempfile.mkdtemp(prefix="demodream_plans_")
+        args.database_url = f"sqlite:///{os.path.join(workdir, 'plans.db')}"
+    os.environ["DATABASE_URL"] = args.database_url
+
+    import migrate
+    from database import SessionLocal, engine
+
+    migrate.upgrade(engine)
+    if seed:
+        db = SessionLocal()
+        try:
+            dataset.seed(db, {"users": 500, "messages": 5000})
+        finally:
+            db.close()
+    if engine.dialect.name == "sqlite":
+        with engine.begin() as conn:
+            conn.exec_driver_sql("ANALYZE")
+
+    failures = 0
+    with engine.connect() as conn:
+        for name, statement in hot_path_queries().items():
+            with conn.begin():
+                lines, scans = explain(conn, statement)
+            failures += bool(scans)
+            print(f"{'FULL SCAN' if scans else 'ok':<9}  {name}")
+            for line in (lines if args.verbose else scans):
+                print(f"{'':<11}{line}")
+
+    if failures:
+        print(f"\n{failures} hot-path quer{'y does' if failures == 1 else 'ies do'} a full table scan")
+        sys.exit(1)
+    print("\nNo hot-path query does a full table scan")
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,207 @@
+import datetime
+import json
+import random
+
+# Seeds a benchmark database with a realistic spread of data. Ids are
+# assigned here so scenarios can pick valid ones without querying.
+# Import after DATABASE_URL points at a throwaway database.
+
+FIELDS = [
+    "Software Engineering", "Data Science", "Medicine", "Law", "Design",
+    "Finance", "Marketing", "Civil Engineering", "Teaching", "Psychology"
+]
+DIFFICULTIES = ["basic", "intermediate", "advanced"]
+PHASES = ["basic", "intermediate", "expert"]
+WORDS = (
+    "plan career learn project mentor feedback goal skill review practice "
+    "interview resume team data design research client growth schedule report"
+).split()
+
+DEFAULT_SCALE = {
+    "users": 500,
+    "guides": 50,
+    "requests": 1000, # mentorship requests, half of them still open
+    "sessions": 200,
+    "messages": 5000,
+    "performance": 5000,
+    "projects": 300,
+    "comments": 1000
+}
+
+PASSWORD = "bench-pass"
+
+def user_email(i):
+    return f"user{i}@bench.local"
+
+def guide_email(i):
+    return f"guide{i}@bench.local"
+
+def _text(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+def seed(db, scale=None, seed=0):
+    # Returns a dict of the ids scenarios can use
+    import models
+
+    scale = {**DEFAULT_SCALE, **(scale or {})}
+    rng = random.Random(seed)
+    now = datetime.datetime.utcnow()
+
+    users = [{
+        "id": i,
+        "name": f"Bench User {i}",
+        "username": f"bench_user_{i}",
+        "email": user_email(i),
+        "password": PASSWORD,
+        "role": "explorer",
+        "country": rng.choice(["India", "USA", "UK", "Germany"]),
+        "language": "English",
+        "created_at": now,
+        "is_active": True
+    } for i in range(1, scale["users"] + 1)]
+
+    guide_user_ids = []
+    guides, profiles = [], []
+    for g in range(1, scale["guides"] + 1):
+        user_id = scale["users"] + g
+        guide_user_ids.append(user_id)
+        field = FIELDS[g % len(FIELDS)]
+        users.append({
+            "id": user_id,
+            "name": f"Bench Guide {g}",
+            "username": f"bench_guide_{g}",
+            "email": guide_email(g),
+            "password": PASSWORD,
+            "role": "guide",
+            "language": "English",
+            "created_at": now,
+            "is_active": True
+        })
+        verified = g % 5 != 0
+        guides.append({
+            "id": g,
+            "user_id": user_id,
+            "full_name": f"Bench Guide {g}",
+            "email": guide_email(g),
+            "password": PASSWORD,
+            "primary_domain": field,
+            "years_experience": rng.randint(1, 20),
+            "current_role": rng.choice(["Senior Engineer", "Doctor", "Analyst", "Designer", "Lawyer"]),
+            "organization": f"Org {g}",
+            "linkedin_portfolio_url": f"https://example.com/guide{g}",
+            "bio": _text(rng, 20),
+            "weekly_availability": "5 hours",
+            "verified": verified,
+            "created_at": now
+        })
+        profiles.append({
+            "id": g,
+            "user_id": user_id,
+            "verification_status": "approved" if verified else "pending",
+            "expertise_fields": json.dumps([field, FIELDS[(g + 1) % len(FIELDS)]]),
+            "linkedin_url": f"https://example.com/guide{g}",
+            "is_onboarded": True,
+            "created_at": now
+        })
+
+    requests = [{
+        "id": i,
+        "explorer_id": rng.randint(1, scale["users"]),
+        "field": rng.choice(FIELDS),
+        "title": _text(rng, 5),
+        "description": _text(rng, 30),
+        "status": "accepted" if i <= scale["sessions"] else "open",
+        "created_at": now - datetime.timedelta(minutes=i)
+    } for i in range(1, scale["requests"] + 1)]
+
+    sessions = [{
+        "id": i,
+        "request_id": i,
+        "explorer_id": requests[i - 1]["explorer_id"],
+        "guide_id": rng.choice(guide_user_ids),
+        "created_at": now
+    } for i in range(1, scale["sessions"] + 1)]
+
+    messages = []
+    for i in range(1, scale["messages"] + 1):
+        session = sessions[rng.randrange(len(sessions))]
+        messages.append({
+            "id": i,
+            "session_id": session["id"],
+            "sender_id": rng.choice([session["explorer_id"], session["guide_id"]]),
+            "content": _text(rng, rng.randint(5, 40)),
+            "timestamp": now - datetime.timedelta(seconds=scale["messages"] - i)
+        })
+
+    performance = [{
+        "id": i,
+        "user_id": rng.randint(1, scale["users"]),
+        "career": rng.choice(FIELDS),
+        "score": round(rng.uniform(20, 100), 1),
+        "difficulty": rng.choice(DIFFICULTIES),
+        "timestamp": now - datetime.timedelta(hours=i)
+    } for i in range(1, scale["performance"] + 1)]
+
+    task = json.dumps({
+        "title": "Informational interview",
+        "description": "Reach out to one professional in your field and ask three questions about their work.",
+        "verification_type": "text_reflection"
+    })
+    progress = [{
+        "id": i,
+        "user_id": i,
+        "current_phase": rng.choice(PHASES),
+        "current_day": rng.randint(1, 15),
+        "day_status": "pending",
+        "current_task": task,
+        "last_updated": now
+    } for i in range(1, scale["users"] + 1)]
+
+    roadmap = json.dumps({
+        "project_overview": _text(rng, 20),
+        "required_skills_tools": "Python, SQL, Git",
+        "roadmap": [{"phase": f"Phase {p}", "steps": [_text(rng, 6) for _ in range(3)], "explanation": _text(rng, 12)} for p in range(1, 4)],
+        "estimated_time": "6 weeks",
+        "common_mistakes": [_text(rng, 8) for _ in range(3)]
+    })
+    projects = [{
+        "id": i,
+        "user_id": rng.randint(1, scale["users"]),
+        "description": _text(rng, 25),
+        "tech_preference": rng.choice(["Python", "JavaScript", "No preference"]),
+        "skill_level": rng.choice(["Beginner", "Intermediate", "Advanced"]),
+        "roadmap": roadmap,
+        "created_at": now - datetime.timedelta(days=i % 60)
+    } for i in range(1, scale["projects"] + 1)]
+
+    comments = [{
+        "id": i,
+        "project_id": rng.randint(1, scale["projects"]),
+        "user_id": rng.randint(1, len(users)),
+        "content": _text(rng, rng.randint(4, 25)),
+        "timestamp": now - datetime.timedelta(minutes=i)
+    } for i in range(1, scale["comments"] + 1)]
+
+    for model, rows in (
+        (models.User, users),
+        (models.Guide, guides),
+        (models.GuideProfile, profiles),
+        (models.MentorshipRequest, requests),
+        (models.ChatSession, sessions),
+        (models.Message, messages),
+        (models.Performance, performance),
+        (models.TrainingProgress, progress),
+        (models.DreamProject, projects),
+        (models.ProjectComment, comments),
+    ):
+        db.bulk_insert_mappings(model, rows)
+    db.commit()
+
+    return {
+        "user_ids": list(range(1, scale["users"] + 1)),
+        "guide_user_ids": guide_user_ids,
+        "guide_count": scale["guides"],
+        "open_request_ids": [r["id"] for r in requests if r["status"] == "open"],
+        "session_ids": [s["id"] for s in sessions],
+        "project_ids": [p["id"] for p in projects]
+    }
@@ -0,0 +1,80 @@
+import asyncio
+import time
+
+from fastapi import HTTPException
+
+import metrics
+import settings
+
+# Stops LLM work nobody is waiting for. Endpoints run their generation through
+# run_cancellable (plain responses) or guard_stream (SSE); when the client
+# disconnects or the endpoint's timeout passes, the generation task is
+# cancelled, which closes the stream to Ollama and frees the scheduler slot.
+# Counted as cancelled.disconnect.<name> / cancelled.timeout.<name>.
+
+DISCONNECT_POLL_INTERVAL = 0.5
+
+def timeout_for(name):
+    return settings.ENDPOINT_TIMEOUTS.get(name)
+
+def deadline_for(name):
+    timeout = timeout_for(name)
+    return time.monotonic() + timeout if timeout else None
+
+async def wait_for_disconnect(request):
+    while not await request.is_disconnected():
+        await asyncio.sleep(DISCONNECT_POLL_INTERVAL)
+
+async def _cancel(task):
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+async def run_cancellable(request, awaitable, name, deadline=None):
+    # Returns the awaitable's result. Raises 499 if the client went away first
+    # and 504 if the endpoint timeout passed first.
+    if deadline is None:
+        deadline = deadline_for(name)
+    timeout = max(deadline - time.monotonic(), 0) if deadline else None
+
+    task = asyncio.ensure_future(awaitable)
+    watcher = asyncio.ensure_future(wait_for_disconnect(request))
+    try:
+        done, _ = await asyncio.wait({task, watcher}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+    except asyncio.CancelledError:
+        await _cancel(task)
+        raise
+    finally:
+        watcher.cancel()
+
+    if task in done:
+        return task.result()
+
+    await _cancel(task)
+    if watcher in done:
+        metrics.incr(f"cancelled.disconnect.{name}")
+        raise HTTPException(status_code=499, detail="Client closed request")
+    metrics.incr(f"cancelled.timeout.{name}")
+    raise HTTPException(status_code=504, detail="The AI took too long to answer. Please try again.")
+
+async def guard_stream(events, name, deadline=None, timeout_event=None):
+    # Forwards an SSE event generator until it ends, the deadline passes
+    # (timeout_event is sent last) or the client disconnects (Starlette
+    # cancels the response task). The wrapped generator is always closed.
+    try:
+        while True:
+            timeout = max(deadline - time.monotonic(), 0) if deadline else None
+            try:
+                event = await asyncio.wait_for(anext(events), timeout)
+            except StopAsyncIteration:
+                return
+            except asyncio.TimeoutError:
+                metrics.incr(f"cancelled.timeout.{name}")
+                if timeout_event:
+                    yield timeout_event
+                return
+            yield event
+    except asyncio.CancelledError:
+        metrics.incr(f"cancelled.disconnect.{name}")
+        raise
+    finally:
+        await events.aclose()
@@ -0,0 +1,120 @@
+import asyncio
+import datetime
+import json
+import uuid
+import weakref
+from contextlib import asynccontextmanager
+
+import metrics
+import models
+import settings
+from database import AsyncSessionLocal
+
+# Server-side transcripts for the career assistant (/chat). The browser only
+# sends a session id; the transcript and Ollama's evaluated context are kept
+# in the database so each turn only has to process the new message, whichever
+# API process it lands on. Each function opens its own short database session
+# so no connection is held while the model generates.
+
+class AssistantSession:
+    def __init__(self, id=None, transcript=None, context=None):
+        self.id = id or uuid.uuid4().hex
+        self.transcript = list(transcript or []) # [{"role": ..., "content": ...}]
+        self.context = context # Ollama token context from the last turn
+
+    def add_turn(self, user_message, reply):
+        self.transcript.append({"role": "user", "content": user_message})
+        self.transcript.append({"role": "assistant", "content": reply})
+
+# session id -> lock, so this process runs one turn at a time per session
+_locks = weakref.WeakValueDictionary()
+
+def _lock(session_id):
+    session_lock = _locks.get(session_id)
+    if session_lock is None:
+        session_lock = _locks[session_id] = asyncio.Lock()
+    return session_lock
+
+def _expired_before():
+    return datetime.datetime.utcnow() - datetime.timedelta(seconds=settings.CHAT_SESSION_TTL)
+
+def _load(db, session_id):
+    row = db.get(models.AssistantSession, session_id)
+    if row is None:
+        return None
+    if row.last_used < _expired_before():
+        db.delete(row)
+        db.commit()
+        metrics.incr("chat_sessions.expired")
+        return None
+    return AssistantSession(row.id, json.loads(row.transcript), json.loads(row.context) if row.context else None)
+
+def _save(db, session):
+    db.merge(models.AssistantSession(
+        id=session.id,
+        transcript=json.dumps(session.transcript),
+        context=json.dumps(session.context) if session.context is not None else None,
+        last_used=datetime.datetime.utcnow()
+    ))
+    db.commit()
+
+async def get_session(session_id):
+    async with AsyncSessionLocal() as db:
+        return await db.run_sync(_load, session_id)
+
+async def save_session(session):
+    # Stores the transcript and context after a turn and marks the session used
+    async with AsyncSessionLocal() as db:
+        await db.run_sync(_save, session)
+
+@asynccontextmanager
+async def locked(session):
+    # Holds the session's lock for one turn and yields its latest stored
+    # state, in case another turn finished while this one waited
+    async with _lock(session.id):
+        yield await get_session(session.id) or session
+
+async def create_session(transcript=None):
+    session = AssistantSession(transcript=transcript)
+    await save_session(session)
+    metrics.incr("chat_sessions.created")
+    return session
+
+def _expire_idle(db):
+    expired = db.query(models.AssistantSession).filter(
+        models.AssistantSession.last_used < _expired_before()
+    ).delete(synchronize_session=False)
+
+    # Past CHAT_SESSION_MAX, the least recently used sessions go too
+    overflow = db.query(models.AssistantSession).count() - settings.CHAT_SESSION_MAX
+    evicted = 0
+    if overflow > 0:
+        oldest = db.query(models.AssistantSession.id).order_by(models.AssistantSession.last_used).limit(overflow)
+        evicted = db.query(models.AssistantSession).filter(
+            models.AssistantSession.id.in_(oldest.scalar_subquery())
+        ).delete(synchronize_session=False)
+    db.commit()
+    metrics.incr("chat_sessions.expired", expired)
+    metrics.incr("chat_sessions.evicted", evicted)
+    return expired + evicted
+
+async def expire_idle():
+    async with AsyncSessionLocal() as db:
+        return await db.run_sync(_expire_idle)
+
+def _active_count(db):
+    return db.query(models.AssistantSession).filter(
+        models.AssistantSession.last_used >= _expired_before()
+    ).count()
+
+async def active_count():
+    async with AsyncSessionLocal() as db:
+        return await db.run_sync(_active_count)
+
+async def expiry_worker(interval=60):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await expire_idle()
+        except Exception as e:
+            print(f"Chat session expiry failed: {e}")
@@ -0,0 +1,120 @@
+import time
+from collections import deque
+
+import metrics
+import settings
+from scheduler import SchedulerBusy
+
+# Circuit breaker around the model backend. Every call's outcome goes into a
+# rolling window; a call fails if it raised or was slow (CIRCUIT_SLOW_CALL_S,
+# or the route's own limit for complete non-streaming calls). When too many
+# in the window failed the circuit opens and calls are refused immediately,
+# so endpoints can serve cached content instead of waiting out a timeout.
+# After CIRCUIT_OPEN_SECONDS one trial call is let through (half-open):
+# success closes the circuit, failure reopens it.
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitOpen(SchedulerBusy):
+    # A SchedulerBusy, so code that already passes "busy" through untouched
+    # (and the 503 + Retry-After handler) treats it the same way
+    def __init__(self, retry_after):
+        Exception.__init__(self, "LLM backend circuit is open")
+        self.priority = None
+        self.retry_after = retry_after
+
+class CircuitBreaker:
+    def __init__(self, window, min_calls, failure_rate, slow_call_s, open_seconds):
+        self.window = deque(maxlen=window)
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_s = slow_call_s
+        self.open_seconds = open_seconds
+        self.state = CLOSED
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def _retry_after(self):
+        return max(1, int(self.opened_at + self.open_seconds - time.monotonic()) + 1)
+
+    def check(self):
+        # Raises CircuitOpen if a call would be refused right now
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.open_seconds:
+                metrics.incr("circuit.rejected")
+                raise CircuitOpen(self._retry_after())
+            self.state = HALF_OPEN
+            print("LLM circuit half-open, trying one call")
+        if self.state == HALF_OPEN and self.trial_in_flight:
+            metrics.incr("circuit.rejected")
+            raise CircuitOpen(1)
+
+    def acquire(self):
+        # Like check(), but in half-open state this call becomes the trial
+        self.check()
+        if self.state == HALF_OPEN:
+            self.trial_in_flight = True
+
+    def release(self):
+        # The call ended without an outcome (e.g. cancelled)
+        self.trial_in_flight = False
+
+    def record(self, ok, seconds, slow_call_s=None):
+        # slow_call_s overrides the default threshold for this call; 0 means
+        # only errors count
+        limit = self.slow_call_s if slow_call_s is None else slow_call_s
+        ok = ok and (not limit or seconds < limit)
+        self.trial_in_flight = False
+        if self.state == HALF_OPEN:
+            if ok:
+                self._close()
+            else:
+                self._open()
+            return
+
+        self.window.append(ok)
+        failures = self.window.count(False)
+        if (
+            self.state == CLOSED
+            and len(self.window) >= self.min_calls
+            and failures / len(self.window) >= self.failure_rate
+        ):
+            self._open()
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        metrics.incr("circuit.opened")
+        print(f"LLM circuit open for {self.open_seconds}s")
+
+    def _close(self):
+        self.state = CLOSED
+        self.opened_at = None
+        self.window.clear()
+        metrics.incr("circuit.closed")
+        print("LLM circuit closed")
+
+    def stats(self):
+        failures = self.window.count(False)
+        return {
+            "state": self.state,
+            "open_for_s": round(time.monotonic() - self.opened_at, 1) if self.opened_at else None,
+            "window_calls": len(self.window),
+            "window_failure_rate": round(failures / len(self.window), 3) if self.window else 0.0
+        }
+
+_breaker = None
+
+def get_breaker():
+    global _breaker
+    if _breaker is None:
+        _breaker = CircuitBreaker(
+            settings.CIRCUIT_WINDOW,
+            settings.CIRCUIT_MIN_CALLS,
+            settings.CIRCUIT_FAILURE_RATE,
+            settings.CIRCUIT_SLOW_CALL_S,
+            settings.CIRCUIT_OPEN_SECONDS
+        )
+    return _breaker
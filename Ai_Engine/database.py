@@ -1,18 +1,109 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from models import Base
+import settings
 
-DATABASE_URL = "sqlite:///./demodream_v2.db"
+DATABASE_URL = settings.DATABASE_URL
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+def _is_memory(url):
+    return make_url(url).database in (None, "", ":memory:") or "mode=memory" in url
+
+def _apply_pragmas(pragmas):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+    return on_connect
+
+def _pool(pool_size, max_overflow, pool_timeout):
+    return {
+        "pool_size": settings.DB_POOL_SIZE if pool_size is None else pool_size,
+        "max_overflow": settings.DB_MAX_OVERFLOW if max_overflow is None else max_overflow,
+        "pool_timeout": settings.DB_POOL_TIMEOUT if pool_timeout is None else pool_timeout,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+
+def _listen_pragmas(engine, pragmas):
+    pragmas = settings.SQLITE_PRAGMAS if pragmas is None else pragmas
+    if pragmas:
+        event.listen(engine, "connect", _apply_pragmas(pragmas))
+
+# Sync driver for URLs that don't name one. SQLAlchemy's own default for a
+# bare postgresql:// changed between versions (psycopg2 before 2.1); the app
+# ships psycopg 3.
+SYNC_DRIVERS = {
+    "postgresql": "postgresql+psycopg",
+}
+
+def sync_url(url):
+    parsed = make_url(url)
+    if parsed.drivername in SYNC_DRIVERS:
+        return parsed.set(drivername=SYNC_DRIVERS[parsed.drivername]).render_as_string(hide_password=False)
+    return url
+
+def create_db_engine(url=None, pragmas=None, pool_size=None, max_overflow=None, pool_timeout=None):
+    # Engine with the pool and (for SQLite) connection pragmas from settings.
+    # pragmas replaces settings.SQLITE_PRAGMAS, e.g. {} for SQLite's defaults.
+    url = sync_url(url or DATABASE_URL)
+    pool = _pool(pool_size, max_overflow, pool_timeout)
+    if not url.startswith("sqlite"):
+        return create_engine(url, pool_pre_ping=True, **pool)
+
+    # In-memory databases live in a single connection, so no pool sizing there
+    engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False},
+        **({} if _is_memory(url) else pool)
+    )
+    _listen_pragmas(engine, pragmas)
+    return engine
+
+# Async driver for each sync URL scheme the app accepts
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+def async_url(url):
+    # sqlite:///x.db -> sqlite+aiosqlite:///x.db, postgresql://... -> postgresql+asyncpg://...
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend} databases")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+def create_async_db_engine(url=None, pragmas=None, pool_size=None, max_overflow=None, pool_timeout=None):
+    # Same configuration as create_db_engine, for the async routes
+    url = async_url(url or DATABASE_URL)
+    pool = _pool(pool_size, max_overflow, pool_timeout)
+    if not url.startswith("sqlite"):
+        return create_async_engine(url, pool_pre_ping=True, **pool)
+
+    engine = create_async_engine(url, **({} if _is_memory(url) else pool))
+    _listen_pragmas(engine.sync_engine, pragmas)
+    return engine
+
+engine = create_db_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Everything on the event loop (routes and background workers) uses the async
+# engine so queries don't block it; SessionLocal is for scripts. Objects stay
+# loaded after commit; relationships must be eager-loaded (selectinload)
+# because lazy loading can't run under an async session. Sync helpers shared
+# with scripts run through AsyncSession.run_sync.
+async_engine = create_async_db_engine()
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 def init_db():
-    Base.metadata.create_all(bind=engine)
+    # Creates or upgrades the schema, see migrate.py
+    import migrate
+    migrate.upgrade(engine)
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    # FastAPI dependency
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
@@ -1,12 +1,46 @@
-import json
-import ollama
-import re
+import asyncio
+from contextlib import aclosing
+from typing import List
+
+from pydantic import ValidationError
+
+import history as history_manager
+import llm_cache
+import llm_client
+import metrics
+import settings
+from json_stream import JSONArrayStreamParser
+from llm_schemas import DailyTask, GradeResult, IndexedGradeResult, ProjectRoadmap, QuizQuestion
+from scheduler import BATCH, GRADING, INTERACTIVE, QUIZ, SchedulerBusy
+from singleflight import coalesce
+from structured import StructuredOutputError, generate_structured, json_schema
+
+def is_valid_question(q):
+    # 4 options prefixed A-D and a single-letter answer
+    try:
+        QuizQuestion.model_validate(q)
+        return True
+    except ValidationError:
+        return False
+
+QUESTION_LIST_SCHEMA = json_schema(List[QuizQuestion])
+
+# Sub-topic hints for parallel chunks, so concurrent requests don't all
+# produce the same questions
+QUESTION_FOCUSES = [
+    "core concepts and terminology",
+    "tools, methods and day-to-day practice",
+    "problem solving in real-world scenarios",
+    "industry trends, ethics and career paths",
+    "history and key figures of the field",
+]
 
-def generate_questions(field, difficulty):
-    prompt = f"""
-Generate 10 multiple-choice questions for the career field: "{field}".
+def build_question_prompt(field, difficulty, count=10, focus=None):
+    focus_line = f"\nFocus this set on: {focus}.\n" if focus else ""
+    return f"""
+Generate {count} multiple-choice questions for the career field: "{field}".
 Difficulty level: {difficulty}.
-
+{focus_line}
 If the field contains a specialized sub-topic (e.g., "Engineering - Computer Science"), focus strictly on that sub-topic.
 If the difficulty is "advanced" or if it is a secondary round, ask deeper technical questions specific to that specialization.
 
@@ -29,61 +63,150 @@ IMPORTANT:
 3. Ensure the output is valid JSON.
 """
 
+def generate_questions_stream(field, difficulty, limit=None, priority=QUIZ, chunks=None):
+    # Yields each question as soon as it is complete and valid, and stops the
+    # generation once `limit` valid questions have arrived. A malformed
+    # question only loses itself, not the whole set. With chunks > 1 the set
+    # is requested as several smaller completions running in parallel.
+    chunks = chunks or settings.QUIZ_PARALLEL_CHUNKS
+    if chunks > 1:
+        return _parallel_questions_stream(field, difficulty, limit, priority, chunks)
+    return _questions_stream(field, difficulty, limit, priority)
+
+async def _questions_stream(field, difficulty, limit=None, priority=QUIZ, focus=None):
+    limit = limit or settings.QUIZ_QUESTION_COUNT
+    parser = JSONArrayStreamParser()
+    raw = []
+    count = 0
     try:
-        response = ollama.generate(
-            model="gemma3:1b",
-            prompt=prompt,
+        parts = llm_client.generate_stream(
+            build_question_prompt(field, difficulty, count=limit, focus=focus),
             options={
                 "temperature": 0.5 # Lower temp for more deterministic formatting
-            }
+            },
+            priority=priority,
+            format=QUESTION_LIST_SCHEMA,
+            route="questions"
         )
-
-        raw = response.get("response", "")
+        async with aclosing(parts):
+            async for part in parts:
+                token = part.get("response", "")
+                raw.append(token)
+                for q in parser.feed(token):
+                    # Per-question attempts, so the failure rate is per question
+                    metrics.incr("structured.attempts.questions")
+                    if not is_valid_question(q):
+                        metrics.incr("quiz_stream.invalid")
+                        metrics.incr("structured.parse_failures.questions")
+                        continue
+                    count += 1
+                    yield dict(q, id=count)
+                    if count >= limit:
+                        return
+    finally:
+        # Elements that weren't even valid JSON are failed attempts too
+        metrics.incr("quiz_stream.malformed", parser.errors)
+        metrics.incr("structured.attempts.questions", parser.errors)
+        metrics.incr("structured.parse_failures.questions", parser.errors)
         print("\n===== RAW AI OUTPUT =====")
-        print(raw)
+        print("".join(raw))
         print("=========================\n")
 
-        # 1. Clean Markdown Code Fences
-        raw_clean = re.sub(r'```json\s*', '', raw)
-        raw_clean = re.sub(r'```\s*', '', raw_clean)
-
-        # 2. Try JSON extraction
-        match = re.search(r'\[.*\]', raw_clean, re.DOTALL)
-        if match:
-            json_str = match.group(0)
-        else:
-            json_str = raw_clean
-
-        # 3. Parse
-        data = json.loads(json_str)
-        return data
-
+def _question_key(q):
+    return " ".join(q["question"].lower().split())
+
+async def _parallel_questions_stream(field, difficulty, limit, priority, chunks):
+    # Runs one completion per chunk, each with its own sub-topic hint, and
+    # yields questions in arrival order with duplicates dropped
+    limit = limit or settings.QUIZ_QUESTION_COUNT
+    chunks = min(chunks, limit)
+    per_chunk = -(-limit // chunks)
+    queue = asyncio.Queue()
+    done = object()
+    errors = []
+
+    async def run_chunk(i):
+        try:
+            focus = QUESTION_FOCUSES[i % len(QUESTION_FOCUSES)]
+            async for q in _questions_stream(field, difficulty, per_chunk, priority, focus=focus):
+                queue.put_nowait(q)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            queue.put_nowait(done)
+
+    tasks = [asyncio.create_task(run_chunk(i)) for i in range(chunks)]
+    seen = set()
+    count = 0
+    finished = 0
+    try:
+        while finished < chunks:
+            q = await queue.get()
+            if q is done:
+                finished += 1
+                continue
+            key = _question_key(q)
+            if key in seen:
+                metrics.incr("quiz_parallel.duplicates")
+                continue
+            seen.add(key)
+            count += 1
+            yield dict(q, id=count)
+            if count >= limit:
+                return
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    # Nothing usable at all: surface the failure like the single-shot path
+    if count == 0 and errors:
+        busy = [e for e in errors if isinstance(e, SchedulerBusy)]
+        raise busy[0] if busy else errors[0]
+
+@coalesce("questions")
+async def generate_question_batch(field, difficulty, priority=QUIZ):
+    # Raw generation: returns the valid questions or raises. Use
+    # generate_questions when a fallback set is preferable to an error.
+    for attempt in range(settings.LLM_STRUCTURED_RETRIES + 1):
+        questions = [q async for q in generate_questions_stream(field, difficulty, priority=priority)]
+        if questions:
+            return questions
+    metrics.incr("structured.exhausted.questions")
+    raise StructuredOutputError("No valid questions in model output")
+
+async def generate_questions(field, difficulty):
+    try:
+        return await generate_question_batch(field, difficulty)
+    except SchedulerBusy:
+        raise
     except Exception as e:
         print(f"Error generating questions: {e}")
-        # Fallback Questions so user isn't stuck
-        return [
-            {
-                "id": 1,
-                "question": f"What is a key skill for a {field}?",
-                "options": ["A. Communication", "B. Typing", "C. Driving", "D. Sleeping"],
-                "correct_answer": "A"
-            },
-            {
-                "id": 2,
-                "question": "Which of these is most important in this career?",
-                "options": ["A. Speed", "B. Accuracy", "C. Dedication", "D. All of the above"],
-                "correct_answer": "D"
-            },
-            {
-                "id": 3,
-                "question": "What is the primary goal of this profession?",
-                "options": ["A. To make money", "B. To solve problems", "C. To travel", "D. To be famous"],
-                "correct_answer": "B"
-            }
-        ]
-
-def chat_response(user_message, history=[]):
-    system_prompt = """
+        return fallback_questions(field)
+
+def fallback_questions(field):
+    # Fallback Questions so user isn't stuck
+    return [
+        {
+            "id": 1,
+            "question": f"What is a key skill for a {field}?",
+            "options": ["A. Communication", "B. Typing", "C. Driving", "D. Sleeping"],
+            "correct_answer": "A"
+        },
+        {
+            "id": 2,
+            "question": "Which of these is most important in this career?",
+            "options": ["A. Speed", "B. Accuracy", "C. Dedication", "D. All of the above"],
+            "correct_answer": "D"
+        },
+        {
+            "id": 3,
+            "question": "What is the primary goal of this profession?",
+            "options": ["A. To make money", "B. To solve problems", "C. To travel", "D. To be famous"],
+            "correct_answer": "B"
+        }
+    ]
+
+CHAT_SYSTEM_PROMPT = """
 You are an AI Career Guidance Assistant integrated into an educational platform.
 
 IMPORTANT RULES:
@@ -151,7 +274,9 @@ BEHAVIOR:
 
 If career analysis is NOT complete yet, ask the NEXT BEST question only.
 """
-    messages = [{"role": "system", "content": system_prompt}]
+
+def build_chat_messages(user_message, history=[]):
+    messages = [{"role": "system", "content": CHAT_SYSTEM_PROMPT}]
     
     # Append history
     # History is expected to be [{"role": "user", "content": "..."}, {"role": "assistant", "content": "..."}]
@@ -160,22 +285,111 @@ If career analysis is NOT complete yet, ask the NEXT BEST question only.
         
     # Append current message
     messages.append({"role": "user", "content": user_message})
+    return messages
+
+async def chat_response(user_message, history=[]):
+    history = await history_manager.compact(history, "chat")
+    messages = build_chat_messages(user_message, history)
 
     try:
-        response = ollama.chat(
-            model="gemma3:1b", # Using a slightly larger/better model if possible, or stick to what was there. 1b might be weak for complex logic. Let's use 1b as it was there.
-            messages=messages,
-            options={"temperature": 0.7}
-        )
+        response = await llm_client.chat(messages, options={"temperature": 0.7}, priority=INTERACTIVE, route="chat")
         return response['message']['content']
+    except SchedulerBusy:
+        raise
+    except Exception as e:
+        return f"Sorry, I encountered an error: {str(e)}"
+
+def session_prompt(session, user_message):
+    # A session with a transcript but no Ollama context (seeded from client
+    # history, or just compacted) sends the transcript once inside the prompt.
+    # That call returns a context, so the turns after it only send their message.
+    if session.context is not None or not session.transcript:
+        return user_message
+    return f"""Conversation so far:
+{history_manager.render(session.transcript)}
+
+Continue the conversation. Reply to the user's latest message:
+{user_message}"""
+
+async def session_chat_response(session, user_message):
+    # Career assistant turn on a server-side session (see chat_sessions).
+    # Reuses Ollama's evaluated context between turns.
+    if history_manager.needs_compaction(session.transcript):
+        session.transcript = await history_manager.compact(session.transcript, "chat")
+        session.context = None # Context no longer matches the compacted transcript
+
+    try:
+        response = await llm_client.generate(
+            session_prompt(session, user_message),
+            options={"temperature": 0.7},
+            priority=INTERACTIVE,
+            system=CHAT_SYSTEM_PROMPT if session.context is None else None,
+            context=session.context,
+            route="chat"
+        )
+        reply = response.get("response", "")
+        session.context = response.get("context")
+    except SchedulerBusy:
+        raise
     except Exception as e:
         return f"Sorry, I encountered an error: {str(e)}"
 
-def generate_daily_task(phase, day, career_interest="General Career Success"):
+    session.add_turn(user_message, reply)
+    return reply
+
+async def session_chat_response_stream(session, user_message):
+    # Streaming variant of session_chat_response
+    if history_manager.needs_compaction(session.transcript):
+        session.transcript = await history_manager.compact(session.transcript, "chat")
+        session.context = None # Context no longer matches the compacted transcript
+
+    reply = []
+    try:
+        parts = llm_client.generate_stream(
+            session_prompt(session, user_message),
+            options={"temperature": 0.7},
+            priority=INTERACTIVE,
+            system=CHAT_SYSTEM_PROMPT if session.context is None else None,
+            context=session.context,
+            route="chat"
+        )
+        async for part in parts:
+            token = part.get("response", "")
+            if token:
+                reply.append(token)
+                yield token
+            if part.get("done"):
+                session.context = part.get("context")
+    except SchedulerBusy:
+        raise
+    except Exception as e:
+        yield f"Sorry, I encountered an error: {str(e)}"
+        return
+
+    session.add_turn(user_message, "".join(reply))
+
+async def chat_response_stream(user_message, history=[]):
+    # Same as chat_response but yields tokens as they are generated
+    history = await history_manager.compact(history, "chat")
+    messages = build_chat_messages(user_message, history)
+
+    try:
+        async for token in llm_client.chat_stream(messages, options={"temperature": 0.7}, priority=INTERACTIVE, route="chat"):
+            yield token
+    except SchedulerBusy:
+        raise
+    except Exception as e:
+        yield f"Sorry, I encountered an error: {str(e)}"
+
+@coalesce("daily_task")
+async def generate_daily_task_variant(phase, day, career_interest="General Career Success", variant=1, fresh=False, priority=BATCH):
+    # Raw generation: returns the task or raises. Different variant numbers
+    # ask for different activities so a shared pool isn't all duplicates.
     prompt = f"""
     Act as a mentor. Create a specific, actionable daily task for a student in their "{phase}" training phase.
     Day: {day}
     Career Goal: {career_interest}
+    Variant: #{variant} (each variant must be a different kind of activity)
 
     Phase Context:
     - Basic (1-15 days): Foundations, mindset, basic research.
@@ -189,22 +403,25 @@ def generate_daily_task(phase, day, career_interest="General Career Success"):
         "verification_type": "text_reflection" 
     }}
     """
-    try:
-        response = ollama.generate(
-            model="gemma3:1b",
-            prompt=prompt,
-            options={"temperature": 0.8}
-        )
-        raw = response.get("response", "")
-        # Clean markdown
-        match = re.search(r'\{.*\}', raw, re.DOTALL)
-        if match:
-             return json.loads(match.group(0))
-        return {"title": f"Day {day} Challenge", "description": raw, "verification_type": "text_reflection"}
-    except Exception as e:
-        return {"title": "Daily Task", "description": "Research a key topic in your field.", "verification_type": "text_reflection"}
-
-def grade_submission(task, submission):
+    options = {"temperature": 0.8}
+    model, routed = llm_client.resolve("daily_task", options)
+    cache_key = llm_cache.make_key(model, prompt, routed)
+    if not fresh:
+        cached = await llm_cache.get("daily_task", cache_key)
+        if cached is not None:
+            return cached
+
+    task = await generate_structured("daily_task", prompt, DailyTask, options=options, priority=priority)
+    await llm_cache.put("daily_task", cache_key, task)
+    return task
+
+def fallback_daily_task():
+    return {"title": "Daily Task", "description": "Research a key topic in your field.", "verification_type": "text_reflection"}
+
+@coalesce("grade")
+async def grade_submission(task, submission):
+    # Returns None when no valid grade could be produced. Callers must not
+    # treat that as a pass.
     prompt = f"""
     You are a strict but fair evaluator.
     Task: {task}
@@ -218,22 +435,61 @@ def grade_submission(task, submission):
     }}
     """
     try:
-        response = ollama.generate(
-            model="gemma3:1b",
-            prompt=prompt,
-            options={"temperature": 0.3}
+        return await generate_structured("grade", prompt, GradeResult, options={"temperature": 0.3}, priority=GRADING)
+    except SchedulerBusy:
+        raise
+    except Exception as e:
+        print(f"Error grading submission: {e}")
+        return None
+
+def build_batch_grade_prompt(items):
+    submissions = "\n\n".join(
+        f"Submission {i}:\nTask: {task}\nUser Submission: {submission}"
+        for i, (task, submission) in enumerate(items, start=1)
+    )
+    return f"""
+    You are a strict but fair evaluator.
+    Grade each submission below independently against its own task.
+
+    {submissions}
+
+    For each submission, did the user make a genuine effort to complete the task?
+    Return ONLY a JSON list with one object per submission:
+    [
+        {{"index": 1, "passed": true/false, "feedback": "One sentence feedback."}}
+    ]
+    """
+
+async def grade_submissions_batch(items):
+    # items: [(task, submission), ...]. Grades them all in one prompt and
+    # returns a list aligned with items; entries the model skipped or
+    # garbled are None so the caller can grade those one by one.
+    if len(items) == 1:
+        return [await grade_submission(*items[0])]
+
+    try:
+        results = await generate_structured(
+            "grade_batch",
+            build_batch_grade_prompt(items),
+            List[IndexedGradeResult],
+            options={"temperature": 0.3},
+            priority=GRADING
         )
-        raw = response.get("response", "")
-        match = re.search(r'\{.*\}', raw, re.DOTALL)
-        if match:
-             return json.loads(match.group(0))
-        # Fallback if valid JSON isn't found, assume pass if length is decent
-        passed = len(submission) > 20
-        return {"passed": passed, "feedback": "Good effort!" if passed else "Please provide more detail."}
-    except:
-        return {"passed": True, "feedback": "Submission recorded."}
-
-def generate_project_roadmap(description, tech_preference, skill_level):
+    except SchedulerBusy:
+        raise
+    except Exception as e:
+        print(f"Error grading batch of {len(items)}: {e}")
+        return [None] * len(items)
+
+    by_index = {r["index"]: r for r in results}
+    grades = []
+    for i in range(1, len(items) + 1):
+        r = by_index.get(i)
+        grades.append({"passed": r["passed"], "feedback": r["feedback"]} if r else None)
+    return grades
+
+@coalesce("roadmap")
+async def generate_project_roadmap(description, tech_preference, skill_level, fresh=False):
     prompt = f"""
     You are a Project Mentor and Software Architect.
     Help the user transform the following project idea into a clear, beginner-friendly roadmap.
@@ -278,26 +534,25 @@ def generate_project_roadmap(description, tech_preference, skill_level):
     - Focus on educational value.
     - DO NOT generate code.
     """
+    options = {"temperature": 0.7}
+    model, routed = llm_client.resolve("roadmap", options)
+    cache_key = llm_cache.make_key(model, prompt, routed)
+    if not fresh:
+        cached = await llm_cache.get("roadmap", cache_key)
+        if cached is not None:
+            return cached
+
     try:
-        response = ollama.generate(
-            model="gemma3:1b",
-            prompt=prompt,
-            options={"temperature": 0.7}
-        )
-        raw = response.get("response", "")
-        # Clean markdown code fences if any
-        raw_clean = re.sub(r'```json\s*', '', raw)
-        raw_clean = re.sub(r'```\s*', '', raw_clean)
-        
-        match = re.search(r'\{.*\}', raw_clean, re.DOTALL)
-        if match:
-             return json.loads(match.group(0))
-        return None
+        roadmap = await generate_structured("roadmap", prompt, ProjectRoadmap, options=options, priority=BATCH)
+        await llm_cache.put("roadmap", cache_key, roadmap)
+        return roadmap
+    except SchedulerBusy:
+        raise
     except Exception as e:
         print(f"Error generating roadmap: {e}")
         return None
 
-def generate_simulation_response(role, user_context, history=[]):
+def build_simulation_messages(role, user_context, history=[]):
     system_prompt = f"""
 You are a REAL-WORLD DREAM EXPERIENCE SIMULATOR.
 
@@ -388,14 +643,29 @@ SITUATION DESIGN RULES
     elif not history:
         # Initial trigger if history is empty
         messages.append({"role": "user", "content": f"Start the simulation for the role of {role}."})
+    return messages
+
+async def generate_simulation_response(role, user_context, history=[]):
+    history = await history_manager.compact(history, "simulate")
+    messages = build_simulation_messages(role, user_context, history)
 
     try:
-        response = ollama.chat(
-            model="gemma3:1b", 
-            messages=messages,
-            options={"temperature": 0.7}
-        )
+        response = await llm_client.chat(messages, options={"temperature": 0.7}, priority=INTERACTIVE, route="simulate")
         return response['message']['content']
+    except SchedulerBusy:
+        raise
     except Exception as e:
         return f"Simulation Error: {str(e)}"
 
+async def generate_simulation_response_stream(role, user_context, history=[]):
+    # Same as generate_simulation_response but yields tokens as they are generated
+    history = await history_manager.compact(history, "simulate")
+    messages = build_simulation_messages(role, user_context, history)
+
+    try:
+        async for token in llm_client.chat_stream(messages, options={"temperature": 0.7}, priority=INTERACTIVE, route="simulate"):
+            yield token
+    except SchedulerBusy:
+        raise
+    except Exception as e:
+        yield f"Simulation Error: {str(e)}"
@@ -0,0 +1,226 @@
+import asyncio
+import datetime
+import time
+from collections import deque
+
+import metrics
+import models
+import settings
+import training
+from database import AsyncSessionLocal
+from generator import grade_submission, grade_submissions_batch
+from scheduler import SchedulerBusy
+
+# Grading queue for /training/submit. Submissions are stored as "submitted"
+# and the request returns right away; a background worker grades them a few
+# per prompt and applies phase advancement. Clients poll
+# /training/submission/{email} or subscribe to its /events stream.
+
+QUEUED = "submitted"
+GRADING = "grading" # Claimed by the worker, result not applied yet
+
+RETRY_FEEDBACK = "We couldn't grade your submission right now. Please submit again."
+
+# Longest a client stays subscribed to the events stream
+EVENTS_TIMEOUT = 300
+
+_wake = None
+_attempts = {} # progress id -> failed grading attempts
+_graded_at = deque() # monotonic completion times, last minute only
+_listeners = {} # user id -> events set when that user's grade lands
+
+def is_queued(progress):
+    return progress.day_status in (QUEUED, GRADING)
+
+def enqueue(db, progress, submission_text):
+    progress.submission_text = submission_text
+    progress.feedback = None
+    progress.day_status = QUEUED
+    progress.last_updated = datetime.datetime.utcnow()
+    db.commit()
+    metrics.incr("grading.submitted")
+    if _wake is not None:
+        _wake.set()
+
+async def wait_for_result(user_id, timeout):
+    # True if a grade for this user landed within timeout seconds
+    event = asyncio.Event()
+    _listeners.setdefault(user_id, set()).add(event)
+    try:
+        await asyncio.wait_for(event.wait(), timeout=timeout)
+        return True
+    except asyncio.TimeoutError:
+        return False
+    finally:
+        waiting = _listeners.get(user_id)
+        if waiting is not None:
+            waiting.discard(event)
+            if not waiting:
+                del _listeners[user_id]
+
+def _notify(user_id):
+    for event in _listeners.get(user_id, ()):
+        event.set()
+
+def graded_per_minute():
+    cutoff = time.monotonic() - 60
+    while _graded_at and _graded_at[0] < cutoff:
+        _graded_at.popleft()
+    return len(_graded_at)
+
+def queue_depth(db):
+    return db.query(models.TrainingProgress).filter(
+        models.TrainingProgress.day_status.in_([QUEUED, GRADING])
+    ).count()
+
+async def stats():
+    async with AsyncSessionLocal() as db:
+        depth = await db.run_sync(queue_depth)
+    return {"queued": depth, "graded_per_minute": graded_per_minute()}
+
+def _requeue_interrupted(db):
+    # Rows whose grader died (a restarted or crashed process) go back in the
+    # queue once their lease runs out. Claiming stamps last_updated, so rows
+    # another live process is grading right now are left alone.
+    expired = datetime.datetime.utcnow() - datetime.timedelta(seconds=settings.GRADING_LEASE_SECONDS)
+    requeued = db.query(models.TrainingProgress).filter(
+        models.TrainingProgress.day_status == GRADING,
+        models.TrainingProgress.last_updated < expired
+    ).update({"day_status": QUEUED}, synchronize_session=False)
+    db.commit()
+    metrics.incr("grading.requeued", requeued)
+    return requeued
+
+def _claim(db, limit):
+    # Oldest submissions first. Each row is claimed with a conditional update
+    # so a row is never graded twice.
+    rows = db.query(
+        models.TrainingProgress.id,
+        models.TrainingProgress.user_id,
+        models.TrainingProgress.current_task,
+        models.TrainingProgress.submission_text
+    ).filter(
+        models.TrainingProgress.day_status == QUEUED
+    ).order_by(models.TrainingProgress.last_updated).limit(limit).all()
+
+    batch = []
+    now = datetime.datetime.utcnow()
+    for row in rows:
+        claimed = db.query(models.TrainingProgress).filter(
+            models.TrainingProgress.id == row.id,
+            models.TrainingProgress.day_status == QUEUED
+        ).update({"day_status": GRADING, "last_updated": now}, synchronize_session=False)
+        if claimed:
+            batch.append(row)
+    db.commit()
+    return batch
+
+def _release(db, batch):
+    # Put claimed rows back without counting an attempt (e.g. LLM queue full)
+    db.query(models.TrainingProgress).filter(
+        models.TrainingProgress.id.in_([row.id for row in batch]),
+        models.TrainingProgress.day_status == GRADING
+    ).update({"day_status": QUEUED}, synchronize_session=False)
+    db.commit()
+
+async def _grade(batch):
+    grades = await grade_submissions_batch([(row.current_task, row.submission_text) for row in batch])
+    if len(batch) > 1:
+        # Whatever the batch prompt skipped or garbled gets its own call
+        for i, grade in enumerate(grades):
+            if grade is None:
+                grades[i] = await grade_submission(batch[i].current_task, batch[i].submission_text)
+    return grades
+
+def _apply(db, batch, grades):
+    graded = 0
+    for row, grade in zip(batch, grades):
+        progress = db.get(models.TrainingProgress, row.id)
+        if progress is None or progress.day_status != GRADING:
+            continue
+        if progress.current_task != row.current_task or progress.submission_text != row.submission_text:
+            # Task or submission changed while grading: this grade is for
+            # neither, so queue the row again to grade what is there now
+            progress.day_status = QUEUED
+            _attempts.pop(row.id, None)
+            metrics.incr("grading.stale")
+            continue
+
+        if grade is None:
+            # Never pass (or fail) a submission we couldn't actually evaluate
+            attempts = _attempts.get(row.id, 0) + 1
+            if attempts >= settings.GRADING_MAX_ATTEMPTS:
+                _attempts.pop(row.id, None)
+                progress.day_status = "pending"
+                progress.feedback = RETRY_FEEDBACK
+                metrics.incr("grading.given_up")
+            else:
+                _attempts[row.id] = attempts
+                progress.day_status = QUEUED
+            continue
+
+        _attempts.pop(row.id, None)
+        training.apply_grade(progress, grade, row.submission_text)
+        progress.last_updated = datetime.datetime.utcnow()
+        graded += 1
+    db.commit()
+
+    now = time.monotonic()
+    _graded_at.extend([now] * graded)
+    metrics.incr("grading.graded", graded)
+    for row in batch:
+        _notify(row.user_id)
+    return graded
+
+async def grade_next_batch():
+    # Grades up to one batch of queued submissions. Returns how many were claimed.
+    async with AsyncSessionLocal() as db:
+        batch = await db.run_sync(_claim, settings.GRADING_BATCH_SIZE)
+    if not batch:
+        return 0
+
+    start = time.perf_counter()
+    try:
+        grades = await _grade(batch)
+    except BaseException:
+        async with AsyncSessionLocal() as db:
+            await db.run_sync(_release, batch)
+        raise
+    metrics.observe("grading.batch", (time.perf_counter() - start) * 1000)
+    metrics.incr("grading.batches")
+
+    async with AsyncSessionLocal() as db:
+        await db.run_sync(_apply, batch, grades)
+    return len(batch)
+
+async def grading_worker():
+    global _wake
+    _wake = asyncio.Event()
+    lease_checked = None
+
+    while True:
+        if lease_checked is None or time.monotonic() - lease_checked > settings.GRADING_LEASE_SECONDS / 2:
+            lease_checked = time.monotonic()
+            try:
+                async with AsyncSessionLocal() as db:
+                    await db.run_sync(_requeue_interrupted)
+            except Exception as e:
+                print(f"Grading lease check failed: {e}")
+
+        claimed = 0
+        try:
+            claimed = await grade_next_batch()
+        except SchedulerBusy as e:
+            await asyncio.sleep(e.retry_after)
+            continue
+        except Exception as e:
+            print(f"Grading queue error: {e}")
+
+        # A full batch means there is probably more waiting
+        if claimed == settings.GRADING_BATCH_SIZE:
+            continue
+        try:
+            await asyncio.wait_for(_wake.wait(), timeout=settings.GRADING_POLL_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        _wake.clear()
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from typing import List, Optional
 import sys
@@ -11,6 +12,7 @@ if parent_dir not in sys.path:
     sys.path.append(parent_dir)
 
 import models
+import user_cache
 from database import get_db
 
 router = APIRouter(prefix="/guide", tags=["Guide System"])
@@ -32,9 +34,9 @@ class GuideLogin(BaseModel):
     password: str
 
 @router.post("/register")
-async def register_guide(data: GuideSignup, db: Session = Depends(get_db)):
+async def register_guide(data: GuideSignup, db: AsyncSession = Depends(get_db)):
     # Check existing user
-    existing_user = db.query(models.User).filter(models.User.email == data.email).first()
+    existing_user = await db.scalar(select(models.User).where(models.User.email == data.email).limit(1))
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already in use")
     
@@ -46,7 +48,7 @@ async def register_guide(data: GuideSignup, db: Session = Depends(get_db)):
         role="guide"
     )
     db.add(user)
-    db.flush() # Get user ID
+    await db.flush() # Get user ID
     
     # Create Independent Guide Record
     guide = models.Guide(
@@ -64,13 +66,14 @@ async def register_guide(data: GuideSignup, db: Session = Depends(get_db)):
         verified=False
     )
     db.add(guide)
-    db.commit()
+    await db.commit()
+    user_cache.invalidate(data.email)
     
     return {"message": "Guide account created successfully. Awaiting verification."}
 
 @router.post("/auth/login")
-async def login_guide(data: GuideLogin, db: Session = Depends(get_db)):
-    guide = db.query(models.Guide).filter(models.Guide.email == data.email).first()
+async def login_guide(data: GuideLogin, db: AsyncSession = Depends(get_db)):
+    guide = await db.scalar(select(models.Guide).where(models.Guide.email == data.email).limit(1))
     if not guide or guide.password != data.password:
         raise HTTPException(status_code=401, detail="Invalid credentials for Guide account")
     
@@ -0,0 +1,138 @@
+import hashlib
+import json
+import re
+from collections import OrderedDict
+
+import llm_client
+import metrics
+import settings
+from scheduler import INTERACTIVE, SchedulerBusy
+
+# Keeps /chat and /simulate prompts under a token budget. The last few turns
+# stay verbatim; everything older is folded into a rolling summary that is
+# extended incrementally as more turns fall out of the window.
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+# Per-message overhead of the chat template (role markers, separators)
+MESSAGE_OVERHEAD = 4
+
+# hash(older messages) -> summary, so the next turn only summarizes what is new
+_summaries = OrderedDict()
+MAX_SUMMARIES = 1000
+
+def count_tokens(text):
+    # Estimate: words and punctuation marks. Close enough to the gemma
+    # tokenizer for budgeting without shipping a tokenizer.
+    return len(re.findall(r"\w+|[^\w\s]", text or ""))
+
+def history_tokens(history):
+    return sum(count_tokens(m.get("content", "")) + MESSAGE_OVERHEAD for m in history)
+
+def needs_compaction(history, budget=None):
+    return history_tokens(history) > (budget or settings.HISTORY_TOKEN_BUDGET)
+
+def _digest(messages):
+    raw = json.dumps([[m.get("role"), m.get("content")] for m in messages])
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+def _remember(messages, summary):
+    key = _digest(messages)
+    _summaries[key] = summary
+    _summaries.move_to_end(key)
+    while len(_summaries) > MAX_SUMMARIES:
+        _summaries.popitem(last=False)
+
+def render(messages):
+    return "\n".join(f"{m.get('role', 'user').upper()}: {m.get('content', '')}" for m in messages)
+
+def _extractive_summary(previous, messages):
+    # Used when the model can't summarize: first sentence of every turn
+    lines = [previous] if previous else []
+    for m in messages:
+        first = re.split(r"(?<=[.!?])\s", (m.get("content") or "").strip(), maxsplit=1)[0]
+        lines.append(f"{m.get('role', 'user')}: {first[:200]}")
+    words = " ".join(lines).split()
+    return " ".join(words[-settings.HISTORY_SUMMARY_TOKENS:])
+
+async def _summarize(previous, messages):
+    prompt = f"""
+Summarize this conversation so it can replace the original messages.
+Keep every fact the user shared about themselves and every decision made.
+Write at most {settings.HISTORY_SUMMARY_TOKENS} words. No intro, no bullet symbols.
+
+Existing summary:
+{previous or "(none)"}
+
+New messages:
+{render(messages)}
+"""
+    try:
+        response = await llm_client.generate(
+            prompt,
+            options={"temperature": 0.2, "num_predict": settings.HISTORY_SUMMARY_TOKENS * 2},
+            priority=INTERACTIVE,
+            route="summary"
+        )
+        summary = response.get("response", "").strip()
+        if summary:
+            return summary
+    except SchedulerBusy:
+        raise
+    except Exception as e:
+        print(f"History summary failed, using extractive summary: {e}")
+    return _extractive_summary(previous, messages)
+
+def _summary_message(summary):
+    return [{"role": "system", "content": SUMMARY_PREFIX + summary}] if summary else []
+
+def _cached_prefix(older):
+    # Longest prefix of older that was summarized on an earlier turn
+    for end in range(len(older), 0, -1):
+        cached = _summaries.get(_digest(older[:end]))
+        if cached is not None:
+            return end, cached
+    return 0, None
+
+async def compact(history, name, budget=None, keep_turns=None):
+    # Returns history unchanged when it fits, otherwise
+    # [summary message] + last keep_turns verbatim turns.
+    budget = budget or settings.HISTORY_TOKEN_BUDGET
+    keep_turns = keep_turns or settings.HISTORY_KEEP_TURNS
+    history = list(history or [])
+
+    before = history_tokens(history)
+    if before <= budget:
+        return history
+
+    # Drop verbatim turns until the recent window alone leaves room for a summary
+    keep = keep_turns * 2
+    while keep > 2 and history_tokens(history[-keep:]) > budget - settings.HISTORY_SUMMARY_TOKENS:
+        keep -= 2
+    older, recent = history[:-keep], history[-keep:]
+
+    # A previous compaction's summary is already at the front; roll it forward
+    previous_summary = None
+    if older and older[0].get("role") == "system" and older[0].get("content", "").startswith(SUMMARY_PREFIX):
+        previous_summary = older[0]["content"][len(SUMMARY_PREFIX):]
+        older = older[1:]
+
+    if not older:
+        compacted = _summary_message(previous_summary) + recent
+    elif previous_summary:
+        compacted = _summary_message(await _summarize(previous_summary, older)) + recent
+    else:
+        # Clients without a session resend the full history every turn. Reuse
+        # the summary from an earlier turn and keep the turns after it verbatim
+        # while they fit, so we only summarize again every few turns.
+        end, cached = _cached_prefix(older)
+        compacted = _summary_message(cached) + older[end:] + recent
+        if cached is None or history_tokens(compacted) > budget:
+            summary = await _summarize(cached, older[end:]) if cached else await _summarize(None, older)
+            _remember(older, summary)
+            compacted = _summary_message(summary) + recent
+    saved = before - history_tokens(compacted)
+    metrics.incr(f"history.compactions.{name}")
+    metrics.incr(f"history.tokens_saved.{name}", max(saved, 0))
+    metrics.observe(f"history.tokens_saved.{name}", max(saved, 0))
+    return compacted
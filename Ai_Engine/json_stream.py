@@ -0,0 +1,65 @@
+import json
+
+# Incremental parser for a JSON array arriving token by token. Each element
+# is parsed as soon as its closing brace arrives, so one malformed element
+# only loses that element instead of the whole response.
+
+class JSONArrayStreamParser:
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0
+        self.started = False # Seen the opening '['
+        self.finished = False # Seen the closing ']'
+        self.depth = 0 # Nesting depth inside the array
+        self.in_string = False
+        self.escape = False
+        self.item_start = None
+        self.errors = 0 # Elements that completed but were not valid JSON
+
+    def feed(self, text):
+        # Returns the elements completed by this chunk
+        self.buffer += text
+        items = []
+
+        while self.pos < len(self.buffer) and not self.finished:
+            ch = self.buffer[self.pos]
+
+            if not self.started:
+                # Skip code fences or any intro text before the array
+                if ch == "[":
+                    self.started = True
+            elif self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = True
+            elif ch in "{[":
+                if self.depth == 0:
+                    self.item_start = self.pos
+                self.depth += 1
+            elif ch in "}]":
+                if self.depth == 0:
+                    self.finished = ch == "]"
+                else:
+                    self.depth -= 1
+                    if self.depth == 0 and self.item_start is not None:
+                        raw = self.buffer[self.item_start:self.pos + 1]
+                        try:
+                            items.append(json.loads(raw))
+                        except ValueError:
+                            self.errors += 1
+                        self.item_start = None
+            self.pos += 1
+
+        # Drop what we no longer need so long streams don't grow the buffer
+        keep_from = self.pos if self.item_start is None else self.item_start
+        self.buffer = self.buffer[keep_from:]
+        self.pos -= keep_from
+        if self.item_start is not None:
+            self.item_start = 0
+
+        return items
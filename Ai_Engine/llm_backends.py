@@ -0,0 +1,187 @@
+import asyncio
+import hashlib
+import json
+import random
+import re
+from abc import ABC, abstractmethod
+
+import ollama
+
+import settings
+
+# Model backends behind llm_client. A backend takes the same arguments as
+# ollama.AsyncClient.generate/chat and returns the same shapes ("response",
+# "message", "context", "done"), or an async iterator of parts when
+# stream=True. Pick one with DEMODREAM_LLM_BACKEND.
+
+class LLMBackend(ABC):
+    name = None
+
+    @abstractmethod
+    async def generate(self, model, prompt, system=None, context=None, format=None, options=None, stream=False, keep_alive=None):
+        pass
+
+    @abstractmethod
+    async def chat(self, model, messages, options=None, stream=False, keep_alive=None):
+        pass
+
+class OllamaBackend(LLMBackend):
+    name = "ollama"
+
+    def __init__(self, host=None):
+        # Host defaults to OLLAMA_HOST, same as the ollama CLI
+        self.client = ollama.AsyncClient(host=host)
+
+    async def generate(self, model, prompt, system=None, context=None, format=None, options=None, stream=False, keep_alive=None):
+        return await self.client.generate(
+            model=model,
+            prompt=prompt,
+            system=system,
+            context=context,
+            format=format,
+            options=options or {},
+            stream=stream,
+            keep_alive=keep_alive
+        )
+
+    async def chat(self, model, messages, options=None, stream=False, keep_alive=None):
+        return await self.client.chat(model=model, messages=messages, options=options or {}, stream=stream, keep_alive=keep_alive)
+
+WORDS = (
+    "career skills project team data design build learn plan review practice "
+    "mentor goal client market system network research report present analyze "
+    "improve schedule budget quality feedback portfolio interview resume role "
+    "strategy tools process growth problem solution test deliver lead support"
+).split()
+
+OPTION_LETTERS = ["A", "B", "C", "D"]
+
+class FakeBackend(LLMBackend):
+    # In-process stand-in for benchmarks and CI. Outputs are well-formed for
+    # every schema the generators ask for and come from one seeded RNG, so a
+    # run with the same seed and request order produces the same text.
+    name = "fake"
+
+    def __init__(self, seed=0, latency_ms=50, token_ms=0):
+        self.rng = random.Random(seed)
+        self.latency = latency_ms / 1000
+        self.token_delay = token_ms / 1000
+        self.calls = 0
+
+    def _sentence(self, min_words=6, max_words=14):
+        words = [self.rng.choice(WORDS) for _ in range(self.rng.randint(min_words, max_words))]
+        return " ".join(words).capitalize() + "."
+
+    def _text(self):
+        return " ".join(self._sentence() for _ in range(self.rng.randint(2, 4)))
+
+    def _count(self, prompt, schema):
+        # Batch grading numbers its submissions; quiz prompts say how many
+        submissions = re.findall(r"^\s*Submission (\d+):", prompt, re.M)
+        if submissions:
+            return len(submissions)
+        match = re.search(r"Generate (\d+)", prompt)
+        if match:
+            return int(match.group(1))
+        return max(schema.get("minItems", 3), 1)
+
+    def _question(self, position):
+        options = [f"{letter}. {self._sentence(2, 5)[:-1]}" for letter in OPTION_LETTERS]
+        return {
+            "id": position,
+            "question": self._sentence(6, 12)[:-1] + "?",
+            "options": options,
+            "correct_answer": self.rng.choice(OPTION_LETTERS)
+        }
+
+    def _from_schema(self, schema, defs, prompt, position=1):
+        if "$ref" in schema:
+            name = schema["$ref"].split("/")[-1]
+            if name == "QuizQuestion":
+                return self._question(position)
+            return self._from_schema(defs[name], defs, prompt, position)
+        if "anyOf" in schema:
+            options = [s for s in schema["anyOf"] if s.get("type") != "null"]
+            return self._from_schema(options[0], defs, prompt, position)
+        if "enum" in schema:
+            return self.rng.choice(schema["enum"])
+        if "const" in schema:
+            return schema["const"]
+        if "default" in schema:
+            return schema["default"]
+
+        kind = schema.get("type")
+        if kind == "object":
+            return {
+                key: self._from_schema(prop, defs, prompt, position)
+                for key, prop in schema.get("properties", {}).items()
+            }
+        if kind == "array":
+            count = self._count(prompt, schema)
+            count = min(max(count, schema.get("minItems", 0)), schema.get("maxItems", count))
+            return [self._from_schema(schema.get("items", {}), defs, prompt, i) for i in range(1, count + 1)]
+        if kind == "boolean":
+            return self.rng.random() < 0.7
+        if kind == "integer":
+            return position
+        if kind == "number":
+            return round(self.rng.random(), 2)
+        return self._sentence()
+
+    def _respond(self, prompt, format):
+        self.calls += 1
+        if isinstance(format, dict):
+            return json.dumps(self._from_schema(format, format.get("$defs", {}), prompt))
+        if format == "json":
+            return json.dumps({"response": self._sentence()})
+        return self._text()
+
+    def _tokens(self, text):
+        return re.findall(r"\S+\s*|\s+", text)
+
+    def _context(self, context, prompt, text):
+        digest = hashlib.sha256((prompt + text).encode()).digest()
+        return list(context or []) + list(digest[:8])
+
+    async def _wait(self, text):
+        await asyncio.sleep(self.latency + self.token_delay * len(self._tokens(text)))
+
+    async def _stream(self, text, make_part, final_part):
+        await asyncio.sleep(self.latency)
+        for token in self._tokens(text):
+            if self.token_delay:
+                await asyncio.sleep(self.token_delay)
+            yield make_part(token)
+        yield final_part
+
+    async def generate(self, model, prompt, system=None, context=None, format=None, options=None, stream=False, keep_alive=None):
+        text = self._respond(prompt, format)
+        final = {"model": model, "response": "", "done": True, "context": self._context(context, prompt, text)}
+        if stream:
+            return self._stream(text, lambda token: {"model": model, "response": token, "done": False}, final)
+        await self._wait(text)
+        return {**final, "response": text}
+
+    async def chat(self, model, messages, options=None, stream=False, keep_alive=None):
+        prompt = messages[-1].get("content", "") if messages else ""
+        text = self._respond(prompt, None)
+        if stream:
+            return self._stream(
+                text,
+                lambda token: {"model": model, "message": {"role": "assistant", "content": token}, "done": False},
+                {"model": model, "message": {"role": "assistant", "content": ""}, "done": True}
+            )
+        await self._wait(text)
+        return {"model": model, "message": {"role": "assistant", "content": text}, "done": True}
+
+def create(name=None):
+    name = name or settings.LLM_BACKEND
+    if name == "ollama":
+        return OllamaBackend()
+    if name == "fake":
+        return FakeBackend(
+            seed=settings.FAKE_LLM_SEED,
+            latency_ms=settings.FAKE_LLM_LATENCY_MS,
+            token_ms=settings.FAKE_LLM_TOKEN_MS
+        )
+    raise ValueError(f"Unknown LLM backend: {name!r} (expected 'ollama' or 'fake')")
@@ -0,0 +1,120 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+import metrics
+import settings
+
+# Disk-backed cache for parsed LLM results, keyed on a hash of
+# (model, prompt, options). Entries expire per function (settings.LLM_CACHE_TTLS)
+# and the least recently used ones are evicted past LLM_CACHE_MAX_ENTRIES.
+#
+# get() and put() are awaited from the generators; the sqlite3 work runs in a
+# worker thread so a slow disk never stalls the event loop. Hits don't write:
+# their access times are batched and flushed every TOUCH_FLUSH_SECONDS (or
+# before an eviction, so LRU order stays right).
+
+TOUCH_FLUSH_SECONDS = 30
+TOUCH_FLUSH_MAX = 200
+
+_lock = threading.Lock()
+_conn = None
+_touched = {} # key -> last access time not yet written
+_flushed_at = 0.0
+
+def _get_conn():
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(settings.LLM_CACHE_PATH, check_same_thread=False)
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.execute("PRAGMA synchronous=NORMAL")
+        _conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                name TEXT,
+                value TEXT,
+                created_at REAL,
+                last_access REAL
+            )
+        """)
+        _conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_last_access ON llm_cache (last_access)")
+        _conn.commit()
+    return _conn
+
+def make_key(model, prompt, options=None):
+    raw = json.dumps({"model": model, "prompt": prompt, "options": options or {}}, sort_keys=True)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+def ttl_for(name):
+    return settings.LLM_CACHE_TTLS.get(name, 0)
+
+def _flush_touches(conn):
+    # Caller holds _lock
+    global _flushed_at
+    if _touched:
+        conn.executemany("UPDATE llm_cache SET last_access = ? WHERE key = ?", [(t, k) for k, t in _touched.items()])
+        conn.commit()
+        _touched.clear()
+    _flushed_at = time.monotonic()
+
+def _get(key, ttl):
+    now = time.time()
+    with _lock:
+        conn = _get_conn()
+        row = conn.execute("SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        if row and now - row[1] <= ttl:
+            _touched[key] = now
+            if len(_touched) >= TOUCH_FLUSH_MAX or time.monotonic() - _flushed_at > TOUCH_FLUSH_SECONDS:
+                _flush_touches(conn)
+        elif row:
+            conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            conn.commit()
+            _touched.pop(key, None)
+            row = None
+    return row
+
+async def get(name, key):
+    ttl = ttl_for(name)
+    if ttl <= 0:
+        return None
+
+    row = await asyncio.to_thread(_get, key, ttl)
+    if row is None:
+        metrics.incr(f"llm_cache.miss.{name}")
+        return None
+    metrics.incr(f"llm_cache.hit.{name}")
+    return json.loads(row[0])
+
+def _put(name, key, value):
+    now = time.time()
+    with _lock:
+        conn = _get_conn()
+        _touched.pop(key, None)
+        conn.execute(
+            "INSERT OR REPLACE INTO llm_cache (key, name, value, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+            (key, name, value, now, now)
+        )
+        overflow = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] - settings.LLM_CACHE_MAX_ENTRIES
+        if overflow > 0:
+            _flush_touches(conn)
+            conn.execute(
+                "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY last_access ASC LIMIT ?)",
+                (overflow,)
+            )
+            metrics.incr("llm_cache.evicted", overflow)
+        conn.commit()
+
+async def put(name, key, value):
+    if ttl_for(name) <= 0:
+        return
+    await asyncio.to_thread(_put, name, key, json.dumps(value))
+
+def clear():
+    with _lock:
+        conn = _get_conn()
+        conn.execute("DELETE FROM llm_cache")
+        conn.commit()
+        _touched.clear()
@@ -0,0 +1,136 @@
+import time
+from contextlib import aclosing
+
+import llm_backends
+import settings
+from circuit_breaker import get_breaker
+from scheduler import BATCH, get_scheduler
+
+# Async access to the model backend. Every generator function goes through here
+# so a long generation never blocks the uvicorn event loop, every call takes a
+# slot from the priority scheduler first and the circuit breaker sees its outcome.
+
+_client = None
+
+def get_client():
+    global _client
+    if _client is None:
+        _client = llm_backends.create()
+    return _client
+
+def resolve(route, options=None, model=None):
+    # (model, options) for a generator function. Settings in LLM_ROUTES win
+    # over the options the call site passes; an explicit model wins over both.
+    config = settings.LLM_ROUTES.get(route, {}) if route else {}
+    options = dict(options or {})
+    for key in ("num_predict", "temperature", "num_ctx"):
+        if config.get(key) is not None:
+            options[key] = config[key]
+    return model or config.get("model") or settings.LLM_MODEL, options
+
+def route_models():
+    # Every model some generator function is routed to
+    return sorted({settings.LLM_MODEL} | {config["model"] for config in settings.LLM_ROUTES.values()})
+
+async def _call(priority, route, make_call):
+    # One non-streaming backend call: breaker check, scheduler slot, outcome.
+    # Its full duration is judged against the route's slow-call limit.
+    slow_call_s = settings.LLM_ROUTES.get(route, {}).get("slow_call_s") if route else None
+    breaker = get_breaker()
+    breaker.check() # Fail fast instead of queueing behind a dead backend
+    async with get_scheduler().slot(priority):
+        breaker.acquire()
+        start = time.perf_counter()
+        try:
+            result = await make_call()
+        except Exception:
+            breaker.record(False, time.perf_counter() - start)
+            raise
+        except BaseException:
+            breaker.release()
+            raise
+        breaker.record(True, time.perf_counter() - start, slow_call_s)
+        return result
+
+async def _stream(priority, make_call):
+    # Streaming variant; latency is time to the first part, which doesn't
+    # grow with the output, so every route uses the default limit
+    breaker = get_breaker()
+    breaker.check()
+    async with get_scheduler().slot(priority):
+        breaker.acquire()
+        start = time.perf_counter()
+        first_part_s = None
+        try:
+            async for part in await make_call():
+                if first_part_s is None:
+                    first_part_s = time.perf_counter() - start
+                yield part
+        except GeneratorExit:
+            # Caller stopped early (e.g. enough quiz questions): still a success
+            breaker.record(True, first_part_s if first_part_s is not None else time.perf_counter() - start)
+            raise
+        except Exception:
+            breaker.record(False, time.perf_counter() - start)
+            raise
+        except BaseException:
+            breaker.release()
+            raise
+        breaker.record(True, first_part_s if first_part_s is not None else time.perf_counter() - start)
+
+async def generate(prompt, options=None, model=None, priority=BATCH, system=None, context=None, format=None, route=None):
+    # context: token context returned by a previous generate call, so Ollama
+    # only evaluates the new prompt. format: JSON schema the output must follow.
+    # route: generator function name in settings.LLM_ROUTES.
+    model, options = resolve(route, options, model)
+    return await _call(priority, route, lambda: get_client().generate(
+        model=model,
+        prompt=prompt,
+        system=system,
+        context=context,
+        format=format,
+        options=options,
+        keep_alive=settings.LLM_KEEP_ALIVE
+    ))
+
+async def generate_stream(prompt, options=None, model=None, priority=BATCH, system=None, context=None, format=None, route=None):
+    # Yields raw response parts; the final part (done=True) carries the context
+    model, options = resolve(route, options, model)
+    parts = _stream(priority, lambda: get_client().generate(
+        model=model,
+        prompt=prompt,
+        system=system,
+        context=context,
+        format=format,
+        options=options,
+        stream=True,
+        keep_alive=settings.LLM_KEEP_ALIVE
+    ))
+    async with aclosing(parts):
+        async for part in parts:
+            yield part
+
+async def chat(messages, options=None, model=None, priority=BATCH, route=None):
+    model, options = resolve(route, options, model)
+    return await _call(priority, route, lambda: get_client().chat(
+        model=model,
+        messages=messages,
+        options=options,
+        keep_alive=settings.LLM_KEEP_ALIVE
+    ))
+
+async def chat_stream(messages, options=None, model=None, priority=BATCH, route=None):
+    # Yields content tokens as Ollama produces them
+    model, options = resolve(route, options, model)
+    parts = _stream(priority, lambda: get_client().chat(
+        model=model,
+        messages=messages,
+        options=options,
+        stream=True,
+        keep_alive=settings.LLM_KEEP_ALIVE
+    ))
+    async with aclosing(parts):
+        async for part in parts:
+            token = part['message']['content']
+            if token:
+                yield token
@@ -0,0 +1,46 @@
+from pydantic import BaseModel, Field, field_validator
+from typing import List, Literal, Optional
+
+# Shapes we expect back from the model. The JSON schema of each one is passed
+# to Ollama's `format` parameter and the response is validated against it.
+
+OPTION_PREFIXES = ["A. ", "B. ", "C. ", "D. "]
+
+class QuizQuestion(BaseModel):
+    id: Optional[int] = None
+    question: str = Field(min_length=1)
+    options: List[str] = Field(min_length=4, max_length=4)
+    correct_answer: Literal["A", "B", "C", "D"]
+
+    @field_validator("options")
+    @classmethod
+    def options_are_prefixed(cls, options):
+        for prefix, option in zip(OPTION_PREFIXES, options):
+            if not option.startswith(prefix) or not option[len(prefix):].strip():
+                raise ValueError(f"option must start with '{prefix}'")
+        return options
+
+class DailyTask(BaseModel):
+    title: str = Field(min_length=1)
+    description: str = Field(min_length=1)
+    verification_type: str = "text_reflection"
+
+class GradeResult(BaseModel):
+    passed: bool
+    feedback: str
+
+class IndexedGradeResult(GradeResult):
+    # One entry of a batched grading response
+    index: int
+
+class RoadmapPhase(BaseModel):
+    phase: str
+    steps: List[str]
+    explanation: str
+
+class ProjectRoadmap(BaseModel):
+    project_overview: str
+    required_skills_tools: str
+    roadmap: List[RoadmapPhase] = Field(min_length=1)
+    estimated_time: str
+    common_mistakes: List[str]
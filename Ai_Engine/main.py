@@ -1,18 +1,64 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from typing import List, Optional
+from contextlib import asynccontextmanager
+import asyncio
+import json
+import time
 
+import chat_sessions
+import grading_queue
+import metrics
 import models
-from database import engine, get_db, init_db
-from generator import generate_questions, chat_response, generate_daily_task, grade_submission, generate_project_roadmap, generate_simulation_response
+import pregrade
+import question_bank
+import settings
+import structured
+import task_pool
+import training
+import user_cache
+import warmup
+from cancellation import deadline_for, guard_stream, run_cancellable
+from scheduler import SchedulerBusy, get_scheduler
+from circuit_breaker import CircuitOpen, get_breaker
+from database import AsyncSessionLocal, async_engine, get_db, init_db
+from generator import chat_response, chat_response_stream, session_chat_response, session_chat_response_stream, generate_project_roadmap, generate_simulation_response, generate_simulation_response_stream
 from guide_system import router as guide_router
 
 # Initialize Database
 init_db()
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app):
+    # Background workers live as long as the app
+    workers = [
+        asyncio.create_task(warmup.warm_up()),
+        asyncio.create_task(question_bank.refill_worker()),
+        asyncio.create_task(chat_sessions.expiry_worker()),
+        asyncio.create_task(task_pool.prewarm_worker()),
+        asyncio.create_task(grading_queue.grading_worker())
+    ]
+    yield
+    for worker in workers:
+        worker.cancel()
+    await asyncio.gather(*workers, return_exceptions=True)
+    await async_engine.dispose()
+
+app = FastAPI(lifespan=lifespan)
+
+@app.exception_handler(SchedulerBusy)
+async def scheduler_busy_handler(request, exc):
+    # LLM queue is full: fail fast and tell the client when to come back
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "The AI is busy right now. Please try again shortly."},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
 
 # Include Guide System Routes
 app.include_router(guide_router)
@@ -21,6 +67,7 @@ app.include_router(guide_router)
 class ChatRequest(BaseModel):
     message: str
     history: Optional[List[dict]] = []
+    session_id: Optional[str] = None # Server-side transcript, see chat_sessions
 
 # CORS Setup
 app.add_middleware(
@@ -38,30 +85,150 @@ class UserSignup(BaseModel):
     password: str
     role: Optional[str] = "explorer"
 
+async def resolve_chat_session(req: ChatRequest):
+    # Returns the server-side session for this turn, or None for the legacy
+    # mode where the client resends the full history every time
+    if req.session_id:
+        session = await chat_sessions.get_session(req.session_id)
+        if session:
+            return session
+        if not req.history:
+            raise HTTPException(status_code=404, detail="Chat session expired")
+        # Expired, but the client still has the transcript: rebuild from it
+        return await chat_sessions.create_session(req.history)
+    if req.history:
+        return None
+    return await chat_sessions.create_session()
+
 @app.post("/chat")
-async def chat_endpoint(req: ChatRequest):
-    # Format history for the generator
-    # Ensure history is a list of {"role": "user"|"assistant", "content": "..."}
-    response = chat_response(req.message, req.history)
-    return {"reply": response}
+async def chat_endpoint(req: ChatRequest, request: Request):
+    session = await resolve_chat_session(req)
+    if session is None:
+        # Format history for the generator
+        # Ensure history is a list of {"role": "user"|"assistant", "content": "..."}
+        response = await run_cancellable(request, chat_response(req.message, req.history), "chat")
+        return {"reply": response}
+
+    async def turn():
+        async with chat_sessions.locked(session) as current:
+            reply = await session_chat_response(current, req.message)
+            await chat_sessions.save_session(current)
+            return reply
+
+    response = await run_cancellable(request, turn(), "chat")
+    return {"reply": response, "session_id": session.id}
+
+# --- Streaming (Server-Sent Events) ---
+def sse_event(data, event=None):
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+def sse_stream(events):
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+TIMEOUT_EVENT = sse_event({"detail": "The AI took too long to answer. Please try again."}, event="error")
+
+async def sse_response(request, tokens, metric_name, done_data=None):
+    # Forwards generator tokens as SSE and records time to first token.
+    # The first token is awaited before the response starts so a full LLM
+    # queue can still be answered with a 503. Generation stops when the
+    # client disconnects or the endpoint timeout passes.
+    start = time.perf_counter()
+    deadline = deadline_for(metric_name)
+    first = await run_cancellable(request, anext(tokens, None), metric_name, deadline)
+    metrics.observe(f"ttft.{metric_name}", (time.perf_counter() - start) * 1000)
+
+    async def event_stream():
+        reply = []
+        if first is not None:
+            reply.append(first)
+            yield sse_event({"token": first})
+        async for token in tokens:
+            reply.append(token)
+            yield sse_event({"token": token})
+        metrics.observe(f"stream_total.{metric_name}", (time.perf_counter() - start) * 1000)
+        yield sse_event({"reply": "".join(reply), **(done_data or {})}, event="done")
+
+    return sse_stream(guard_stream(event_stream(), metric_name, deadline, TIMEOUT_EVENT))
+
+@app.post("/chat/stream")
+async def chat_stream_endpoint(req: ChatRequest, request: Request):
+    session = await resolve_chat_session(req)
+    if session is None:
+        return await sse_response(request, chat_response_stream(req.message, req.history), "chat")
+
+    async def session_tokens():
+        async with chat_sessions.locked(session) as current:
+            async for token in session_chat_response_stream(current, req.message):
+                yield token
+            await chat_sessions.save_session(current)
+
+    return await sse_response(request, session_tokens(), "chat", done_data={"session_id": session.id})
+
+@app.get("/ready")
+async def readiness():
+    # 200 once the database and models are warm, 503 until then
+    state = warmup.status()
+    return JSONResponse(status_code=200 if state["ready"] else 503, content=state)
+
+@app.get("/metrics")
+async def get_metrics():
+    snapshot = metrics.snapshot()
+    snapshot["scheduler"] = get_scheduler().stats()
+    snapshot["parse_failure_rate"] = structured.failure_rates(snapshot["counters"])
+    snapshot["chat_sessions"] = await chat_sessions.active_count()
+    snapshot["grading"] = await grading_queue.stats()
+    snapshot["grading"]["llm_calls_avoided"] = pregrade.avoided_rate(snapshot["counters"])
+    snapshot["circuit"] = get_breaker().stats()
+    snapshot["user_cache"] = user_cache.stats(snapshot["counters"])
+    return snapshot
 
 class QuizRequest(BaseModel):
     field: str
     difficulty: str
 
 @app.post("/generate")
-async def generate_quiz_endpoint(req: QuizRequest):
-    questions_data = generate_questions(req.field, req.difficulty)
+async def generate_quiz_endpoint(req: QuizRequest, request: Request, db: AsyncSession = Depends(get_db)):
+    # Served from the question bank; live generation only on a cold miss
+    questions_data = await run_cancellable(request, question_bank.get_quiz(db, req.field, req.difficulty), "quiz")
     return {"questions": questions_data}
 
+@app.post("/generate/stream")
+async def generate_quiz_stream_endpoint(req: QuizRequest, request: Request):
+    # Questions arrive as SSE 'question' events as soon as each is ready
+    start = time.perf_counter()
+    deadline = deadline_for("quiz")
+    questions = question_bank.stream_quiz(req.field, req.difficulty)
+    first = await run_cancellable(request, anext(questions, None), "quiz", deadline)
+    metrics.observe("ttft.quiz", (time.perf_counter() - start) * 1000)
+
+    async def event_stream():
+        count = 0
+        if first is not None:
+            count += 1
+            yield sse_event(first, event="question")
+        async for q in questions:
+            count += 1
+            yield sse_event(q, event="question")
+        yield sse_event({"count": count}, event="done")
+
+    return sse_stream(guard_stream(event_stream(), "quiz", deadline, TIMEOUT_EVENT))
+
 class UserLogin(BaseModel):
     email: str
     password: str
 
 # --- Auth Routes ---
+async def find_user(db, email):
+    return await db.scalar(select(models.User).where(models.User.email == email).limit(1))
+
 @app.post("/signup")
-async def signup(user: UserSignup, db: Session = Depends(get_db)):
-    db_user = db.query(models.User).filter(models.User.email == user.email).first()
+async def signup(user: UserSignup, db: AsyncSession = Depends(get_db)):
+    db_user = await find_user(db, user.email)
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
@@ -73,13 +240,14 @@ async def signup(user: UserSignup, db: Session = Depends(get_db)):
         role=user.role
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
+    user_cache.invalidate(user.email)
     return {"message": "User created successfully"}
 
 @app.post("/login")
-async def login(user: UserLogin, db: Session = Depends(get_db)):
-    db_user = db.query(models.User).filter(models.User.email == user.email).first()
+async def login(user: UserLogin, db: AsyncSession = Depends(get_db)):
+    db_user = await find_user(db, user.email)
     if not db_user or db_user.password != user.password:
         raise HTTPException(status_code=400, detail="Invalid credentials")
     
@@ -98,18 +266,19 @@ class UserRoleUpdate(BaseModel):
     role: str
 
 @app.post("/set_role")
-async def set_user_role(update: UserRoleUpdate, db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.email == update.email).first()
+async def set_user_role(update: UserRoleUpdate, db: AsyncSession = Depends(get_db)):
+    user = await find_user(db, update.email)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
     user.role = update.role
-    db.commit()
+    await db.commit()
+    user_cache.invalidate(update.email)
     return {"message": "Role updated successfully"}
 
 @app.get("/profile/{email}")
-async def get_profile_details(email: str, db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.email == email).first()
+async def get_profile_details(email: str, db: AsyncSession = Depends(get_db)):
+    user = await find_user(db, email)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -136,19 +305,19 @@ class GuideUpdate(BaseModel):
     expertise_fields: List[str] = []
 
 @app.get("/guide/status/{email}")
-async def get_guide_status(email: str, db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.email == email).first()
+async def get_guide_status(email: str, db: AsyncSession = Depends(get_db)):
+    user = await user_cache.get_identity(db, email)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
         
-    profile = db.query(models.GuideProfile).filter(models.GuideProfile.user_id == user.id).first()
+    profile = await db.scalar(select(models.GuideProfile).where(models.GuideProfile.user_id == user.id).limit(1))
     
     if not profile:
         # Create empty profile if not exists
         profile = models.GuideProfile(user_id=user.id)
         db.add(profile)
-        db.commit()
-        db.refresh(profile)
+        await db.commit()
+        await db.refresh(profile)
         
     return {
         "is_onboarded": profile.is_onboarded,
@@ -157,12 +326,12 @@ async def get_guide_status(email: str, db: Session = Depends(get_db)):
     }
 
 @app.post("/guide/onboard")
-async def guide_onboard(data: GuideUpdate, db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.email == data.email).first()
+async def guide_onboard(data: GuideUpdate, db: AsyncSession = Depends(get_db)):
+    user = await user_cache.get_identity(db, data.email)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
         
-    profile = db.query(models.GuideProfile).filter(models.GuideProfile.user_id == user.id).first()
+    profile = await db.scalar(select(models.GuideProfile).where(models.GuideProfile.user_id == user.id).limit(1))
     if not profile:
          profile = models.GuideProfile(user_id=user.id)
          db.add(profile)
@@ -173,7 +342,7 @@ async def guide_onboard(data: GuideUpdate, db: Session = Depends(get_db)):
     profile.linkedin_url = data.linkedin_url
     profile.is_onboarded = True # Mark as done for this demo
     
-    db.commit()
+    await db.commit()
     return {"message": "Onboarding complete"}
 
 # --- Mentorship & Chat System ---
@@ -184,8 +353,8 @@ class MentorshipSubmit(BaseModel):
     description: str
 
 @app.post("/mentorship/request")
-async def create_mentorship_request(req: MentorshipSubmit, db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.email == req.email).first()
+async def create_mentorship_request(req: MentorshipSubmit, db: AsyncSession = Depends(get_db)):
+    user = await user_cache.get_identity(db, req.email)
     if not user: raise HTTPException(status_code=404, detail="User not found")
     
     new_req = models.MentorshipRequest(
@@ -195,14 +364,14 @@ async def create_mentorship_request(req: MentorshipSubmit, db: Session = Depends
         description=req.description
     )
     db.add(new_req)
-    db.commit()
+    await db.commit()
     return {"message": "Request submitted successfully"}
 
 @app.get("/mentorship/available/{email}")
-async def get_available_requests(email: str, db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.email == email).first()
+async def get_available_requests(email: str, db: AsyncSession = Depends(get_db)):
+    user = await user_cache.get_identity(db, email)
     if not user: return []
-    guide_profile = db.query(models.GuideProfile).filter(models.GuideProfile.user_id == user.id).first()
+    guide_profile = await db.scalar(select(models.GuideProfile).where(models.GuideProfile.user_id == user.id).limit(1))
     if not guide_profile: return []
     
     import json
@@ -214,9 +383,11 @@ async def get_available_requests(email: str, db: Session = Depends(get_db)):
     # Normalize expertise
     expertise = [e.strip().lower() for e in expertise if isinstance(e, str)]
     
-    all_requests = db.query(models.MentorshipRequest).filter(
-        models.MentorshipRequest.status == "open"
-    ).all()
+    all_requests = (await db.scalars(
+        select(models.MentorshipRequest)
+        .where(models.MentorshipRequest.status == "open")
+        .options(selectinload(models.MentorshipRequest.explorer))
+    )).all()
     
     # Client-side filtering for better debugging and robustness
     matching_requests = []
@@ -238,9 +409,9 @@ class AcceptRequest(BaseModel):
     request_id: int
 
 @app.post("/mentorship/accept")
-async def accept_mentorship_request(data: AcceptRequest, db: Session = Depends(get_db)):
-    guide = db.query(models.User).filter(models.User.email == data.guide_email).first()
-    req = db.query(models.MentorshipRequest).filter(models.MentorshipRequest.id == data.request_id).first()
+async def accept_mentorship_request(data: AcceptRequest, db: AsyncSession = Depends(get_db)):
+    guide = await user_cache.get_identity(db, data.guide_email)
+    req = await db.scalar(select(models.MentorshipRequest).where(models.MentorshipRequest.id == data.request_id).limit(1))
     
     if req.status != "open":
         raise HTTPException(status_code=400, detail="Request already accepted or closed")
@@ -254,16 +425,22 @@ async def accept_mentorship_request(data: AcceptRequest, db: Session = Depends(g
         guide_id=guide.id
     )
     db.add(session)
-    db.commit()
+    await db.commit()
     return {"session_id": session.id}
 
 @app.get("/chat/sessions/{email}")
-async def get_user_chat_sessions(email: str, db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.email == email).first()
+async def get_user_chat_sessions(email: str, db: AsyncSession = Depends(get_db)):
+    user = await user_cache.get_identity(db, email)
     if not user: return []
-    sessions = db.query(models.ChatSession).filter(
-        (models.ChatSession.explorer_id == user.id) | (models.ChatSession.guide_id == user.id)
-    ).all()
+    sessions = (await db.scalars(
+        select(models.ChatSession)
+        .where((models.ChatSession.explorer_id == user.id) | (models.ChatSession.guide_id == user.id))
+        .options(
+            selectinload(models.ChatSession.explorer),
+            selectinload(models.ChatSession.guide),
+            selectinload(models.ChatSession.request)
+        )
+    )).all()
     
     return [{
         "id": s.id,
@@ -279,20 +456,20 @@ class MessageSend(BaseModel):
     content: str
 
 @app.post("/chat/send")
-async def send_message(msg: MessageSend, db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.email == msg.sender_email).first()
+async def send_message(msg: MessageSend, db: AsyncSession = Depends(get_db)):
+    user = await user_cache.get_identity(db, msg.sender_email)
     new_msg = models.Message(
         session_id=msg.session_id,
         sender_id=user.id,
         content=msg.content
     )
     db.add(new_msg)
-    db.commit()
+    await db.commit()
     return {"status": "sent"}
 
 @app.get("/chat/messages/{session_id}")
-async def get_messages(session_id: int, db: Session = Depends(get_db)):
-    msgs = db.query(models.Message).filter(models.Message.session_id == session_id).order_by(models.Message.timestamp.asc()).all()
+async def get_messages(session_id: int, db: AsyncSession = Depends(get_db)):
+    msgs = (await db.scalars(select(models.Message).where(models.Message.session_id == session_id).order_by(models.Message.timestamp.asc()))).all()
     return [{
         "sender_id": m.sender_id,
         "content": m.content,
@@ -306,20 +483,20 @@ class TrainingSubmission(BaseModel):
     submission_text: str
 
 @app.get("/training/status/{email}")
-async def get_training_status(email: str, db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.email == email).first()
+async def get_training_status(email: str, db: AsyncSession = Depends(get_db)):
+    user = await user_cache.get_identity(db, email)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
     # Check if entry exists
-    progress = db.query(models.TrainingProgress).filter(models.TrainingProgress.user_id == user.id).first()
+    progress = await db.scalar(select(models.TrainingProgress).where(models.TrainingProgress.user_id == user.id).limit(1))
     
     if not progress:
         # Create initial entry
         progress = models.TrainingProgress(user_id=user.id)
         db.add(progress)
-        db.commit()
-        db.refresh(progress)
+        await db.commit()
+        await db.refresh(progress)
 
     return {
         "phase": progress.current_phase,
@@ -330,18 +507,22 @@ async def get_training_status(email: str, db: Session = Depends(get_db)):
     }
 
 @app.post("/training/generate_task/{email}")
-async def start_daily_task(email: str, db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.email == email).first()
-    progress = db.query(models.TrainingProgress).filter(models.TrainingProgress.user_id == user.id).first()
+async def start_daily_task(email: str, request: Request, db: AsyncSession = Depends(get_db)):
+    user = await user_cache.get_identity(db, email)
+    progress = await db.scalar(select(models.TrainingProgress).where(models.TrainingProgress.user_id == user.id).limit(1))
     
     if not progress:
         raise HTTPException(status_code=400, detail="Initialize training first")
+    if grading_queue.is_queued(progress):
+        # A new task would drop the submission that is waiting for its grade
+        raise HTTPException(status_code=409, detail="Your previous submission is still being graded")
     
     if progress.current_task and progress.day_status == "pending":
         return {"message": "Task already exists", "task": progress.current_task}
     
-    # Generate new task
-    task_data = generate_daily_task(progress.current_phase, progress.current_day)
+    # Shared pool first; only a cold key costs an inference
+    career = await db.run_sync(task_pool.career_interest, user.id)
+    task_data = await run_cancellable(request, task_pool.get_task(db, progress.current_phase, progress.current_day, career), "daily_task")
     
     # Store as string (JSON dumps)
     import json
@@ -349,81 +530,101 @@ async def start_daily_task(email: str, db: Session = Depends(get_db)):
     progress.day_status = "pending"
     progress.submission_text = None
     progress.feedback = None
-    db.commit()
+    await db.commit()
     
     return task_data
 
-@app.post("/training/submit")
-async def submit_daily_task(sub: TrainingSubmission, db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.email == sub.email).first()
-    progress = db.query(models.TrainingProgress).filter(models.TrainingProgress.user_id == user.id).first()
+@app.post("/training/submit", status_code=202)
+async def submit_daily_task(sub: TrainingSubmission, response: Response, db: AsyncSession = Depends(get_db)):
+    user = await user_cache.get_identity(db, sub.email)
+    progress = await db.scalar(select(models.TrainingProgress).where(models.TrainingProgress.user_id == user.id).limit(1))
     
     if not progress or not progress.current_task:
         raise HTTPException(status_code=400, detail="No active task")
-        
-    grade = grade_submission(progress.current_task, sub.submission_text)
-    
-    progress.submission_text = sub.submission_text
-    progress.feedback = grade.get("feedback", "Recorded.")
-    
-    if grade.get("passed", False):
-        progress.day_status = "completed"
-        # Logic to advance
-        
-        # Max days per phase
-        max_days = {
-            "basic": 15,
-            "intermediate": 15,
-            "expert": 30
-        }
-        
-        current_max = max_days.get(progress.current_phase, 15)
-        
-        if progress.current_day >= current_max:
-            # Advance Phase
-            if progress.current_phase == "basic":
-                progress.current_phase = "intermediate"
-                progress.current_day = 1
-            elif progress.current_phase == "intermediate":
-                progress.current_phase = "expert"
-                progress.current_day = 1
-            elif progress.current_phase == "expert":
-                progress.current_phase = "real_world" # Certificate earned
-                progress.current_day = 1
-        else:
-            progress.current_day += 1
-            
-        progress.current_task = None # Clear for next day
-        
-    else:
-        progress.day_status = "failed" # Retry needed
-        
-    db.commit()
-    return {"passed": grade.get("passed"), "feedback": progress.feedback, "new_phase": progress.current_phase}
+    if grading_queue.is_queued(progress):
+        raise HTTPException(status_code=409, detail="Your previous submission is still being graded")
+    
+    # Obvious passes and rejects are decided without the LLM
+    grade = pregrade.check(progress.current_task, sub.submission_text) if settings.PREGRADE_ENABLED else None
+    if grade is not None:
+        training.apply_grade(progress, grade, sub.submission_text)
+        await db.commit()
+        response.status_code = 200
+        return submission_status(progress)
+    
+    # Graded in the background; poll /training/submission/{email} for the result
+    await db.run_sync(grading_queue.enqueue, progress, sub.submission_text)
+    return {"status": progress.day_status, "message": "Submission received. Grading in progress."}
+
+def submission_status(progress):
+    return {
+        "status": progress.day_status,
+        "feedback": progress.feedback,
+        "phase": progress.current_phase,
+        "day": progress.current_day
+    }
+
+async def get_progress(db, email):
+    user = await user_cache.get_identity(db, email)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    progress = await db.scalar(select(models.TrainingProgress).where(models.TrainingProgress.user_id == user.id).limit(1))
+    if not progress:
+        raise HTTPException(status_code=404, detail="No training progress")
+    return progress
+
+@app.get("/training/submission/{email}")
+async def get_submission_status(email: str, db: AsyncSession = Depends(get_db)):
+    return submission_status(await get_progress(db, email))
+
+@app.get("/training/submission/{email}/events")
+async def submission_events(email: str, db: AsyncSession = Depends(get_db)):
+    # SSE: a 'status' event now, then a 'graded' event once the grade lands
+    progress = await get_progress(db, email)
+    await db.commit() # The stream can stay open for minutes; free the connection
+    user_id = progress.user_id
+    progress_id = progress.id
+
+    async def event_stream():
+        yield sse_event(submission_status(progress), event="status")
+        deadline = time.monotonic() + grading_queue.EVENTS_TIMEOUT
+        while time.monotonic() < deadline:
+            await grading_queue.wait_for_result(user_id, timeout=15)
+            async with AsyncSessionLocal() as check:
+                current = await check.get(models.TrainingProgress, progress_id)
+            if current is None:
+                return
+            if not grading_queue.is_queued(current):
+                yield sse_event(submission_status(current), event="graded")
+                return
+            yield ": keep-alive\n\n"
+        yield sse_event({"status": "timeout"}, event="done")
+
+    return sse_stream(event_stream())
 
 @app.get("/guides/discovery")
 async def discover_guides(
     field: Optional[str] = None, 
     min_exp: Optional[int] = 0, 
     query: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    stmt = db.query(models.Guide).filter(models.Guide.verified == True)
+    stmt = select(models.Guide).where(models.Guide.verified == True)
     
     if field and field != "All":
-        stmt = stmt.filter(models.Guide.primary_domain.ilike(f"%{field}%"))
+        stmt = stmt.where(models.Guide.primary_domain.ilike(f"%{field}%"))
     
     if min_exp:
-        stmt = stmt.filter(models.Guide.years_experience >= min_exp)
+        stmt = stmt.where(models.Guide.years_experience >= min_exp)
         
     if query:
-        stmt = stmt.filter(
+        stmt = stmt.where(
             (models.Guide.full_name.ilike(f"%{query}%")) | 
             (models.Guide.bio.ilike(f"%{query}%")) |
             (models.Guide.current_role.ilike(f"%{query}%"))
         )
         
-    guides = stmt.all()
+    guides = (await db.scalars(stmt)).all()
     
     return [{
         "id": g.id,
@@ -447,8 +648,8 @@ class PerformanceSave(BaseModel):
     difficulty: str
 
 @app.post("/save-result")
-async def save_test_result(data: PerformanceSave, db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.email == data.user_email).first()
+async def save_test_result(data: PerformanceSave, db: AsyncSession = Depends(get_db)):
+    user = await user_cache.get_identity(db, data.user_email)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
         
@@ -459,16 +660,16 @@ async def save_test_result(data: PerformanceSave, db: Session = Depends(get_db))
         difficulty=data.difficulty
     )
     db.add(perf)
-    db.commit()
+    await db.commit()
     return {"message": "Result saved"}
 
 @app.get("/performance/{email}")
-async def get_performance(email: str, db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.email == email).first()
+async def get_performance(email: str, db: AsyncSession = Depends(get_db)):
+    user = await user_cache.get_identity(db, email)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
         
-    history = db.query(models.Performance).filter(models.Performance.user_id == user.id).all()
+    history = (await db.scalars(select(models.Performance).where(models.Performance.user_id == user.id))).all()
     
     return {
         "history": [{
@@ -497,27 +698,28 @@ class ProfileUpdate(BaseModel):
     language: Optional[str] = None
 
 @app.put("/update-profile/{email}")
-async def update_profile(email: str, data: ProfileUpdate, db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.email == email).first()
+async def update_profile(email: str, data: ProfileUpdate, db: AsyncSession = Depends(get_db)):
+    user = await find_user(db, email)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
         
     for key, value in data.dict(exclude_unset=True).items():
         setattr(user, key, value)
         
-    db.commit()
+    await db.commit()
+    user_cache.invalidate(email)
     return {"message": "Profile updated"}
 
 # --- Admin System ---
 
 @app.get("/admin/pending_guides")
-async def get_pending_guides(db: Session = Depends(get_db)):
+async def get_pending_guides(db: AsyncSession = Depends(get_db)):
     # Get all profiles that are pending
-    pending = db.query(models.GuideProfile).filter(models.GuideProfile.verification_status == "pending").all()
+    pending = (await db.scalars(select(models.GuideProfile).where(models.GuideProfile.verification_status == "pending"))).all()
     
     results = []
     for p in pending:
-        user = db.query(models.User).filter(models.User.id == p.user_id).first()
+        user = await db.scalar(select(models.User).where(models.User.id == p.user_id).limit(1))
         if user:
             results.append({
                 "user_id": user.id,
@@ -534,42 +736,70 @@ class VerifyAction(BaseModel):
     action: str # "approve" or "reject"
 
 @app.post("/admin/verify_guide")
-async def verify_guide(data: VerifyAction, db: Session = Depends(get_db)):
-    profile = db.query(models.GuideProfile).filter(models.GuideProfile.user_id == data.user_id).first()
+async def verify_guide(data: VerifyAction, db: AsyncSession = Depends(get_db)):
+    profile = await db.scalar(select(models.GuideProfile).where(models.GuideProfile.user_id == data.user_id).limit(1))
     if not profile:
         raise HTTPException(status_code=404, detail="Profile not found")
     
     if data.action == "approve":
         profile.verification_status = "approved"
         # Also update the Guide table if it exists
-        guide = db.query(models.Guide).filter(models.Guide.user_id == data.user_id).first()
+        guide = await db.scalar(select(models.Guide).where(models.Guide.user_id == data.user_id).limit(1))
         if guide:
             guide.verified = True
     else:
         profile.verification_status = "rejected"
-        guide = db.query(models.Guide).filter(models.Guide.user_id == data.user_id).first()
+        guide = await db.scalar(select(models.Guide).where(models.Guide.user_id == data.user_id).limit(1))
         if guide:
             guide.verified = False
             
-    db.commit()
+    await db.commit()
     return {"message": f"Guide {data.action}d successfully"}
 
 # --- MyDreamProject System ---
-import json
 
 class DreamProjectCreate(BaseModel):
     email: str
     description: str
     tech_preference: Optional[str] = ""
     skill_level: str
+    fresh: Optional[bool] = False # Skip the roadmap cache
+
+def _words(text):
+    return set((text or "").lower().split())
+
+async def cached_roadmap(db, description, tech_preference, skill_level, limit=500):
+    # Roadmap of the most similar stored project at the same skill level, for
+    # when the model is unreachable. None if nothing shares a word.
+    wanted = _words(description) | _words(tech_preference)
+    rows = (await db.scalars(
+        select(models.DreamProject).where(
+            models.DreamProject.skill_level == skill_level,
+            models.DreamProject.roadmap.isnot(None)
+        ).order_by(models.DreamProject.created_at.desc()).limit(limit)
+    )).all()
+
+    best, best_score = None, 0
+    for row in rows:
+        score = len(wanted & (_words(row.description) | _words(row.tech_preference)))
+        if score > best_score:
+            best, best_score = row, score
+    return json.loads(best.roadmap) if best else None
 
 @app.post("/dream-project/create")
-async def create_dream_project(req: DreamProjectCreate, db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.email == req.email).first()
+async def create_dream_project(req: DreamProjectCreate, request: Request, db: AsyncSession = Depends(get_db)):
+    user = await user_cache.get_identity(db, req.email)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    await db.commit() # Don't hold a pooled connection during generation
         
-    roadmap = generate_project_roadmap(req.description, req.tech_preference, req.skill_level)
+    try:
+        roadmap = await run_cancellable(request, generate_project_roadmap(req.description, req.tech_preference, req.skill_level, fresh=req.fresh), "roadmap")
+    except CircuitOpen:
+        roadmap = await cached_roadmap(db, req.description, req.tech_preference, req.skill_level)
+        if roadmap is None:
+            raise
+        metrics.incr("circuit.fallback.roadmap")
     
     new_project = models.DreamProject(
         user_id=user.id,
@@ -579,8 +809,8 @@ async def create_dream_project(req: DreamProjectCreate, db: Session = Depends(ge
         roadmap=json.dumps(roadmap) if roadmap else None
     )
     db.add(new_project)
-    db.commit()
-    db.refresh(new_project)
+    await db.commit()
+    await db.refresh(new_project)
     
     return {
         "id": new_project.id,
@@ -592,11 +822,11 @@ async def create_dream_project(req: DreamProjectCreate, db: Session = Depends(ge
     }
 
 @app.get("/dream-project/all/{email}")
-async def get_user_projects(email: str, db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.email == email).first()
+async def get_user_projects(email: str, db: AsyncSession = Depends(get_db)):
+    user = await user_cache.get_identity(db, email)
     if not user:
         return []
-    projects = db.query(models.DreamProject).filter(models.DreamProject.user_id == user.id).order_by(models.DreamProject.created_at.desc()).all()
+    projects = (await db.scalars(select(models.DreamProject).where(models.DreamProject.user_id == user.id).order_by(models.DreamProject.created_at.desc()))).all()
     return [{
         "id": p.id,
         "description": p.description,
@@ -612,8 +842,8 @@ class ProjectCommentCreate(BaseModel):
     content: str
 
 @app.post("/dream-project/comment")
-async def add_project_comment(req: ProjectCommentCreate, db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.email == req.user_email).first()
+async def add_project_comment(req: ProjectCommentCreate, db: AsyncSession = Depends(get_db)):
+    user = await user_cache.get_identity(db, req.user_email)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
         
@@ -623,12 +853,17 @@ async def add_project_comment(req: ProjectCommentCreate, db: Session = Depends(g
         content=req.content
     )
     db.add(comment)
-    db.commit()
+    await db.commit()
     return {"message": "Comment added"}
 
 @app.get("/dream-project/comments/{project_id}")
-async def get_project_comments(project_id: int, db: Session = Depends(get_db)):
-    comments = db.query(models.ProjectComment).filter(models.ProjectComment.project_id == project_id).order_by(models.ProjectComment.timestamp.asc()).all()
+async def get_project_comments(project_id: int, db: AsyncSession = Depends(get_db)):
+    comments = (await db.scalars(
+        select(models.ProjectComment)
+        .where(models.ProjectComment.project_id == project_id)
+        .order_by(models.ProjectComment.timestamp.asc())
+        .options(selectinload(models.ProjectComment.user))
+    )).all()
     return [{
         "user_name": c.user.name,
         "content": c.content,
@@ -643,8 +878,11 @@ class SimulationRequest(BaseModel):
     history: List[dict] = [] # [{"role": "assistant", "content": "..."}, {"role": "user", "content": "..."}]
 
 @app.post("/simulate")
-async def simulate_experience(req: SimulationRequest):
+async def simulate_experience(req: SimulationRequest, request: Request):
     # If no history, it's the start
-    response_text = generate_simulation_response(req.role, req.user_context, req.history)
+    response_text = await run_cancellable(request, generate_simulation_response(req.role, req.user_context, req.history), "simulate")
     return {"reply": response_text}
 
+@app.post("/simulate/stream")
+async def simulate_experience_stream(req: SimulationRequest, request: Request):
+    return await sse_response(request, generate_simulation_response_stream(req.role, req.user_context, req.history), "simulate")
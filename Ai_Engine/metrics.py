@@ -0,0 +1,47 @@
+import threading
+from collections import defaultdict, deque
+
+# Lightweight in-process metrics, exposed on GET /metrics.
+# Counters are plain integers; timings keep the most recent samples so we can
+# report percentiles without pulling in a metrics library.
+
+MAX_SAMPLES = 1000
+
+_lock = threading.Lock()
+_counters = defaultdict(int)
+_timings = defaultdict(lambda: deque(maxlen=MAX_SAMPLES))
+
+def incr(name, amount=1):
+    with _lock:
+        _counters[name] += amount
+
+def observe(name, value_ms):
+    with _lock:
+        _timings[name].append(value_ms)
+
+def _percentile(ordered, pct):
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def snapshot():
+    with _lock:
+        counters = dict(_counters)
+        timings = {name: sorted(samples) for name, samples in _timings.items() if samples}
+
+    return {
+        "counters": counters,
+        "timings_ms": {
+            name: {
+                "count": len(ordered),
+                "avg": round(sum(ordered) / len(ordered), 2),
+                "p50": round(_percentile(ordered, 50), 2),
+                "p95": round(_percentile(ordered, 95), 2),
+                "p99": round(_percentile(ordered, 99), 2)
+            } for name, ordered in timings.items()
+        }
+    }
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _timings.clear()
@@ -0,0 +1,90 @@
+import argparse
+import datetime
+import importlib
+import os
+import pkgutil
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+
+import migrations
+
+# Versioned schema migrations. Each module in migrations/ is named
+# v<NNN>_<what>.py and defines upgrade(conn); applied versions are recorded in
+# schema_migrations, so every migration runs once per database, in order.
+# database.init_db() runs this on startup; by hand:
+#
+#   python migrate.py            # apply pending migrations
+#   python migrate.py --status   # list applied and pending versions
+#
+# A new migration gets the next number and must work on SQLite and Postgres.
+# It must also be safe to run again on a database it already changed:
+# copy_database.py re-runs the migrations its source was missing over the
+# copied rows.
+
+_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations", _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String),
+    Column("applied_at", DateTime)
+)
+
+def available():
+    # [(version, name, module)] in version order
+    found = []
+    for info in pkgutil.iter_modules([os.path.dirname(migrations.__file__)]):
+        if info.name.startswith("v") and "_" in info.name:
+            version = int(info.name[1:].split("_", 1)[0])
+            found.append((version, info.name, importlib.import_module(f"migrations.{info.name}")))
+    return sorted(found, key=lambda m: m[0])
+
+def applied(conn):
+    return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+def pending(engine):
+    # [(version, name, module)] not applied to this database yet, without
+    # creating anything. A database from before versioned migrations has
+    # every migration pending.
+    done = set()
+    if inspect(engine).has_table(schema_migrations.name):
+        with engine.connect() as conn:
+            done = applied(conn)
+    return [m for m in available() if m[0] not in done]
+
+def upgrade(engine):
+    # Applies every pending migration, each in its own transaction. Returns
+    # the versions applied.
+    _metadata.create_all(bind=engine)
+    done = []
+    for version, name, module in available():
+        with engine.begin() as conn:
+            if engine.dialect.name == "postgresql":
+                # Several API processes may start at once; one migrates, the rest wait
+                conn.execute(text("SELECT pg_advisory_xact_lock(727001)"))
+            if version in applied(conn):
+                continue
+            module.upgrade(conn)
+            conn.execute(schema_migrations.insert().values(
+                version=version, name=name, applied_at=datetime.datetime.utcnow()
+            ))
+        print(f"Applied migration {name}")
+        done.append(version)
+    return done
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply versioned database migrations")
+    parser.add_argument("--status", action="store_true", help="only list applied and pending migrations")
+    args = parser.parse_args()
+
+    from database import engine
+
+    if args.status:
+        _metadata.create_all(bind=engine)
+        with engine.connect() as conn:
+            done = applied(conn)
+        print(f"Database: {engine.url.render_as_string(hide_password=True)}")
+        for version, name, _ in available():
+            print(f"  {'applied' if version in done else 'pending'}  {name}")
+    else:
+        versions = upgrade(engine)
+        print(f"{len(versions)} migration(s) applied" if versions else "Database is up to date")
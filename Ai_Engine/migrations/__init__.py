@@ -0,0 +1,22 @@
+from sqlalchemy import inspect, text
+
+# Versioned migrations, applied in order by migrate.py. Helpers shared by the
+# migration modules live here. Migrations spell out their DDL instead of
+# reading models.py, so an applied migration means the same thing forever.
+
+# Column types that differ between the supported databases
+DIALECT_TYPES = {
+    "sqlite": {"id": "INTEGER NOT NULL", "timestamp": "DATETIME"},
+    "postgresql": {"id": "SERIAL NOT NULL", "timestamp": "TIMESTAMP WITHOUT TIME ZONE"},
+}
+
+def execute_ddl(conn, statement):
+    # Runs a DDL statement after filling in {id}/{timestamp} for this dialect
+    conn.execute(text(statement.format(**DIALECT_TYPES[conn.dialect.name])))
+
+def add_missing_columns(conn, table, columns):
+    # ALTER TABLE ... ADD COLUMN for each {name: type} an older database lacks
+    existing = {c["name"] for c in inspect(conn).get_columns(table)}
+    for name, column_type in columns.items():
+        if name not in existing:
+            execute_ddl(conn, f"ALTER TABLE {table} ADD COLUMN {name} {column_type}")
@@ -0,0 +1,235 @@
+from sqlalchemy import inspect
+
+from migrations import add_missing_columns, execute_ddl
+
+# The schema as it stood when versioned migrations were introduced, written
+# out so this migration never changes when models.py does. Creates the tables
+# a database lacks, with their indexes (what migrate_guide.py and
+# migrate_mentorship.py did), and adds the columns older files lack, such as
+# users.role (what migrate_db.py did). Later schema changes go in new
+# migrations. {id} and {timestamp} are filled in per dialect.
+
+TABLES = [
+    ("users", """
+        CREATE TABLE users (
+            id {id},
+            name VARCHAR,
+            username VARCHAR,
+            email VARCHAR,
+            password VARCHAR,
+            role VARCHAR,
+            mobile_number VARCHAR,
+            dob VARCHAR,
+            gender VARCHAR,
+            country VARCHAR,
+            state_city VARCHAR,
+            qualification_score VARCHAR,
+            profile_photo VARCHAR,
+            timezone VARCHAR,
+            language VARCHAR,
+            created_at {timestamp},
+            is_active BOOLEAN,
+            PRIMARY KEY (id),
+            UNIQUE (username)
+        )""", [
+        "CREATE INDEX ix_users_id ON users (id)",
+        "CREATE UNIQUE INDEX ix_users_email ON users (email)",
+    ]),
+    ("performance", """
+        CREATE TABLE performance (
+            id {id},
+            user_id INTEGER,
+            career VARCHAR,
+            score FLOAT,
+            test_name VARCHAR,
+            difficulty VARCHAR,
+            timestamp {timestamp},
+            PRIMARY KEY (id),
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )""", [
+        "CREATE INDEX ix_performance_id ON performance (id)",
+    ]),
+    ("training_progress", """
+        CREATE TABLE training_progress (
+            id {id},
+            user_id INTEGER,
+            current_phase VARCHAR,
+            current_day INTEGER,
+            day_status VARCHAR,
+            current_task VARCHAR,
+            submission_text VARCHAR,
+            feedback VARCHAR,
+            last_updated {timestamp},
+            PRIMARY KEY (id),
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )""", [
+        "CREATE INDEX ix_training_progress_id ON training_progress (id)",
+    ]),
+    ("guide_profiles", """
+        CREATE TABLE guide_profiles (
+            id {id},
+            user_id INTEGER,
+            document_path VARCHAR,
+            verification_status VARCHAR,
+            expertise_fields VARCHAR,
+            experience_years VARCHAR,
+            linkedin_url VARCHAR,
+            is_onboarded BOOLEAN,
+            created_at {timestamp},
+            PRIMARY KEY (id),
+            UNIQUE (user_id),
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )""", [
+        "CREATE INDEX ix_guide_profiles_id ON guide_profiles (id)",
+    ]),
+    ("mentorship_requests", """
+        CREATE TABLE mentorship_requests (
+            id {id},
+            explorer_id INTEGER,
+            field VARCHAR,
+            title VARCHAR,
+            description VARCHAR,
+            status VARCHAR,
+            created_at {timestamp},
+            PRIMARY KEY (id),
+            FOREIGN KEY (explorer_id) REFERENCES users (id)
+        )""", [
+        "CREATE INDEX ix_mentorship_requests_id ON mentorship_requests (id)",
+    ]),
+    ("chat_sessions", """
+        CREATE TABLE chat_sessions (
+            id {id},
+            request_id INTEGER,
+            explorer_id INTEGER,
+            guide_id INTEGER,
+            created_at {timestamp},
+            PRIMARY KEY (id),
+            FOREIGN KEY (request_id) REFERENCES mentorship_requests (id),
+            FOREIGN KEY (explorer_id) REFERENCES users (id),
+            FOREIGN KEY (guide_id) REFERENCES users (id)
+        )""", [
+        "CREATE INDEX ix_chat_sessions_id ON chat_sessions (id)",
+    ]),
+    ("messages", """
+        CREATE TABLE messages (
+            id {id},
+            session_id INTEGER,
+            sender_id INTEGER,
+            content VARCHAR,
+            timestamp {timestamp},
+            PRIMARY KEY (id),
+            FOREIGN KEY (session_id) REFERENCES chat_sessions (id),
+            FOREIGN KEY (sender_id) REFERENCES users (id)
+        )""", [
+        "CREATE INDEX ix_messages_id ON messages (id)",
+    ]),
+    ("guides", """
+        CREATE TABLE guides (
+            id {id},
+            user_id INTEGER,
+            full_name VARCHAR,
+            email VARCHAR,
+            password VARCHAR,
+            primary_domain VARCHAR,
+            years_experience INTEGER,
+            "current_role" VARCHAR, -- reserved word in Postgres
+            organization VARCHAR,
+            linkedin_portfolio_url VARCHAR,
+            bio VARCHAR,
+            weekly_availability VARCHAR,
+            verified BOOLEAN,
+            created_at {timestamp},
+            PRIMARY KEY (id),
+            UNIQUE (user_id),
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )""", [
+        "CREATE INDEX ix_guides_id ON guides (id)",
+        "CREATE UNIQUE INDEX ix_guides_email ON guides (email)",
+    ]),
+    ("dream_projects", """
+        CREATE TABLE dream_projects (
+            id {id},
+            user_id INTEGER,
+            description VARCHAR,
+            tech_preference VARCHAR,
+            skill_level VARCHAR,
+            image_path VARCHAR,
+            roadmap VARCHAR,
+            created_at {timestamp},
+            PRIMARY KEY (id),
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )""", [
+        "CREATE INDEX ix_dream_projects_id ON dream_projects (id)",
+    ]),
+    ("project_comments", """
+        CREATE TABLE project_comments (
+            id {id},
+            project_id INTEGER,
+            user_id INTEGER,
+            content VARCHAR,
+            timestamp {timestamp},
+            PRIMARY KEY (id),
+            FOREIGN KEY (project_id) REFERENCES dream_projects (id),
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )""", [
+        "CREATE INDEX ix_project_comments_id ON project_comments (id)",
+    ]),
+    ("quiz_questions", """
+        CREATE TABLE quiz_questions (
+            id {id},
+            field VARCHAR,
+            field_key VARCHAR,
+            difficulty VARCHAR,
+            question VARCHAR,
+            payload VARCHAR,
+            served_count INTEGER,
+            created_at {timestamp},
+            PRIMARY KEY (id)
+        )""", [
+        "CREATE INDEX ix_quiz_questions_id ON quiz_questions (id)",
+        "CREATE INDEX ix_quiz_questions_bucket ON quiz_questions (field_key, difficulty, served_count)",
+    ]),
+    ("daily_task_pool", """
+        CREATE TABLE daily_task_pool (
+            id {id},
+            phase VARCHAR,
+            day INTEGER,
+            career VARCHAR,
+            variant INTEGER,
+            task VARCHAR,
+            created_at {timestamp},
+            PRIMARY KEY (id)
+        )""", [
+        "CREATE INDEX ix_daily_task_pool_id ON daily_task_pool (id)",
+        "CREATE UNIQUE INDEX ix_daily_task_pool_key ON daily_task_pool (phase, day, career, variant)",
+    ]),
+]
+
+LEGACY_COLUMNS = {
+    "users": {
+        "username": "VARCHAR",
+        "role": "VARCHAR",
+        "mobile_number": "VARCHAR",
+        "dob": "VARCHAR",
+        "gender": "VARCHAR",
+        "country": "VARCHAR",
+        "state_city": "VARCHAR",
+        "qualification_score": "VARCHAR",
+        "profile_photo": "VARCHAR",
+        "timezone": "VARCHAR",
+        "language": "VARCHAR",
+        "created_at": "{timestamp}",
+        "is_active": "BOOLEAN",
+    },
+    "performance": {"test_name": "VARCHAR"},
+}
+
+def upgrade(conn):
+    existing = set(inspect(conn).get_table_names())
+    for name, create, indexes in TABLES:
+        if name in existing:
+            continue
+        for statement in [create] + indexes:
+            execute_ddl(conn, statement)
+    for table, columns in LEGACY_COLUMNS.items():
+        add_missing_columns(conn, table, columns)
@@ -0,0 +1,24 @@
+from sqlalchemy import text
+
+# Display names for guide domains stored as slugs by early builds (what
+# sync_db_fields.py did).
+
+DOMAINS = {
+    "software_engineering": "Software Engineering",
+    "data_science": "Data Science",
+    "product_management": "Product Management",
+    "ui_ux_design": "UI/UX Design",
+    "marketing": "Marketing",
+    "finance": "Finance",
+}
+
+def upgrade(conn):
+    for old, new in DOMAINS.items():
+        conn.execute(text("UPDATE guides SET primary_domain = :new WHERE primary_domain = :old"), {"old": old, "new": new})
+        conn.execute(
+            text("UPDATE guide_profiles SET expertise_fields = REPLACE(expertise_fields, :old, :new)"),
+            {"old": f'"{old}"', "new": f'"{new}"'}
+        )
+    conn.execute(text(
+        "UPDATE guide_profiles SET expertise_fields = REPLACE(expertise_fields, '\"Software Dev\"', '\"Software Engineering\"')"
+    ))
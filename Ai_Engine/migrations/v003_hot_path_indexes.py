@@ -0,0 +1,24 @@
+from migrations import execute_ddl
+
+# Indexes for the lookups the routes and background workers run all the time.
+# models.py declares the same indexes; keep the two in sync.
+# benchmarks/check_query_plans.py verifies the queries actually use them.
+
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_performance_user_time ON performance (user_id, timestamp)",
+    "CREATE INDEX IF NOT EXISTS ix_training_progress_user ON training_progress (user_id)",
+    "CREATE INDEX IF NOT EXISTS ix_training_progress_queue ON training_progress (day_status, last_updated)",
+    "CREATE INDEX IF NOT EXISTS ix_guide_profiles_status ON guide_profiles (verification_status)",
+    "CREATE INDEX IF NOT EXISTS ix_mentorship_requests_status_field ON mentorship_requests (status, field)",
+    "CREATE INDEX IF NOT EXISTS ix_chat_sessions_explorer ON chat_sessions (explorer_id)",
+    "CREATE INDEX IF NOT EXISTS ix_chat_sessions_guide ON chat_sessions (guide_id)",
+    "CREATE INDEX IF NOT EXISTS ix_messages_session_time ON messages (session_id, timestamp)",
+    "CREATE INDEX IF NOT EXISTS ix_guides_verified_experience ON guides (verified, years_experience)",
+    "CREATE INDEX IF NOT EXISTS ix_dream_projects_user_time ON dream_projects (user_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS ix_dream_projects_level_time ON dream_projects (skill_level, created_at)",
+    "CREATE INDEX IF NOT EXISTS ix_project_comments_project_time ON project_comments (project_id, timestamp)",
+]
+
+def upgrade(conn):
+    for statement in INDEXES:
+        execute_ddl(conn, statement)
@@ -0,0 +1,20 @@
+from migrations import execute_ddl
+
+# Career assistant sessions move from process memory into the database, so
+# every API process can continue any session.
+
+STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS assistant_sessions (
+        id VARCHAR NOT NULL,
+        transcript VARCHAR,
+        context VARCHAR,
+        last_used {timestamp},
+        PRIMARY KEY (id)
+    )""",
+    "CREATE INDEX IF NOT EXISTS ix_assistant_sessions_last_used ON assistant_sessions (last_used)",
+]
+
+def upgrade(conn):
+    for statement in STATEMENTS:
+        execute_ddl(conn, statement)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Boolean, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 import datetime
@@ -41,6 +41,12 @@ class Performance(Base):
 
     user = relationship("User")
 
+    # Hot-path indexes are also created on existing databases by
+    # migrations/v003_hot_path_indexes.py; keep the two in sync.
+    __table_args__ = (
+        Index("ix_performance_user_time", "user_id", "timestamp"),
+    )
+
 class TrainingProgress(Base):
     __tablename__ = "training_progress"
     id = Column(Integer, primary_key=True, index=True)
@@ -68,6 +74,11 @@ class TrainingProgress(Base):
 
     user = relationship("User")
 
+    __table_args__ = (
+        Index("ix_training_progress_user", "user_id"),
+        Index("ix_training_progress_queue", "day_status", "last_updated"), # Grading queue
+    )
+
 class GuideProfile(Base):
     __tablename__ = "guide_profiles"
     id = Column(Integer, primary_key=True, index=True)
@@ -87,6 +98,10 @@ class GuideProfile(Base):
 
     user = relationship("User")
 
+    __table_args__ = (
+        Index("ix_guide_profiles_status", "verification_status"),
+    )
+
 # --- MENTORSHIP SYSTEM MODELS ---
 
 class MentorshipRequest(Base):
@@ -101,6 +116,10 @@ class MentorshipRequest(Base):
     
     explorer = relationship("User", foreign_keys=[explorer_id])
 
+    __table_args__ = (
+        Index("ix_mentorship_requests_status_field", "status", "field"),
+    )
+
 class ChatSession(Base):
     __tablename__ = "chat_sessions"
     id = Column(Integer, primary_key=True, index=True)
@@ -113,6 +132,12 @@ class ChatSession(Base):
     explorer = relationship("User", foreign_keys=[explorer_id])
     guide = relationship("User", foreign_keys=[guide_id])
 
+    # One each, so "explorer_id = ? OR guide_id = ?" can use both
+    __table_args__ = (
+        Index("ix_chat_sessions_explorer", "explorer_id"),
+        Index("ix_chat_sessions_guide", "guide_id"),
+    )
+
 class Message(Base):
     __tablename__ = "messages"
     id = Column(Integer, primary_key=True, index=True)
@@ -120,7 +145,11 @@ class Message(Base):
     sender_id = Column(Integer, ForeignKey("users.id"))
     content = Column(String)
     timestamp = Column(DateTime, default=datetime.datetime.utcnow)
-    
+
+    __table_args__ = (
+        Index("ix_messages_session_time", "session_id", "timestamp"),
+    )
+
 class Guide(Base):
     __tablename__ = "guides"
     id = Column(Integer, primary_key=True, index=True)
@@ -138,6 +167,10 @@ class Guide(Base):
     verified = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
 
+    __table_args__ = (
+        Index("ix_guides_verified_experience", "verified", "years_experience"),
+    )
+
 class DreamProject(Base):
     __tablename__ = "dream_projects"
     id = Column(Integer, primary_key=True, index=True)
@@ -151,6 +184,11 @@ class DreamProject(Base):
     
     user = relationship("User")
 
+    __table_args__ = (
+        Index("ix_dream_projects_user_time", "user_id", "created_at"),
+        Index("ix_dream_projects_level_time", "skill_level", "created_at"), # Roadmap fallback
+    )
+
 class ProjectComment(Base):
     __tablename__ = "project_comments"
     id = Column(Integer, primary_key=True, index=True)
@@ -161,3 +199,54 @@ class ProjectComment(Base):
     
     project = relationship("DreamProject")
     user = relationship("User")
+
+    __table_args__ = (
+        Index("ix_project_comments_project_time", "project_id", "timestamp"),
+    )
+
+# --- QUIZ QUESTION BANK ---
+
+class QuizQuestion(Base):
+    __tablename__ = "quiz_questions"
+    id = Column(Integer, primary_key=True, index=True)
+    field = Column(String) # Field as the user typed it, used for refill prompts
+    field_key = Column(String) # Normalized field, see question_bank.normalize_field
+    difficulty = Column(String) # basic, intermediate, advanced
+    question = Column(String) # Normalized question text, used for de-duplication
+    payload = Column(String) # JSON of the full question object
+    served_count = Column(Integer, default=0) # Retired once it reaches QUESTION_BANK_MAX_SERVES
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_quiz_questions_bucket", "field_key", "difficulty", "served_count"),
+    )
+
+# --- DAILY TASK POOL ---
+
+class DailyTaskPool(Base):
+    __tablename__ = "daily_task_pool"
+    id = Column(Integer, primary_key=True, index=True)
+    phase = Column(String) # basic, intermediate, expert, real_world
+    day = Column(Integer)
+    career = Column(String) # Normalized career interest
+    variant = Column(Integer) # 1..TASK_POOL_VARIANTS
+    task = Column(String) # JSON of the generated task
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_daily_task_pool_key", "phase", "day", "career", "variant", unique=True),
+    )
+
+# --- CAREER ASSISTANT SESSIONS ---
+
+class AssistantSession(Base):
+    # Server-side /chat transcript, shared by every API process (see chat_sessions)
+    __tablename__ = "assistant_sessions"
+    id = Column(String, primary_key=True) # uuid4 hex, handed to the browser
+    transcript = Column(String) # JSON list of {"role", "content"}
+    context = Column(String, nullable=True) # JSON of Ollama's token context from the last turn
+    last_used = Column(DateTime, default=datetime.datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_assistant_sessions_last_used", "last_used"),
+    )
@@ -0,0 +1,93 @@
+import json
+import re
+
+import metrics
+import settings
+
+# Deterministic checks run before a training submission reaches the LLM.
+# Obvious rejects (empty, a few words, the task pasted back, repeated filler,
+# no real words) and obvious accepts (long, original, on-topic prose) are
+# decided here; everything in between goes to the grading queue.
+
+STOPWORDS = {
+    "the", "a", "an", "and", "or", "but", "to", "of", "in", "on", "for", "with",
+    "is", "are", "was", "were", "be", "been", "it", "this", "that", "i", "my",
+    "me", "we", "you", "he", "she", "they", "at", "as", "by", "from", "so",
+    "have", "has", "had", "do", "did", "not", "what", "how", "about", "if"
+}
+
+def _words(text):
+    return re.findall(r"[^\W\d_]+", (text or "").lower())
+
+def _task_text(task):
+    # current_task is stored as JSON; older rows may be plain text
+    try:
+        data = json.loads(task)
+    except (TypeError, ValueError):
+        return task or ""
+    if isinstance(data, dict):
+        return f"{data.get('title', '')} {data.get('description', '')}"
+    return str(data)
+
+def _trigrams(words):
+    return {tuple(words[i:i + 3]) for i in range(len(words) - 2)}
+
+def _copied_fraction(words, task_words):
+    # Share of the submission's word trigrams that also appear in the task
+    grams = _trigrams(words)
+    if not grams:
+        return 0.0
+    return len(grams & _trigrams(task_words)) / len(grams)
+
+def _reject(feedback):
+    metrics.incr("pregrade.rejected")
+    return {"passed": False, "feedback": feedback}
+
+def _accept(feedback):
+    metrics.incr("pregrade.accepted")
+    return {"passed": True, "feedback": feedback}
+
+def check(task, submission):
+    # Returns a grade dict for obvious cases, None when the LLM should decide
+    text = (submission or "").strip()
+    words = _words(text)
+    if not text:
+        return _reject("Your submission is empty. Describe what you did for today's task.")
+    if len(words) < settings.PREGRADE_MIN_WORDS:
+        return _reject("Your submission is too short. Explain what you did and what you learned.")
+
+    # Mostly symbols, digits or keyboard mash rather than words
+    letters = sum(len(w) for w in words)
+    if letters / len(re.sub(r"\s", "", text)) < 0.5:
+        return _reject("We couldn't read your submission. Please write it out in sentences.")
+
+    task_words = _words(_task_text(task))
+    copied = _copied_fraction(words, task_words)
+    if copied >= settings.PREGRADE_MAX_COPIED:
+        return _reject("Your submission repeats the task description. Tell us what you actually did.")
+
+    unique_ratio = len(set(words)) / len(words)
+    if len(words) >= 20 and unique_ratio < 0.3:
+        return _reject("Your submission repeats the same words. Please describe your work in your own words.")
+
+    # Plain English prose has plenty of function words; other languages and
+    # lists of keywords go to the model
+    stopword_ratio = sum(1 for w in words if w in STOPWORDS) / len(words)
+    on_topic = {w for w in task_words if len(w) > 3 and w not in STOPWORDS} & set(words)
+    if (
+        len(words) >= settings.PREGRADE_ACCEPT_WORDS
+        and copied < 0.2
+        and unique_ratio >= 0.4
+        and stopword_ratio >= 0.2
+        and len(on_topic) >= 2
+    ):
+        return _accept("Thorough, detailed submission. Well done, day complete!")
+
+    metrics.incr("pregrade.ambiguous")
+    return None
+
+def avoided_rate(counters):
+    # Fraction of checked submissions that never needed an LLM call
+    decided = counters.get("pregrade.accepted", 0) + counters.get("pregrade.rejected", 0)
+    total = decided + counters.get("pregrade.ambiguous", 0)
+    return round(decided / total, 4) if total else 0.0
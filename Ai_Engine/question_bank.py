@@ -0,0 +1,241 @@
+import asyncio
+import json
+import re
+
+from sqlalchemy import case, func
+
+import metrics
+import models
+import settings
+from circuit_breaker import CircuitOpen
+from database import AsyncSessionLocal
+from generator import fallback_questions, generate_question_batch, generate_questions_stream, is_valid_question
+from scheduler import BATCH, SchedulerBusy
+
+# Persistent bank of validated quiz questions, bucketed by (field, difficulty).
+# /generate serves sets from the bank; a background worker keeps every bucket
+# above the low-water mark so live generation only happens on a cold miss.
+
+# Buckets that need a refill as soon as the worker wakes up: {(field_key, difficulty): field}
+_wanted = {}
+_wake = None
+
+def normalize_field(field):
+    field = re.sub(r'\s+', ' ', (field or "").strip().lower())
+    return re.sub(r'\s*-\s*', ' - ', field)
+
+def normalize_difficulty(difficulty):
+    return (difficulty or "basic").strip().lower()
+
+def _question_key(text):
+    return re.sub(r'\W+', ' ', text.lower()).strip()
+
+def _active(db, field_key, difficulty):
+    return db.query(models.QuizQuestion).filter(
+        models.QuizQuestion.field_key == field_key,
+        models.QuizQuestion.difficulty == difficulty,
+        models.QuizQuestion.served_count < settings.QUESTION_BANK_MAX_SERVES
+    )
+
+def active_count(db, field, difficulty):
+    return _active(db, normalize_field(field), normalize_difficulty(difficulty)).count()
+
+def store_questions(db, field, difficulty, questions):
+    # Adds the valid, not-yet-banked questions. Returns how many were added.
+    field_key = normalize_field(field)
+    difficulty = normalize_difficulty(difficulty)
+
+    existing = {
+        row.question for row in db.query(models.QuizQuestion.question).filter(
+            models.QuizQuestion.field_key == field_key,
+            models.QuizQuestion.difficulty == difficulty
+        )
+    }
+
+    added = 0
+    for q in questions:
+        if not is_valid_question(q):
+            continue
+        key = _question_key(q["question"])
+        if key in existing:
+            continue
+        existing.add(key)
+        db.add(models.QuizQuestion(
+            field=field.strip(),
+            field_key=field_key,
+            difficulty=difficulty,
+            question=key,
+            payload=json.dumps({
+                "question": q["question"].strip(),
+                "options": q["options"],
+                "correct_answer": q["correct_answer"]
+            })
+        ))
+        added += 1
+    db.commit()
+    return added
+
+def _number(questions):
+    return [dict(q, id=i) for i, q in enumerate(questions, start=1)]
+
+def serve_quiz(db, field, difficulty, count=None):
+    # Random set from the bank, or None when the bucket is too small
+    count = count or settings.QUIZ_QUESTION_COUNT
+    field_key = normalize_field(field)
+    difficulty = normalize_difficulty(difficulty)
+
+    rows = _active(db, field_key, difficulty).order_by(func.random()).limit(count).all()
+    if len(rows) < count:
+        return None
+
+    db.query(models.QuizQuestion).filter(
+        models.QuizQuestion.id.in_([r.id for r in rows])
+    ).update({models.QuizQuestion.served_count: models.QuizQuestion.served_count + 1}, synchronize_session=False)
+    db.commit()
+
+    if _active(db, field_key, difficulty).count() < settings.QUESTION_BANK_LOW_WATER:
+        request_refill(field, difficulty)
+
+    return _number([json.loads(r.payload) for r in rows])
+
+def cached_quiz(db, field, difficulty, count=None):
+    # Whatever the bank holds for the field while the model is unreachable:
+    # this difficulty first, then the others, retired questions included.
+    # None when the field was never banked.
+    count = count or settings.QUIZ_QUESTION_COUNT
+    difficulty = normalize_difficulty(difficulty)
+    rows = db.query(models.QuizQuestion).filter(
+        models.QuizQuestion.field_key == normalize_field(field)
+    ).order_by(
+        case((models.QuizQuestion.difficulty == difficulty, 0), else_=1),
+        func.random()
+    ).limit(count).all()
+    if not rows:
+        return None
+    return _number([json.loads(r.payload) for r in rows])
+
+async def get_quiz(db, field, difficulty):
+    # db is the route's AsyncSession; the bank helpers run on its sync view
+    questions = await db.run_sync(serve_quiz, field, difficulty)
+    if questions is not None:
+        metrics.incr("question_bank.hit")
+        return questions
+
+    # Cold miss: generate live, seed the bank and let the worker fill the rest.
+    # Hand the connection back to the pool while the model works.
+    metrics.incr("question_bank.miss")
+    await db.commit()
+    try:
+        generated = await generate_question_batch(field, difficulty)
+    except CircuitOpen:
+        metrics.incr("circuit.fallback.quiz")
+        return await db.run_sync(cached_quiz, field, difficulty) or fallback_questions(field)
+    except SchedulerBusy:
+        raise
+    except Exception as e:
+        print(f"Error generating questions: {e}")
+        generated = []
+    finally:
+        request_refill(field, difficulty)
+
+    await db.run_sync(store_questions, field, difficulty, generated)
+    valid = [q for q in generated if is_valid_question(q)]
+    if not valid:
+        return fallback_questions(field)
+    return _number(valid[:settings.QUIZ_QUESTION_COUNT])
+
+async def stream_quiz(field, difficulty):
+    # Yields questions one by one: the whole set at once on a bank hit,
+    # otherwise each live question as soon as the model finishes it.
+    # Opens its own session because it outlives the request handler.
+    async with AsyncSessionLocal() as db:
+        questions = await db.run_sync(serve_quiz, field, difficulty)
+    if questions is not None:
+        metrics.incr("question_bank.hit")
+        for q in questions:
+            yield q
+        return
+
+    metrics.incr("question_bank.miss")
+    generated = []
+    cached = None
+    try:
+        async for q in generate_questions_stream(field, difficulty):
+            generated.append(q)
+            yield q
+    except CircuitOpen:
+        metrics.incr("circuit.fallback.quiz")
+        async with AsyncSessionLocal() as db:
+            cached = await db.run_sync(cached_quiz, field, difficulty)
+    except SchedulerBusy:
+        raise
+    except Exception as e:
+        print(f"Error generating questions: {e}")
+    finally:
+        # Bank whatever arrived, even if the client left early
+        async with AsyncSessionLocal() as db:
+            await db.run_sync(store_questions, field, difficulty, generated)
+        request_refill(field, difficulty)
+
+    if not generated:
+        for q in cached or fallback_questions(field):
+            yield q
+
+def request_refill(field, difficulty):
+    _wanted[(normalize_field(field), normalize_difficulty(difficulty))] = field.strip()
+    if _wake is not None:
+        _wake.set()
+
+def _low_buckets(db):
+    # Every known bucket whose active count is under the low-water mark
+    rows = db.query(
+        models.QuizQuestion.field_key,
+        models.QuizQuestion.difficulty,
+        func.max(models.QuizQuestion.field),
+        func.sum(case((models.QuizQuestion.served_count < settings.QUESTION_BANK_MAX_SERVES, 1), else_=0))
+    ).group_by(models.QuizQuestion.field_key, models.QuizQuestion.difficulty).all()
+
+    low = {}
+    for field_key, difficulty, field, active in rows:
+        if (active or 0) < settings.QUESTION_BANK_LOW_WATER:
+            low[(field_key, difficulty)] = field
+    return low
+
+async def refill_bucket(field, difficulty, max_batches=3):
+    # Generates batches until the bucket reaches the target size.
+    # Bounded so a model that keeps producing junk can't spin forever.
+    added = 0
+    for _ in range(max_batches):
+        async with AsyncSessionLocal() as db:
+            if await db.run_sync(active_count, field, difficulty) >= settings.QUESTION_BANK_TARGET:
+                break
+        try:
+            generated = await generate_question_batch(field, difficulty, priority=BATCH)
+        except Exception as e:
+            print(f"Question bank refill failed for {field}/{difficulty}: {e}")
+            continue
+        async with AsyncSessionLocal() as db:
+            added += await db.run_sync(store_questions, field, difficulty, generated)
+    metrics.incr("question_bank.refilled", added)
+    return added
+
+async def refill_worker():
+    global _wake
+    _wake = asyncio.Event()
+    while True:
+        async with AsyncSessionLocal() as db:
+            buckets = await db.run_sync(_low_buckets)
+        buckets.update(_wanted)
+        _wanted.clear()
+
+        for (field_key, difficulty), field in buckets.items():
+            try:
+                await refill_bucket(field, difficulty)
+            except Exception as e:
+                print(f"Question bank refill error: {e}")
+
+        try:
+            await asyncio.wait_for(_wake.wait(), timeout=settings.QUESTION_BANK_REFILL_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        _wake.clear()
@@ -0,0 +1,109 @@
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+import metrics
+import settings
+
+# Priority-aware admission for model work. At most LLM_MAX_CONCURRENCY
+# generations run at once; everything else waits in a per-class queue and the
+# highest-priority class is served first. A full queue rejects immediately
+# with SchedulerBusy so the API can answer 503 instead of piling up requests.
+
+INTERACTIVE = 0 # chat, simulate
+QUIZ = 1 # live quiz generation
+GRADING = 2 # training submissions
+BATCH = 3 # roadmaps, task generation, background refills
+
+CLASS_NAMES = {
+    INTERACTIVE: "interactive",
+    QUIZ: "quiz",
+    GRADING: "grading",
+    BATCH: "batch"
+}
+
+class SchedulerBusy(Exception):
+    def __init__(self, priority, retry_after):
+        super().__init__(f"LLM queue for '{CLASS_NAMES[priority]}' is full")
+        self.priority = priority
+        self.retry_after = retry_after
+
+class LLMScheduler:
+    def __init__(self, max_concurrency, queue_limits):
+        self.max_concurrency = max_concurrency
+        self.queue_limits = queue_limits
+        self.active = 0
+        self.queues = {p: deque() for p in CLASS_NAMES}
+        # Moving average of how long a slot is held, for Retry-After
+        self.avg_service_s = 5.0
+
+    def _queued(self):
+        return sum(len(q) for q in self.queues.values())
+
+    def _retry_after(self, priority):
+        ahead = sum(len(self.queues[p]) for p in CLASS_NAMES if p <= priority)
+        return max(1, math.ceil(self.avg_service_s * (ahead + 1) / self.max_concurrency))
+
+    async def acquire(self, priority):
+        if self.active < self.max_concurrency and not self._queued():
+            self.active += 1
+            return
+
+        name = CLASS_NAMES[priority]
+        if len(self.queues[priority]) >= self.queue_limits[name]:
+            metrics.incr(f"scheduler.rejected.{name}")
+            raise SchedulerBusy(priority, self._retry_after(priority))
+
+        waiter = asyncio.get_running_loop().create_future()
+        self.queues[priority].append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Slot was granted just as we were cancelled, hand it on
+                self.release()
+            else:
+                self.queues[priority].remove(waiter)
+            raise
+
+    def release(self):
+        self.active -= 1
+        for priority in sorted(self.queues):
+            queue = self.queues[priority]
+            while queue:
+                waiter = queue.popleft()
+                if not waiter.done():
+                    self.active += 1
+                    waiter.set_result(None)
+                    return
+
+    @asynccontextmanager
+    async def slot(self, priority):
+        name = CLASS_NAMES[priority]
+        queued_at = time.perf_counter()
+        await self.acquire(priority)
+        started_at = time.perf_counter()
+        metrics.observe(f"scheduler.wait.{name}", (started_at - queued_at) * 1000)
+        try:
+            yield
+        finally:
+            held = time.perf_counter() - started_at
+            self.avg_service_s = 0.8 * self.avg_service_s + 0.2 * held
+            self.release()
+
+    def stats(self):
+        return {
+            "active": self.active,
+            "max_concurrency": self.max_concurrency,
+            "queued": {CLASS_NAMES[p]: len(q) for p, q in self.queues.items()}
+        }
+
+_scheduler = None
+
+def get_scheduler():
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = LLMScheduler(settings.LLM_MAX_CONCURRENCY, settings.LLM_QUEUE_LIMITS)
+    return _scheduler
@@ -0,0 +1,81 @@
+import asyncio
+import copy
+import functools
+import inspect
+import re
+
+import metrics
+import settings
+
+# Single-flight coalescing for generator functions. Concurrent calls with the
+# same (function, model, normalized arguments) await one in-flight generation
+# and each get their own copy of the parsed result.
+
+_inflight = {}
+
+class _Flight:
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
+
+def _normalize(value):
+    if isinstance(value, str):
+        return re.sub(r'\s+', ' ', value.strip().lower())
+    if isinstance(value, (list, tuple)):
+        return tuple(_normalize(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _normalize(v)) for k, v in value.items()))
+    return value
+
+def flight_key(name, arguments):
+    # arguments: every parameter by name, defaults included. That covers
+    # priority too: a user's call must not join a background refill's flight
+    # and wait in the batch queue behind it.
+    model = settings.LLM_ROUTES.get(name, {}).get("model", settings.LLM_MODEL)
+    return (name, model, _normalize(arguments))
+
+def coalesce(name):
+    def decorator(fn):
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = flight_key(name, dict(bound.arguments))
+            metrics.incr(f"singleflight.calls.{name}")
+
+            flight = _inflight.get(key)
+            if flight is not None and flight.task.cancelled():
+                # Cancelled from outside; its done-callback hasn't run yet
+                flight = None
+            if flight is None:
+                flight = _Flight(asyncio.ensure_future(fn(*args, **kwargs)))
+                _inflight[key] = flight
+
+                def _done(_, key=key, flight=flight):
+                    if _inflight.get(key) is flight:
+                        del _inflight[key]
+                flight.task.add_done_callback(_done)
+            else:
+                metrics.incr(f"singleflight.coalesced.{name}")
+
+            flight.waiters += 1
+            try:
+                # Shielded so one caller going away doesn't kill the shared generation
+                result = await asyncio.shield(flight.task)
+            finally:
+                flight.waiters -= 1
+                if flight.waiters == 0 and not flight.task.done():
+                    # Unregister now: the task only finishes cancelling on a
+                    # later loop turn, and a caller arriving before then must
+                    # start a new flight rather than join this one
+                    if _inflight.get(key) is flight:
+                        del _inflight[key]
+                    flight.task.cancel()
+            return copy.deepcopy(result)
+        return wrapper
+    return decorator
+
+def in_flight():
+    return len(_inflight)
@@ -0,0 +1,51 @@
+import re
+
+from pydantic import TypeAdapter, ValidationError
+
+import llm_client
+import metrics
+import settings
+from scheduler import BATCH
+
+# Schema-constrained generation. The JSON schema of the expected shape goes to
+# Ollama's `format` parameter, the reply is validated with Pydantic, and a
+# small retry budget covers the occasional bad sample. Attempts and parse
+# failures are counted per function so wasted generations show up in /metrics.
+
+class StructuredOutputError(Exception):
+    pass
+
+def json_schema(schema):
+    return TypeAdapter(schema).json_schema()
+
+def strip_fences(raw):
+    raw = re.sub(r'```json\s*', '', raw)
+    return re.sub(r'```\s*', '', raw).strip()
+
+async def generate_structured(name, prompt, schema, options=None, priority=BATCH, retries=None):
+    # Returns the validated value as plain JSON data, or raises StructuredOutputError
+    adapter = TypeAdapter(schema)
+    retries = settings.LLM_STRUCTURED_RETRIES if retries is None else retries
+
+    for attempt in range(retries + 1):
+        metrics.incr(f"structured.attempts.{name}")
+        response = await llm_client.generate(prompt, options=options, priority=priority, format=adapter.json_schema(), route=name)
+        raw = response.get("response", "")
+        try:
+            return adapter.dump_python(adapter.validate_json(strip_fences(raw)), mode="json")
+        except ValidationError as e:
+            metrics.incr(f"structured.parse_failures.{name}")
+            print(f"Structured output for {name} failed validation (attempt {attempt + 1}): {e.error_count()} errors")
+
+    metrics.incr(f"structured.exhausted.{name}")
+    raise StructuredOutputError(f"{name}: no valid output after {retries + 1} attempts")
+
+def failure_rates(counters):
+    # {function: parse failures / attempts} from a metrics snapshot
+    rates = {}
+    prefix = "structured.attempts."
+    for key, attempts in counters.items():
+        if key.startswith(prefix) and attempts:
+            name = key[len(prefix):]
+            rates[name] = round(counters.get(f"structured.parse_failures.{name}", 0) / attempts, 4)
+    return rates
@@ -0,0 +1,191 @@
+import asyncio
+import datetime
+import json
+
+from sqlalchemy import case, func, select
+from sqlalchemy.exc import IntegrityError
+
+import metrics
+import models
+import settings
+import training
+from circuit_breaker import CircuitOpen
+from database import AsyncSessionLocal, init_db
+from generator import fallback_daily_task, generate_daily_task_variant
+from scheduler import SchedulerBusy
+
+# Shared pool of daily training tasks keyed by (phase, day, career interest),
+# with a few variants per key. Starting a task is a pool lookup; a nightly
+# job pre-generates tomorrow's keys from where users actually are.
+# A user's career interest is the field of their latest quiz (Performance).
+
+DEFAULT_CAREER = "General Career Success"
+
+def normalize_career(career_interest):
+    return " ".join((career_interest or DEFAULT_CAREER).strip().lower().split())
+
+def _latest_career(user_id_column):
+    return select(models.Performance.career).where(
+        models.Performance.user_id == user_id_column
+    ).order_by(models.Performance.timestamp.desc()).limit(1)
+
+def career_interest(db, user_id):
+    # Field of the user's most recent quiz, or DEFAULT_CAREER before their first
+    return db.scalar(_latest_career(user_id)) or DEFAULT_CAREER
+
+def _variants(db, phase, day, career):
+    return db.query(models.DailyTaskPool).filter(
+        models.DailyTaskPool.phase == phase,
+        models.DailyTaskPool.day == day,
+        models.DailyTaskPool.career == career
+    )
+
+def store_task(db, phase, day, career_interest, variant, task):
+    db.add(models.DailyTaskPool(
+        phase=phase,
+        day=day,
+        career=normalize_career(career_interest),
+        variant=variant,
+        task=json.dumps(task)
+    ))
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another worker stored this variant first
+        db.rollback()
+
+def _have_variants(db, phase, day, career):
+    return {row.variant for row in _variants(db, phase, day, career)}
+
+async def _generate_variant(phase, day, career_interest, variant):
+    # The task, or None if this variant can't be generated tonight. A full
+    # queue or open circuit is waited out rather than ending the whole run.
+    for attempt in range(settings.TASK_POOL_BUSY_RETRIES + 1):
+        try:
+            return await generate_daily_task_variant(phase, day, career_interest, variant=variant)
+        except SchedulerBusy as e:
+            metrics.incr("task_pool.busy")
+            if attempt == settings.TASK_POOL_BUSY_RETRIES:
+                print(f"Task pool skipping {phase}/{day}/{career_interest} #{variant}: {e}")
+                return None
+            await asyncio.sleep(e.retry_after)
+        except Exception as e:
+            print(f"Task pool generation failed for {phase}/{day}/{career_interest} #{variant}: {e}")
+            return None
+
+async def fill_key(db, phase, day, career_interest=DEFAULT_CAREER, variants=None):
+    # Generates the missing variants for one key. Returns how many were added.
+    variants = variants or settings.TASK_POOL_VARIANTS
+    career = normalize_career(career_interest)
+    have = await db.run_sync(_have_variants, phase, day, career)
+    await db.commit() # Don't hold a pooled connection during generation
+
+    added = 0
+    for variant in range(1, variants + 1):
+        if variant in have:
+            continue
+        task = await _generate_variant(phase, day, career_interest, variant)
+        if task is None:
+            continue
+        await db.run_sync(store_task, phase, day, career_interest, variant, task)
+        added += 1
+    return added
+
+def nearest_task(db, phase, day, career_interest=DEFAULT_CAREER):
+    # Closest pooled task while the model is unreachable: same phase, same
+    # career if possible, then the nearest day. None when the phase is empty.
+    career = normalize_career(career_interest)
+    row = db.query(models.DailyTaskPool).filter(
+        models.DailyTaskPool.phase == phase
+    ).order_by(
+        case((models.DailyTaskPool.career == career, 0), else_=1),
+        func.abs(models.DailyTaskPool.day - day),
+        func.random()
+    ).first()
+    return json.loads(row.task) if row is not None else None
+
+def _random_variant(db, phase, day, career):
+    row = _variants(db, phase, day, career).order_by(func.random()).first()
+    return json.loads(row.task) if row is not None else None
+
+async def get_task(db, phase, day, career_interest=DEFAULT_CAREER):
+    # db is the route's AsyncSession; the pool helpers run on its sync view
+    career = normalize_career(career_interest)
+    task = await db.run_sync(_random_variant, phase, day, career)
+    if task is not None:
+        metrics.incr("task_pool.hit")
+        return task
+
+    # Cold key: generate the first variant now (concurrent misses share it
+    # through single-flight), the nightly job fills the rest
+    metrics.incr("task_pool.miss")
+    await db.commit() # Don't hold a pooled connection during generation
+    try:
+        task = await generate_daily_task_variant(phase, day, career_interest, variant=1)
+    except CircuitOpen:
+        metrics.incr("circuit.fallback.daily_task")
+        return await db.run_sync(nearest_task, phase, day, career_interest) or fallback_daily_task()
+    except SchedulerBusy:
+        raise
+    except Exception as e:
+        print(f"Error generating daily task: {e}")
+        return fallback_daily_task()
+
+    await db.run_sync(store_task, phase, day, career_interest, 1, task)
+    return task
+
+def tomorrow_keys(db, limit=None):
+    # (phase, day, career interest) keys users will need next, most common
+    # first. Users who haven't finished today still need today's task, so
+    # both days are included.
+    limit = limit or settings.TASK_POOL_PREWARM_MAX_KEYS
+    users = select(
+        models.TrainingProgress.current_phase.label("phase"),
+        models.TrainingProgress.current_day.label("day"),
+        _latest_career(models.TrainingProgress.user_id).scalar_subquery().label("career")
+    ).subquery()
+    rows = db.execute(
+        select(users.c.phase, users.c.day, users.c.career, func.count())
+        .group_by(users.c.phase, users.c.day, users.c.career)
+    ).all()
+
+    demand = {} # (phase, day, normalized career) -> [users, career as users typed it]
+    for phase, day, career, count in rows:
+        career = career or DEFAULT_CAREER
+        for next_phase, next_day in ((phase, day), training.next_day(phase, day)):
+            key = (next_phase, next_day, normalize_career(career))
+            demand.setdefault(key, [0, career])[0] += count
+
+    ranked = sorted(demand.items(), key=lambda item: item[1][0], reverse=True)
+    return [(phase, day, career) for (phase, day, _), (_, career) in ranked[:limit]]
+
+async def prewarm():
+    async with AsyncSessionLocal() as db:
+        keys = await db.run_sync(tomorrow_keys)
+        await db.commit()
+        added = 0
+        for phase, day, career in keys:
+            added += await fill_key(db, phase, day, career)
+    metrics.incr("task_pool.prewarmed", added)
+    print(f"Task pool pre-warm: {len(keys)} keys, {added} new tasks")
+    return added
+
+def _seconds_until(hour):
+    now = datetime.datetime.now()
+    run_at = now.replace(hour=hour, minute=0, second=0, microsecond=0)
+    if run_at <= now:
+        run_at += datetime.timedelta(days=1)
+    return (run_at - now).total_seconds()
+
+async def prewarm_worker():
+    while True:
+        await asyncio.sleep(_seconds_until(settings.TASK_POOL_PREWARM_HOUR))
+        try:
+            await prewarm()
+        except Exception as e:
+            print(f"Task pool pre-warm failed: {e}")
+
+if __name__ == "__main__":
+    # Run a pre-warm now, e.g. from cron: python task_pool.py
+    init_db()
+    asyncio.run(prewarm())
@@ -1,4 +1,5 @@
+import asyncio
 from generator import generate_questions
 
-questions = generate_questions("Music", "basic")
+questions = asyncio.run(generate_questions("Music", "basic"))
 print(questions)
@@ -0,0 +1,39 @@
+import os
+import sys
+import tempfile
+
+# Tests run against the fake LLM backend and throwaway database/cache files,
+# so they need neither Ollama nor the app's real data. The environment has to
+# be set before settings.py is imported.
+
+_workdir = tempfile.mkdtemp(prefix="demodream_tests_")
+os.environ["DEMODREAM_LLM_BACKEND"] = "fake"
+os.environ["DEMODREAM_FAKE_LLM_LATENCY_MS"] = "0"
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_workdir, 'test.db')}"
+os.environ["DEMODREAM_LLM_CACHE_PATH"] = os.path.join(_workdir, "llm_cache.db")
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import pytest
+
+import database
+import metrics
+import models
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    metrics.reset()
+    yield
+
+@pytest.fixture
+def db():
+    # Session on the throwaway database; every table is emptied afterwards
+    database.init_db()
+    session = database.SessionLocal()
+    yield session
+    session.close()
+    with database.engine.begin() as conn:
+        for table in reversed(models.Base.metadata.sorted_tables):
+            conn.execute(table.delete())
@@ -0,0 +1,74 @@
+import asyncio
+import datetime
+
+from fastapi.testclient import TestClient
+
+import chat_sessions
+import metrics
+import models
+import settings
+from generator import session_chat_response
+
+def test_session_round_trips_through_the_database(db):
+    async def run():
+        created = await chat_sessions.create_session([{"role": "user", "content": "Hi"}])
+        created.context = [1, 2, 3]
+        await chat_sessions.save_session(created)
+        return created.id, await chat_sessions.get_session(created.id)
+
+    session_id, loaded = asyncio.run(run())
+    assert (loaded.id, loaded.transcript, loaded.context) == (session_id, [{"role": "user", "content": "Hi"}], [1, 2, 3])
+
+def test_turn_keeps_the_ollama_context(db):
+    async def run():
+        session = await chat_sessions.create_session()
+        async with chat_sessions.locked(session) as current:
+            await session_chat_response(current, "What does a data analyst do?")
+            await chat_sessions.save_session(current)
+        return await chat_sessions.get_session(session.id)
+
+    session = asyncio.run(run())
+    assert [m["role"] for m in session.transcript] == ["user", "assistant"]
+    assert session.context
+
+def test_idle_session_expires_on_lookup(db):
+    session = asyncio.run(chat_sessions.create_session())
+    db.get(models.AssistantSession, session.id).last_used -= datetime.timedelta(seconds=settings.CHAT_SESSION_TTL + 1)
+    db.commit()
+    assert asyncio.run(chat_sessions.get_session(session.id)) is None
+    assert db.query(models.AssistantSession).count() == 0
+
+def test_expire_idle_drops_idle_and_least_recently_used(db, monkeypatch):
+    monkeypatch.setattr(settings, "CHAT_SESSION_MAX", 2)
+    now = datetime.datetime.utcnow()
+    ages = {"idle": settings.CHAT_SESSION_TTL + 1, "old": 30, "recent": 20, "newest": 10}
+    for session_id, age in ages.items():
+        db.add(models.AssistantSession(id=session_id, transcript="[]", last_used=now - datetime.timedelta(seconds=age)))
+    db.commit()
+
+    assert asyncio.run(chat_sessions.expire_idle()) == 2
+    assert {row.id for row in db.query(models.AssistantSession)} == {"recent", "newest"}
+    counters = metrics.snapshot()["counters"]
+    assert (counters["chat_sessions.expired"], counters["chat_sessions.evicted"]) == (1, 1)
+
+def test_chat_route_continues_a_stored_session(db):
+    import main
+
+    client = TestClient(main.app)
+    first = client.post("/chat", json={"message": "I like numbers."})
+    session_id = first.json()["session_id"]
+    second = client.post("/chat", json={"message": "Which jobs fit?", "session_id": session_id})
+
+    assert second.status_code == 200 and second.json()["session_id"] == session_id
+    assert len(asyncio.run(chat_sessions.get_session(session_id)).transcript) == 4
+    assert client.post("/chat", json={"message": "Hello?", "session_id": "unknown"}).status_code == 404
+
+def test_streamed_turn_is_stored(db):
+    import main
+
+    client = TestClient(main.app)
+    session_id = client.post("/chat", json={"message": "I like numbers."}).json()["session_id"]
+    streamed = client.post("/chat/stream", json={"message": "Which jobs fit?", "session_id": session_id})
+
+    assert "event: done" in streamed.text and session_id in streamed.text
+    assert len(asyncio.run(chat_sessions.get_session(session_id)).transcript) == 4
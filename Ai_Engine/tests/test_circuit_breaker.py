@@ -0,0 +1,103 @@
+import pytest
+
+import circuit_breaker
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpen
+from scheduler import SchedulerBusy
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", clock)
+    return clock
+
+def make_breaker():
+    return CircuitBreaker(window=10, min_calls=4, failure_rate=0.5, slow_call_s=5, open_seconds=30)
+
+def open_breaker(breaker):
+    for _ in range(4):
+        breaker.record(False, 0.1)
+    assert breaker.state == OPEN
+
+def test_stays_closed_below_min_calls_and_failure_rate(clock):
+    breaker = make_breaker()
+    for _ in range(3):
+        breaker.record(False, 0.1)
+    assert breaker.state == CLOSED # Fewer than min_calls
+
+    breaker = make_breaker()
+    for ok in [True, True, True, True, False, False, False]:
+        breaker.record(ok, 0.1)
+    assert breaker.state == CLOSED # 3 of 7 failed
+    breaker.check()
+
+def test_opens_on_failure_rate_and_rejects(clock):
+    breaker = make_breaker()
+    open_breaker(breaker)
+
+    with pytest.raises(CircuitOpen) as rejected:
+        breaker.check()
+    assert isinstance(rejected.value, SchedulerBusy)
+    assert rejected.value.retry_after == 31
+
+    clock.now += 20
+    with pytest.raises(CircuitOpen) as rejected:
+        breaker.check()
+    assert rejected.value.retry_after == 11
+
+def test_slow_calls_count_as_failures(clock):
+    breaker = make_breaker()
+    for _ in range(4):
+        breaker.record(True, 6)
+    assert breaker.state == OPEN
+
+def test_per_call_slow_limit(clock):
+    breaker = make_breaker()
+    for _ in range(4):
+        breaker.record(True, 120, slow_call_s=0) # 0: only errors count
+    assert breaker.state == CLOSED
+    for _ in range(4):
+        breaker.record(True, 3, slow_call_s=2)
+    assert breaker.state == OPEN
+
+def test_half_open_trial_success_closes(clock):
+    breaker = make_breaker()
+    open_breaker(breaker)
+    clock.now += 31
+
+    breaker.acquire() # This call is the trial
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpen):
+        breaker.check() # Everyone else waits for the trial
+
+    breaker.record(True, 0.1)
+    assert breaker.state == CLOSED
+    assert breaker.stats()["window_calls"] == 0
+    breaker.check()
+
+def test_half_open_trial_failure_reopens(clock):
+    breaker = make_breaker()
+    open_breaker(breaker)
+    clock.now += 31
+
+    breaker.acquire()
+    breaker.record(False, 0.1)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpen):
+        breaker.check()
+
+def test_released_trial_lets_the_next_call_try(clock):
+    breaker = make_breaker()
+    open_breaker(breaker)
+    clock.now += 31
+
+    breaker.acquire()
+    breaker.release() # Trial was cancelled without an outcome
+    breaker.acquire()
+    assert breaker.state == HALF_OPEN
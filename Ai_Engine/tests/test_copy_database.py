@@ -0,0 +1,38 @@
+import json
+
+from sqlalchemy import text
+
+import migrate
+from copy_database import copy_database
+from database import create_db_engine
+
+def legacy_source(path):
+    # A SQLite file from before versioned migrations, with early-build slugs
+    engine = create_db_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY, name VARCHAR, email VARCHAR, password VARCHAR)"))
+        conn.execute(text("CREATE TABLE guides (id INTEGER PRIMARY KEY, user_id INTEGER, email VARCHAR, primary_domain VARCHAR)"))
+        conn.execute(text("CREATE TABLE guide_profiles (id INTEGER PRIMARY KEY, user_id INTEGER, expertise_fields VARCHAR)"))
+        conn.execute(text("INSERT INTO users (id, name, email, password) VALUES (1, 'Gia', 'gia@example.com', 'x')"))
+        conn.execute(text("INSERT INTO guides (id, user_id, email, primary_domain) VALUES (1, 1, 'gia@example.com', 'data_science')"))
+        conn.execute(text("INSERT INTO guide_profiles (id, user_id, expertise_fields) VALUES (1, 1, :fields)"), {"fields": json.dumps(["data_science", "marketing"])})
+    return engine
+
+def test_copy_applies_the_data_migrations_the_source_missed(tmp_path):
+    source = legacy_source(tmp_path / "old.db")
+    target_url = f"sqlite:///{tmp_path / 'new.db'}"
+
+    assert copy_database(str(source.url), target_url) == 3
+
+    with create_db_engine(target_url).connect() as conn:
+        assert conn.execute(text("SELECT primary_domain FROM guides")).scalar() == "Data Science"
+        assert json.loads(conn.execute(text("SELECT expertise_fields FROM guide_profiles")).scalar()) == ["Data Science", "Marketing"]
+        assert conn.execute(text("SELECT language FROM users")).scalar() == "English" # Column the source lacked keeps its default
+
+def test_source_is_left_untouched(tmp_path):
+    source = legacy_source(tmp_path / "old.db")
+    copy_database(str(source.url), f"sqlite:///{tmp_path / 'new.db'}")
+
+    assert len(migrate.pending(source)) == len(migrate.available())
+    with source.connect() as conn:
+        assert conn.execute(text("SELECT primary_domain FROM guides")).scalar() == "data_science"
@@ -0,0 +1,114 @@
+import asyncio
+import datetime
+import json
+
+import pytest
+
+import grading_queue
+import models
+import settings
+from scheduler import GRADING, SchedulerBusy
+
+TASK = json.dumps({"title": "Reflect", "description": "Write about your goals.", "verification_type": "text_reflection"})
+
+@pytest.fixture(autouse=True)
+def fresh_attempts():
+    grading_queue._attempts.clear()
+
+def submit(db, name, text="I wrote two pages about where I want to be in five years and why.", submitted_at=None):
+    user = models.User(name=name, email=f"{name}@example.com", password="x")
+    db.add(user)
+    db.commit()
+    progress = models.TrainingProgress(user_id=user.id, current_task=TASK)
+    db.add(progress)
+    db.commit()
+    grading_queue.enqueue(db, progress, text)
+    if submitted_at is not None:
+        progress.last_updated = submitted_at
+        db.commit()
+    return progress
+
+def status(db, progress):
+    db.expire_all()
+    return db.get(models.TrainingProgress, progress.id).day_status
+
+def test_claim_takes_oldest_first_and_only_once(db):
+    now = datetime.datetime.utcnow()
+    newer = submit(db, "newer", submitted_at=now - datetime.timedelta(minutes=1))
+    older = submit(db, "older", submitted_at=now - datetime.timedelta(minutes=5))
+
+    batch = grading_queue._claim(db, 1)
+    assert [row.id for row in batch] == [older.id]
+    assert status(db, older) == grading_queue.GRADING
+    assert status(db, newer) == grading_queue.QUEUED
+    assert [row.id for row in grading_queue._claim(db, 5)] == [newer.id]
+    assert grading_queue._claim(db, 5) == []
+
+def test_claim_stamps_the_lease(db):
+    progress = submit(db, "stamped", submitted_at=datetime.datetime.utcnow() - datetime.timedelta(hours=1))
+    grading_queue._claim(db, 1)
+    db.expire_all()
+    age = datetime.datetime.utcnow() - db.get(models.TrainingProgress, progress.id).last_updated
+    assert age < datetime.timedelta(seconds=settings.GRADING_LEASE_SECONDS)
+
+def test_only_expired_leases_are_requeued(db):
+    live = submit(db, "live")
+    dead = submit(db, "dead")
+    grading_queue._claim(db, 2)
+    db.get(models.TrainingProgress, dead.id).last_updated = (
+        datetime.datetime.utcnow() - datetime.timedelta(seconds=settings.GRADING_LEASE_SECONDS + 1)
+    )
+    db.commit()
+
+    assert grading_queue._requeue_interrupted(db) == 1
+    assert status(db, dead) == grading_queue.QUEUED
+    assert status(db, live) == grading_queue.GRADING
+
+def test_apply_advances_on_a_pass(db):
+    progress = submit(db, "passes")
+    batch = grading_queue._claim(db, 1)
+    assert grading_queue._apply(db, batch, [{"passed": True, "feedback": "Good."}]) == 1
+
+    db.expire_all()
+    progress = db.get(models.TrainingProgress, progress.id)
+    assert (progress.day_status, progress.current_day, progress.feedback) == ("completed", 2, "Good.")
+    assert grading_queue.graded_per_minute() >= 1
+
+def test_apply_requeues_when_the_task_changed(db):
+    progress = submit(db, "stale")
+    batch = grading_queue._claim(db, 1)
+    db.get(models.TrainingProgress, progress.id).current_task = "another task"
+    db.commit()
+
+    assert grading_queue._apply(db, batch, [{"passed": True, "feedback": "Good."}]) == 0
+    assert status(db, progress) == grading_queue.QUEUED
+
+def test_ungradable_submission_goes_back_after_max_attempts(db):
+    progress = submit(db, "ungradable")
+    for attempt in range(1, settings.GRADING_MAX_ATTEMPTS):
+        grading_queue._apply(db, grading_queue._claim(db, 1), [None])
+        assert status(db, progress) == grading_queue.QUEUED
+        assert grading_queue._attempts[progress.id] == attempt
+
+    grading_queue._apply(db, grading_queue._claim(db, 1), [None])
+    db.expire_all()
+    progress = db.get(models.TrainingProgress, progress.id)
+    assert (progress.day_status, progress.feedback) == ("pending", grading_queue.RETRY_FEEDBACK)
+    assert progress.id not in grading_queue._attempts
+
+def test_grade_next_batch_with_the_fake_backend(db):
+    rows = [submit(db, f"batch{i}") for i in range(3)]
+    assert asyncio.run(grading_queue.grade_next_batch()) == 3
+    assert all(status(db, row) in ("completed", "failed") for row in rows)
+
+def test_busy_scheduler_releases_the_claim(db, monkeypatch):
+    progress = submit(db, "busy")
+
+    async def busy(batch):
+        raise SchedulerBusy(GRADING, 5)
+
+    monkeypatch.setattr(grading_queue, "_grade", busy)
+    with pytest.raises(SchedulerBusy):
+        asyncio.run(grading_queue.grade_next_batch())
+    assert status(db, progress) == grading_queue.QUEUED
+    assert progress.id not in grading_queue._attempts
@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+import history
+import llm_client
+import settings
+from scheduler import SchedulerBusy
+
+def turn(i):
+    return [
+        {"role": "user", "content": f"Question {i}: " + "tell me more about working as a data analyst " * 3},
+        {"role": "assistant", "content": f"Answer {i}: " + "analysts clean data, build reports and explain results " * 3},
+    ]
+
+def conversation(turns):
+    return [m for i in range(turns) for m in turn(i)]
+
+@pytest.fixture(autouse=True)
+def fresh_summaries():
+    history._summaries.clear()
+
+@pytest.fixture
+def summaries(monkeypatch):
+    # Records what each _summarize call had to summarize
+    calls = []
+
+    async def summarize(previous, messages):
+        calls.append((previous, len(messages)))
+        return f"summary of {len(messages)} messages"
+
+    monkeypatch.setattr(history, "_summarize", summarize)
+    return calls
+
+def test_history_within_budget_is_unchanged(summaries):
+    messages = conversation(2)
+    assert asyncio.run(history.compact(messages, "chat", budget=10000)) == messages
+    assert summaries == []
+
+def test_older_turns_are_folded_into_a_summary(summaries):
+    messages = conversation(10)
+    compacted = asyncio.run(history.compact(messages, "chat", budget=400, keep_turns=2))
+
+    assert compacted[0]["role"] == "system"
+    assert compacted[0]["content"].startswith(history.SUMMARY_PREFIX)
+    assert compacted[1:] == messages[-4:]
+    assert summaries == [(None, 16)]
+    assert history.history_tokens(compacted) <= 400
+
+def test_recent_window_shrinks_to_fit_the_budget(summaries):
+    messages = conversation(10)
+    compacted = asyncio.run(history.compact(messages, "chat", budget=260, keep_turns=4))
+    assert len(compacted) < 1 + 8
+    assert compacted[-1] == messages[-1]
+
+def test_existing_summary_is_rolled_forward(summaries):
+    first = asyncio.run(history.compact(conversation(10), "chat", budget=400, keep_turns=2))
+    grown = first + conversation(16)[20:]
+    second = asyncio.run(history.compact(grown, "chat", budget=400, keep_turns=2))
+
+    assert sum(1 for m in second if m["role"] == "system") == 1
+    assert summaries[-1][0] == "summary of 16 messages" # Previous summary extended
+    assert second[1:] == grown[-4:]
+
+def test_resent_history_reuses_the_cached_summary(summaries):
+    messages = conversation(10)
+    asyncio.run(history.compact(messages, "chat", budget=400, keep_turns=2))
+    # A client without a session resends everything plus one more turn
+    asyncio.run(history.compact(conversation(11), "chat", budget=400, keep_turns=2))
+    assert len(summaries) == 1
+
+def test_extractive_summary_when_the_model_fails(monkeypatch):
+    async def broken(*args, **kwargs):
+        raise ConnectionError("model down")
+
+    monkeypatch.setattr(llm_client, "generate", broken)
+    compacted = asyncio.run(history.compact(conversation(10), "chat", budget=400, keep_turns=2))
+    summary = compacted[0]["content"][len(history.SUMMARY_PREFIX):]
+    assert "assistant: Answer 7:" in summary
+    assert len(summary.split()) <= settings.HISTORY_SUMMARY_TOKENS
+
+def test_busy_scheduler_is_not_swallowed(monkeypatch):
+    async def busy(*args, **kwargs):
+        raise SchedulerBusy(0, 3)
+
+    monkeypatch.setattr(llm_client, "generate", busy)
+    with pytest.raises(SchedulerBusy):
+        asyncio.run(history.compact(conversation(10), "chat", budget=400, keep_turns=2))
+
+def test_summary_with_the_fake_backend():
+    compacted = asyncio.run(history.compact(conversation(10), "chat", budget=400, keep_turns=2))
+    assert compacted[0]["content"].startswith(history.SUMMARY_PREFIX)
+    assert len(compacted[0]["content"]) > len(history.SUMMARY_PREFIX)
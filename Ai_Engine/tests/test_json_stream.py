@@ -0,0 +1,58 @@
+import json
+
+from json_stream import JSONArrayStreamParser
+
+QUESTIONS = [
+    {"question": "Which tool tracks [versions] of code?", "options": ["Git", "{Make}"], "answer": "Git"},
+    {"question": 'Say "hi" \\ then leave', "options": ["]", "}"], "answer": "]"},
+    {"question": "Last one", "options": [], "answer": None},
+]
+
+def feed_all(parser, text, size):
+    items = []
+    for i in range(0, len(text), size):
+        items.extend(parser.feed(text[i:i + size]))
+    return items
+
+def test_elements_arrive_as_soon_as_they_close():
+    parser = JSONArrayStreamParser()
+    first = json.dumps(QUESTIONS[0])
+    assert parser.feed("[" + first[:-1]) == []
+    assert parser.feed("}, {") == [QUESTIONS[0]]
+    assert not parser.finished
+
+def test_brackets_and_quotes_inside_strings_are_ignored():
+    text = json.dumps(QUESTIONS)
+    for size in (1, 3, 7, len(text)):
+        parser = JSONArrayStreamParser()
+        assert feed_all(parser, text, size) == QUESTIONS
+        assert parser.finished
+        assert parser.errors == 0
+
+def test_intro_text_and_code_fences_are_skipped():
+    parser = JSONArrayStreamParser()
+    text = "Sure! Here are your questions:\n```json\n" + json.dumps(QUESTIONS[:1]) + "\n```"
+    assert feed_all(parser, text, 5) == QUESTIONS[:1]
+    assert parser.finished
+
+def test_malformed_element_only_loses_itself():
+    parser = JSONArrayStreamParser()
+    text = '[{"question": "ok 1"}, {"question": "broken", }, {"question": "ok 2"}]'
+    assert feed_all(parser, text, 4) == [{"question": "ok 1"}, {"question": "ok 2"}]
+    assert parser.errors == 1
+
+def test_stops_at_the_closing_bracket():
+    parser = JSONArrayStreamParser()
+    assert parser.feed('[{"a": 1}] trailing [{"b": 2}]') == [{"a": 1}]
+    assert parser.finished
+    assert parser.feed('{"c": 3}') == []
+
+def test_unfinished_stream_yields_only_complete_elements():
+    parser = JSONArrayStreamParser()
+    assert parser.feed('[{"a": 1}, {"b": "cut off') == [{"a": 1}]
+    assert not parser.finished
+
+def test_buffer_does_not_keep_consumed_elements():
+    parser = JSONArrayStreamParser()
+    parser.feed("[" + ", ".join(json.dumps({"n": i, "pad": "x" * 100}) for i in range(50)))
+    assert len(parser.buffer) < 10
@@ -0,0 +1,25 @@
+import asyncio
+
+import pytest
+
+import llm_backends
+
+def test_backend_missing_a_method_fails_on_creation():
+    class GenerateOnly(llm_backends.LLMBackend):
+        async def generate(self, model, prompt, **kwargs):
+            return {"response": "", "done": True}
+
+    with pytest.raises(TypeError):
+        GenerateOnly()
+
+def test_fake_backend_is_deterministic():
+    async def run():
+        first = await llm_backends.FakeBackend(seed=7, latency_ms=0).generate("m", "Say something")
+        second = await llm_backends.FakeBackend(seed=7, latency_ms=0).generate("m", "Say something")
+        return first["response"], second["response"]
+
+    first, second = asyncio.run(run())
+    assert first and first == second
+
+def test_create_by_name():
+    assert llm_backends.create("fake").name == "fake"
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+import generator
+import llm_cache
+import metrics
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    llm_cache.clear()
+    monkeypatch.setitem(llm_cache.settings.LLM_CACHE_TTLS, "roadmap", 60)
+    monkeypatch.setitem(llm_cache.settings.LLM_CACHE_TTLS, "uncached", 0)
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Wall clock used for created_at/last_access
+    now = [1_000_000.0]
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now[0])
+    return now
+
+def get(key, name="roadmap"):
+    return asyncio.run(llm_cache.get(name, key))
+
+def put(key, value, name="roadmap"):
+    asyncio.run(llm_cache.put(name, key, value))
+
+def counters():
+    return metrics.snapshot()["counters"]
+
+def test_round_trip_counts_hits_and_misses():
+    key = llm_cache.make_key("gemma3:1b", "plan my app", {"temperature": 0.5})
+    assert get(key) is None
+    put(key, {"steps": [1, 2]})
+    assert get(key) == {"steps": [1, 2]}
+    assert (counters()["llm_cache.miss.roadmap"], counters()["llm_cache.hit.roadmap"]) == (1, 1)
+
+def test_key_depends_on_model_prompt_and_options():
+    key = llm_cache.make_key("a", "p", {"temperature": 0.5})
+    assert key == llm_cache.make_key("a", "p", {"temperature": 0.5})
+    assert key != llm_cache.make_key("b", "p", {"temperature": 0.5})
+    assert key != llm_cache.make_key("a", "q", {"temperature": 0.5})
+    assert key != llm_cache.make_key("a", "p", {"temperature": 0.6})
+
+def test_entries_expire_after_their_ttl(clock):
+    put("k", "v")
+    clock[0] += 60
+    assert get("k") == "v"
+    clock[0] += 1
+    assert get("k") is None
+    clock[0] -= 1
+    assert get("k") is None # Deleted on the expired read
+
+def test_functions_without_a_ttl_are_not_cached():
+    put("k", "v", name="uncached")
+    assert get("k", name="uncached") is None
+    assert get("k") is None
+
+def test_least_recently_used_entry_is_evicted(clock, monkeypatch):
+    monkeypatch.setattr(llm_cache.settings, "LLM_CACHE_MAX_ENTRIES", 2)
+    monkeypatch.setattr(llm_cache, "TOUCH_FLUSH_SECONDS", 3600)
+    put("a", 1)
+    clock[0] += 1
+    put("b", 2)
+    clock[0] += 1
+    assert get("a") == 1 # Access time is only batched, not written yet
+    clock[0] += 1
+    put("c", 3)
+
+    assert (get("a"), get("b"), get("c")) == (1, None, 3)
+    assert counters()["llm_cache.evicted"] == 1
+
+def test_roadmap_is_reused_unless_fresh_is_asked_for():
+    args = ("A budgeting app for students", "Python", "Beginner")
+    first = asyncio.run(generator.generate_project_roadmap(*args))
+    assert asyncio.run(generator.generate_project_roadmap(*args)) == first
+    assert counters()["llm_cache.hit.roadmap"] == 1
+
+    asyncio.run(generator.generate_project_roadmap(*args, fresh=True))
+    assert counters()["llm_cache.hit.roadmap"] == 1
@@ -0,0 +1,55 @@
+import json
+
+import metrics
+import pregrade
+
+TASK = json.dumps({
+    "title": "Interview a professional",
+    "description": "Reach out to someone working in your target career and ask them about their daily responsibilities and required skills.",
+    "verification_type": "text_reflection"
+})
+
+def rejected(submission, task=TASK):
+    grade = pregrade.check(task, submission)
+    return grade is not None and grade["passed"] is False
+
+def test_empty_and_short_submissions_are_rejected():
+    assert rejected("")
+    assert rejected("   \n ")
+    assert rejected(None)
+    assert rejected("I did it, it was great.")
+
+def test_unreadable_submissions_are_rejected():
+    assert rejected("1234 5678 !!!! ???? #### $$$$ %%%% 9999 0000 ++++ a b")
+
+def test_pasted_task_is_rejected():
+    copied = "Reach out to someone working in your target career and ask them about their daily responsibilities and required skills."
+    assert rejected(copied)
+
+def test_repeated_filler_is_rejected():
+    assert rejected(" ".join(["done task"] * 15))
+
+def test_rejects_are_counted():
+    pregrade.check(TASK, "")
+    assert metrics.snapshot()["counters"]["pregrade.rejected"] == 1
+    assert pregrade.avoided_rate(metrics.snapshot()["counters"]) == 1.0
+
+def test_borderline_submission_goes_to_the_model():
+    submission = (
+        "I messaged a data analyst I know from college. She told me most of her day is cleaning "
+        "spreadsheets and meeting with the sales team, which surprised me."
+    )
+    assert pregrade.check(TASK, submission) is None
+
+def test_thorough_submission_is_accepted():
+    submission = (
+        "Yesterday I reached out to a senior nurse at our local hospital because nursing is my target career. "
+        "We talked for about forty minutes over coffee. She described her daily responsibilities in detail: "
+        "handing over patients at the start of the shift, checking medication charts, talking to worried families, "
+        "and writing notes that the doctors rely on. I asked which skills matter most and she said calm communication "
+        "under pressure, careful attention to detail and physical stamina, since she walks for most of a twelve hour shift. "
+        "She also recommended that I volunteer on weekends to see whether I enjoy the pace of the work before applying, "
+        "and she offered to introduce me to the volunteer coordinator next month."
+    )
+    grade = pregrade.check(TASK, submission)
+    assert grade is not None and grade["passed"] is True
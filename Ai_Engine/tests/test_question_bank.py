@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+import metrics
+import models
+import question_bank
+import settings
+from database import AsyncSessionLocal
+
+@pytest.fixture(autouse=True)
+def no_pending_refills():
+    question_bank._wanted.clear()
+
+def question(text, answer="A"):
+    return {
+        "question": text,
+        "options": ["A. one", "B. two", "C. three", "D. four"],
+        "correct_answer": answer
+    }
+
+def bank(db, field, difficulty, count, start=0):
+    return question_bank.store_questions(db, field, difficulty, [question(f"Question number {i}?") for i in range(start, start + count)])
+
+def test_store_skips_invalid_and_duplicate_questions(db):
+    added = question_bank.store_questions(db, "Data Science", "Basic", [
+        question("What is a mean?"),
+        question("what is a MEAN"), # Same question, different case and punctuation
+        {"question": "No options?", "options": [], "correct_answer": "A"},
+        question("What is a median?", answer="E")
+    ])
+    assert added == 1
+    assert question_bank.store_questions(db, "data  science", "basic", [question("What is a mean?")]) == 0
+    assert question_bank.active_count(db, " DATA SCIENCE ", "basic") == 1
+
+def test_field_names_are_normalized():
+    assert question_bank.normalize_field("  Data   Science ") == "data science"
+    assert question_bank.normalize_field("UX-Design") == question_bank.normalize_field("ux - design")
+    assert question_bank.normalize_difficulty(None) == "basic"
+
+def test_small_bucket_is_not_served(db):
+    bank(db, "Law", "basic", settings.QUIZ_QUESTION_COUNT - 1)
+    assert question_bank.serve_quiz(db, "Law", "basic") is None
+
+def test_serve_returns_numbered_questions_and_counts_serves(db):
+    bank(db, "Law", "basic", settings.QUIZ_QUESTION_COUNT)
+    quiz = question_bank.serve_quiz(db, "law", "Basic")
+
+    assert [q["id"] for q in quiz] == list(range(1, settings.QUIZ_QUESTION_COUNT + 1))
+    assert len({q["question"] for q in quiz}) == settings.QUIZ_QUESTION_COUNT
+    assert {row.served_count for row in db.query(models.QuizQuestion)} == {1}
+
+def test_worn_out_questions_retire_and_low_bucket_asks_for_a_refill(db, monkeypatch):
+    monkeypatch.setattr(settings, "QUESTION_BANK_MAX_SERVES", 2)
+    bank(db, "Law", "basic", settings.QUIZ_QUESTION_COUNT)
+    assert question_bank.serve_quiz(db, "Law", "basic") is not None
+    assert ("law", "basic") in question_bank._wanted # Below the low-water mark
+    assert question_bank.serve_quiz(db, "Law", "basic") is not None
+    assert question_bank.serve_quiz(db, "Law", "basic") is None # Every question served twice
+
+def test_cached_quiz_prefers_the_same_difficulty(db):
+    bank(db, "Law", "expert", 3)
+    bank(db, "Law", "basic", 3, start=100)
+    quiz = question_bank.cached_quiz(db, "Law", "expert", count=3)
+    assert {q["question"] for q in quiz} == {f"Question number {i}?" for i in range(3)}
+    assert question_bank.cached_quiz(db, "Medicine", "expert") is None
+
+def test_cold_miss_generates_and_seeds_the_bank(db):
+    async def quiz():
+        async with AsyncSessionLocal() as session:
+            return await question_bank.get_quiz(session, "Marine Biology", "basic")
+
+    first = asyncio.run(quiz())
+    assert len(first) == settings.QUIZ_QUESTION_COUNT
+    assert question_bank.active_count(db, "marine biology", "basic") >= settings.QUIZ_QUESTION_COUNT
+    assert ("marine biology", "basic") in question_bank._wanted
+
+    asyncio.run(quiz())
+    counters = metrics.snapshot()["counters"]
+    assert (counters["question_bank.miss"], counters["question_bank.hit"]) == (1, 1)
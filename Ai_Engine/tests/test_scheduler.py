@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from scheduler import BATCH, GRADING, INTERACTIVE, QUIZ, LLMScheduler, SchedulerBusy
+
+LIMITS = {"interactive": 10, "quiz": 10, "grading": 10, "batch": 10}
+
+def test_free_slots_are_granted_immediately():
+    async def run():
+        scheduler = LLMScheduler(2, LIMITS)
+        await scheduler.acquire(BATCH)
+        await scheduler.acquire(BATCH)
+        assert scheduler.active == 2
+
+    asyncio.run(run())
+
+def test_waiters_are_served_by_priority_then_arrival():
+    async def run():
+        scheduler = LLMScheduler(1, LIMITS)
+        await scheduler.acquire(BATCH) # Holds the only slot
+        order = []
+
+        async def job(priority, name):
+            async with scheduler.slot(priority):
+                order.append(name)
+
+        tasks = [asyncio.create_task(job(p, n)) for p, n in [
+            (BATCH, "batch"), (GRADING, "grading"), (QUIZ, "quiz 1"), (INTERACTIVE, "chat"), (QUIZ, "quiz 2")
+        ]]
+        await asyncio.sleep(0)
+        scheduler.release()
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(run()) == ["chat", "quiz 1", "quiz 2", "grading", "batch"]
+
+def test_full_queue_rejects_with_retry_after():
+    async def run():
+        scheduler = LLMScheduler(1, {**LIMITS, "batch": 1})
+        await scheduler.acquire(BATCH)
+        waiting = asyncio.create_task(scheduler.acquire(BATCH))
+        await asyncio.sleep(0)
+        with pytest.raises(SchedulerBusy) as busy:
+            await scheduler.acquire(BATCH)
+        assert busy.value.priority == BATCH
+        assert busy.value.retry_after >= 1
+        waiting.cancel()
+
+    asyncio.run(run())
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def run():
+        scheduler = LLMScheduler(1, LIMITS)
+        await scheduler.acquire(BATCH)
+        cancelled = asyncio.create_task(scheduler.acquire(INTERACTIVE))
+        served = asyncio.create_task(scheduler.acquire(BATCH))
+        await asyncio.sleep(0)
+
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        assert scheduler.stats()["queued"]["interactive"] == 0
+
+        scheduler.release()
+        await asyncio.wait_for(served, timeout=1)
+        assert scheduler.active == 1
+
+    asyncio.run(run())
+
+def test_slot_granted_while_cancelled_is_handed_on():
+    async def run():
+        scheduler = LLMScheduler(1, LIMITS)
+        await scheduler.acquire(BATCH)
+        first = asyncio.create_task(scheduler.acquire(QUIZ))
+        second = asyncio.create_task(scheduler.acquire(QUIZ))
+        await asyncio.sleep(0)
+
+        scheduler.release() # Grants the slot to first...
+        first.cancel() # ...which is cancelled before it runs
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        await asyncio.wait_for(second, timeout=1)
+        assert scheduler.active == 1
+
+    asyncio.run(run())
@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+import singleflight
+from singleflight import coalesce
+
+def make_generator(delay=0.05):
+    calls = []
+
+    @coalesce("grade")
+    async def generate(task, submission, priority=1):
+        calls.append((task, submission, priority))
+        await asyncio.sleep(delay)
+        return {"task": task, "feedback": []}
+
+    return generate, calls
+
+def test_concurrent_calls_share_one_generation():
+    generate, calls = make_generator()
+
+    async def run():
+        return await asyncio.gather(
+            generate("Task", "My work"),
+            generate("  task ", "my   WORK"), # Same after normalization
+            generate(task="Task", submission="My work"),
+        )
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert results[0] == results[1] == results[2]
+    results[0]["feedback"].append("changed")
+    assert results[1]["feedback"] == [] # Each caller gets its own copy
+    assert singleflight.in_flight() == 0
+
+def test_different_arguments_or_priority_do_not_share():
+    generate, calls = make_generator()
+
+    async def run():
+        await asyncio.gather(
+            generate("Task", "My work"),
+            generate("Task", "Other work"),
+            generate("Task", "My work", priority=3),
+        )
+
+    asyncio.run(run())
+    assert len(calls) == 3
+
+def test_one_waiter_leaving_keeps_the_generation():
+    generate, calls = make_generator()
+
+    async def run():
+        leaving = asyncio.create_task(generate("Task", "My work"))
+        staying = asyncio.create_task(generate("Task", "My work"))
+        await asyncio.sleep(0.01)
+        leaving.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leaving
+        return await staying
+
+    assert asyncio.run(run())["task"] == "Task"
+    assert len(calls) == 1
+
+def test_last_waiter_leaving_cancels_the_generation():
+    finished = []
+
+    @coalesce("grade")
+    async def generate(task):
+        await asyncio.sleep(0.05)
+        finished.append(task)
+
+    async def run():
+        caller = asyncio.create_task(generate("Task"))
+        await asyncio.sleep(0.01)
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        await asyncio.sleep(0.1)
+
+    asyncio.run(run())
+    assert finished == []
+    assert singleflight.in_flight() == 0
+
+def test_caller_arriving_while_flight_is_cancelled_starts_a_new_one():
+    # The abandoned flight's task finishes cancelling on a later loop turn;
+    # a caller arriving before that must not inherit its CancelledError
+    generate, calls = make_generator()
+
+    async def run():
+        first = asyncio.create_task(generate("Task", "My work"))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        second = asyncio.create_task(generate("Task", "My work"))
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(run())["task"] == "Task"
+    assert len(calls) == 2
+
+def test_errors_reach_every_waiter():
+    @coalesce("grade")
+    async def generate(task):
+        await asyncio.sleep(0.01)
+        raise ValueError("bad output")
+
+    async def run():
+        return await asyncio.gather(generate("Task"), generate("Task"), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, ValueError) for r in results)
+    assert singleflight.in_flight() == 0
@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+import llm_client
+import metrics
+import structured
+from llm_schemas import DailyTask, GradeResult
+
+@pytest.fixture
+def replies(monkeypatch):
+    # Scripted model replies; records the format each call asked for
+    script = []
+    formats = []
+
+    async def generate(prompt, options=None, priority=None, format=None, route=None):
+        formats.append(format)
+        return {"response": script.pop(0)}
+
+    monkeypatch.setattr(llm_client, "generate", generate)
+    return script, formats
+
+def run(retries=1):
+    return asyncio.run(structured.generate_structured("grade", "Grade this", GradeResult, retries=retries))
+
+def counters():
+    return metrics.snapshot()["counters"]
+
+def test_valid_reply_needs_one_attempt(replies):
+    script, formats = replies
+    script.append('{"passed": true, "feedback": "Nice."}')
+    assert run() == {"passed": True, "feedback": "Nice."}
+    assert formats == [GradeResult.model_json_schema()]
+    assert counters()["structured.attempts.grade"] == 1
+    assert "structured.parse_failures.grade" not in counters()
+
+def test_code_fences_are_stripped(replies):
+    script, _ = replies
+    script.append('```json\n{"passed": false, "feedback": "Too short."}\n```')
+    assert run(retries=0)["passed"] is False
+
+def test_bad_reply_is_retried(replies):
+    script, _ = replies
+    script.extend(['{"passed": "maybe"', '{"passed": true, "feedback": "Ok."}'])
+    assert run(retries=1)["passed"] is True
+    assert (counters()["structured.attempts.grade"], counters()["structured.parse_failures.grade"]) == (2, 1)
+    assert structured.failure_rates(counters()) == {"grade": 0.5}
+
+def test_retry_budget_is_bounded(replies):
+    script, formats = replies
+    script.extend(["not json"] * 5)
+    with pytest.raises(structured.StructuredOutputError):
+        run(retries=2)
+    assert len(formats) == 3
+    assert counters()["structured.exhausted.grade"] == 1
+    assert len(script) == 2
+
+def test_fake_backend_output_validates():
+    task = asyncio.run(structured.generate_structured("daily_task", "Create a daily task", DailyTask, retries=0))
+    assert DailyTask.model_validate(task).title
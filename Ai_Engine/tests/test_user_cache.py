@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+import metrics
+import models
+import user_cache
+from database import AsyncSessionLocal
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    user_cache._entries.clear()
+
+def add_user(db, name, role="explorer"):
+    db.add(models.User(name=name, email=f"{name}@example.com", password="x", role=role))
+    db.commit()
+    return f"{name}@example.com"
+
+def lookup(*emails):
+    async def run():
+        async with AsyncSessionLocal() as session:
+            return [await user_cache.get_identity(session, email) for email in emails]
+    return asyncio.run(run())
+
+def counters():
+    return metrics.snapshot()["counters"]
+
+def test_second_lookup_is_a_hit(db):
+    email = add_user(db, "ana")
+    first, second = lookup(email, email)
+    assert first == second == user_cache.UserIdentity(first.id, "explorer", "ana")
+    assert (counters()["user_cache.miss"], counters()["user_cache.hit"]) == (1, 1)
+    assert user_cache.stats(counters()) == {"size": 1, "hit_rate": 0.5}
+
+def test_unknown_email_is_not_cached(db):
+    assert lookup("nobody@example.com") == [None]
+    add_user(db, "nobody")
+    assert lookup("nobody@example.com")[0].name == "nobody"
+
+def test_entries_expire_after_the_ttl(db, monkeypatch):
+    email = add_user(db, "ben")
+    now = [1000.0]
+    monkeypatch.setattr(user_cache.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(user_cache.settings, "USER_CACHE_TTL", 60)
+    lookup(email)
+    now[0] += 61
+    lookup(email)
+    assert counters()["user_cache.expired"] == 1
+    assert counters()["user_cache.miss"] == 2
+
+def test_least_recently_used_entry_is_evicted(db, monkeypatch):
+    monkeypatch.setattr(user_cache.settings, "USER_CACHE_MAX", 2)
+    a, b, c = (add_user(db, name) for name in ("a", "b", "c"))
+    lookup(a, b, a, c) # b is the least recently used when c arrives
+    assert list(user_cache._entries) == [a, c]
+    assert counters()["user_cache.evicted"] == 1
+
+def test_invalidate_shows_the_new_role(db):
+    email = add_user(db, "cleo")
+    lookup(email)
+    db.query(models.User).filter(models.User.email == email).update({"role": "guide"})
+    db.commit()
+    assert lookup(email)[0].role == "explorer" # Cached
+    user_cache.invalidate(email)
+    assert lookup(email)[0].role == "guide"
+
+def test_lookup_racing_an_invalidate_does_not_store_the_old_row(db):
+    email = add_user(db, "dan")
+
+    async def run():
+        async with AsyncSessionLocal() as session:
+            execute = session.execute
+
+            async def execute_then_update(*args, **kwargs):
+                # The row is read, then a role change commits and invalidates
+                # before this lookup gets to store it
+                result = await execute(*args, **kwargs)
+                user_cache.invalidate(email)
+                return result
+
+            session.execute = execute_then_update
+            return await user_cache.get_identity(session, email)
+
+    assert asyncio.run(run()).name == "dan"
+    assert email not in user_cache._entries
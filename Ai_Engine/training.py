@@ -0,0 +1,33 @@
+# Dream Training progression rules, shared by the API and background jobs.
+
+# Max days per phase
+MAX_DAYS = {
+    "basic": 15,
+    "intermediate": 15,
+    "expert": 30
+}
+
+NEXT_PHASE = {
+    "basic": "intermediate",
+    "intermediate": "expert",
+    "expert": "real_world" # Certificate earned
+}
+
+def next_day(phase, day):
+    # The (phase, day) a user moves to after passing this one
+    if day >= MAX_DAYS.get(phase, 15):
+        if phase in NEXT_PHASE:
+            return NEXT_PHASE[phase], 1
+        return phase, day
+    return phase, day + 1
+
+def apply_grade(progress, grade, submission_text):
+    progress.submission_text = submission_text
+    progress.feedback = grade.get("feedback", "Recorded.")
+
+    if grade.get("passed", False):
+        progress.day_status = "completed"
+        progress.current_phase, progress.current_day = next_day(progress.current_phase, progress.current_day)
+        progress.current_task = None # Clear for next day
+    else:
+        progress.day_status = "failed" # Retry needed
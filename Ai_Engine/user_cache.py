@@ -0,0 +1,62 @@
+import time
+from collections import OrderedDict, namedtuple
+
+from sqlalchemy import select
+
+import metrics
+import models
+import settings
+
+# email -> (id, role, name) for routes that only need to know who is calling.
+# Nearly every route starts with this lookup and the chat page polls every few
+# seconds, so identities are kept in memory for USER_CACHE_TTL seconds.
+# Routes that change a user's role or name call invalidate() after their
+# commit; the TTL bounds how stale other server processes can get.
+
+UserIdentity = namedtuple("UserIdentity", ["id", "role", "name"])
+
+_entries = OrderedDict() # email -> (identity, loaded_at), least recently used first
+# Bumped by invalidate(): a lookup that raced an update must not store the old row
+_version = 0
+
+async def get_identity(db, email):
+    # UserIdentity for email, or None if there is no such user. Misses are
+    # not cached, so a new signup is visible right away.
+    entry = _entries.get(email)
+    if entry is not None:
+        identity, loaded_at = entry
+        if time.monotonic() - loaded_at <= settings.USER_CACHE_TTL:
+            _entries.move_to_end(email)
+            metrics.incr("user_cache.hit")
+            return identity
+        del _entries[email]
+        metrics.incr("user_cache.expired")
+    metrics.incr("user_cache.miss")
+
+    version = _version
+    row = (await db.execute(
+        select(models.User.id, models.User.role, models.User.name).where(models.User.email == email).limit(1)
+    )).first()
+    if row is None:
+        return None
+    identity = UserIdentity(*row)
+    if version == _version and settings.USER_CACHE_MAX > 0:
+        _entries[email] = (identity, time.monotonic())
+        _entries.move_to_end(email)
+        while len(_entries) > settings.USER_CACHE_MAX:
+            _entries.popitem(last=False)
+            metrics.incr("user_cache.evicted")
+    return identity
+
+def invalidate(email):
+    global _version
+    _version += 1
+    _entries.pop(email, None)
+
+def stats(counters):
+    hits = counters.get("user_cache.hit", 0)
+    lookups = hits + counters.get("user_cache.miss", 0)
+    return {
+        "size": len(_entries),
+        "hit_rate": round(hits / lookups, 3) if lookups else 0.0
+    }
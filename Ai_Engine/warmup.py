@@ -0,0 +1,65 @@
+import asyncio
+import time
+
+from sqlalchemy import text
+
+import llm_client
+import metrics
+import settings
+from database import AsyncSessionLocal
+from scheduler import INTERACTIVE, get_scheduler
+
+# Startup warm-up behind GET /ready. The database is touched once and every
+# configured model is loaded into Ollama with an empty prompt, so the load
+# balancer only routes traffic here once the first request won't hang.
+
+_database_ready = False
+_models_ready = {} # model -> seconds the load took
+
+def configured_models():
+    return llm_client.route_models()
+
+def is_ready():
+    return _database_ready and all(model in _models_ready for model in configured_models())
+
+def status():
+    return {
+        "ready": is_ready(),
+        "database": _database_ready,
+        "models": {model: model in _models_ready for model in configured_models()},
+        "model_load_s": dict(_models_ready)
+    }
+
+async def warm_database():
+    global _database_ready
+    async with AsyncSessionLocal() as db:
+        await db.execute(text("SELECT 1"))
+    _database_ready = True
+
+async def warm_model(model):
+    # An empty prompt makes Ollama load the model without generating anything
+    start = time.perf_counter()
+    async with get_scheduler().slot(INTERACTIVE):
+        await llm_client.get_client().generate(model=model, prompt="", keep_alive=settings.LLM_KEEP_ALIVE)
+    elapsed = time.perf_counter() - start
+    _models_ready[model] = round(elapsed, 2)
+    metrics.observe(f"warmup.{model}", elapsed * 1000)
+    print(f"Model {model} warm in {elapsed:.1f}s")
+
+async def warm_up():
+    # Retries until everything is warm; the model server may still be starting
+    delay = 1
+    while not is_ready():
+        try:
+            if not _database_ready:
+                await warm_database()
+            for model in configured_models():
+                if model not in _models_ready:
+                    if settings.LLM_WARMUP:
+                        await warm_model(model)
+                    else:
+                        _models_ready[model] = 0
+        except Exception as e:
+            print(f"Warm-up not finished, retrying in {delay}s: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30)
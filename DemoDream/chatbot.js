@@ -47,7 +47,32 @@ document.addEventListener("DOMContentLoaded", () => {
     closeBtn.addEventListener("click", toggleChat);
 
     // History State
+    // The transcript lives on the server; we keep a local copy only to
+    // rebuild the session if the server has expired it.
     let chatHistory = [];
+    let chatSessionId = null;
+
+    async function postChat(text, signal) {
+        const body = chatSessionId
+            ? { message: text, session_id: chatSessionId }
+            : { message: text, history: chatHistory };
+        let res = await fetch("http://127.0.0.1:8000/chat", {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify(body),
+            signal: signal
+        });
+        if (res.status === 404 && chatSessionId) {
+            // Session expired on the server, resend the transcript once
+            res = await fetch("http://127.0.0.1:8000/chat", {
+                method: "POST",
+                headers: { "Content-Type": "application/json" },
+                body: JSON.stringify({ message: text, session_id: chatSessionId, history: chatHistory }),
+                signal: signal
+            });
+        }
+        return res;
+    }
 
     // Send Message
     async function sendMessage() {
@@ -66,15 +91,7 @@ document.addEventListener("DOMContentLoaded", () => {
         const timeoutId = setTimeout(() => controller.abort(), 60000); // 60s timeout
 
         try {
-            const res = await fetch("http://127.0.0.1:8000/chat", {
-                method: "POST",
-                headers: { "Content-Type": "application/json" },
-                body: JSON.stringify({
-                    message: text,
-                    history: chatHistory
-                }),
-                signal: controller.signal
-            });
+            const res = await postChat(text, controller.signal);
             clearTimeout(timeoutId);
 
             if (!res.ok) {
@@ -90,6 +107,7 @@ document.addEventListener("DOMContentLoaded", () => {
             // Bot Response
             if (data.reply) {
                 appendMessage(data.reply, "bot");
+                if (data.session_id) chatSessionId = data.session_id;
 
                 // Update History
                 chatHistory.push({ role: "user", content: text });